@@ -1,6 +1,10 @@
 class Photo < ApplicationRecord
+  # Photos stored by data_collection/photo_store.py are served from public/ by path
+  # (PHOTO_PUBLIC_PREFIX, "/photos/<hash>.jpg" by default) rather than by absolute URL
+  LOCAL_PATH = %r{\A/(?!/)\S+\z}
+
   belongs_to :taco
 
   validates :url, presence: true
-  validates :url, format: { with: URI.regexp(%w[http https]), message: "must be a valid URL" }
+  validates :url, format: { with: Regexp.union(URI.regexp(%w[http https]), LOCAL_PATH), message: "must be a valid URL or a local photo path" }
 end
@@ -1,16 +1,34 @@
+import argparse
 import json
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 import time
+import heapq
+import itertools
+from collections import deque
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
 import os
-import psycopg2
-import psycopg2.extras
+from concurrent.futures import ThreadPoolExecutor
 import uuid
 from dotenv import load_dotenv
 
+from db import ConnectionPool, close_pool, get_pool
+from db_writer import BatchWriter
+from keyword_matcher import KeywordMatcher
+from price_extractor import MIN_PRICE_CONFIDENCE, PriceExtractor
+from geo_tiles import grid_tiles, point_in_polygon, polygon_bounds, split_tile, tile_intersects_polygon, tile_key
+from rate_limiter import TokenBucketRateLimiter
+from schema import migrate
+from sinks import RECORD_TABLES, CsvSink, DataFrameSink, DatabaseSink, ParquetSink, record_rows
+from columnar import EXTENSIONS, write_dataframe
+from run_journal import RunJournal
+from metrics import RunMetrics
+from profiler import StageProfiler
+from response_cache import PlacesResponseCache, CacheMissError
+
 # Load environment variables
 load_dotenv()
 
@@ -18,27 +36,153 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# API statuses worth caching; errors and quota failures are always refetched
+CACHEABLE_STATUSES = ('OK', 'ZERO_RESULTS')
+
+# Columns written per table, in foreign key order (restaurants, tacos, photos, then the taco_photos links)
+TABLE_COLUMNS = {
+    'restaurants': ['id', 'name', 'street_address', 'city', 'state', 'zip', 'latitude', 'longitude',
+                    'phone', 'website', 'yelp_id', 'google_rating', 'google_price_level',
+                    'google_user_ratings_total', 'place_id'],
+    'tacos': ['id', 'restaurant_id', 'name', 'description', 'price_cents', 'calories',
+              'tortilla_type', 'protein_type', 'is_vegan', 'is_bulk', 'is_daily_special',
+              'available_from', 'available_to'],
+    'photos': ['id', 'restaurant_id', 'taco_id', 'photo_reference', 'user_id', 'url', 'is_user_uploaded'],
+    'taco_photos': ['taco_id', 'photo_id'],
+    'reviews': ['id', 'restaurant_id', 'author_name', 'author_url', 'google_rating',
+                'review_text', 'review_time', 'relative_time_description',
+                'language', 'review_date', 'content'],
+}
+
+# Upserts so incremental runs refresh existing rows in place. Restaurants match on the Google
+# place_id; the other tables use ids derived from it (see stable_id).
+CONFLICT_CLAUSES = {
+    'restaurants': '''ON CONFLICT (place_id) DO UPDATE SET
+        name = EXCLUDED.name, street_address = EXCLUDED.street_address, city = EXCLUDED.city,
+        state = EXCLUDED.state, zip = EXCLUDED.zip, latitude = EXCLUDED.latitude,
+        longitude = EXCLUDED.longitude, phone = EXCLUDED.phone, website = EXCLUDED.website,
+        google_rating = EXCLUDED.google_rating, google_price_level = EXCLUDED.google_price_level,
+        google_user_ratings_total = EXCLUDED.google_user_ratings_total, updated_at = NOW()''',
+    'tacos': '''ON CONFLICT (id) DO UPDATE SET
+        name = EXCLUDED.name, description = EXCLUDED.description,
+        price_cents = COALESCE(EXCLUDED.price_cents, tacos.price_cents), updated_at = NOW()''',
+    'photos': 'ON CONFLICT (id) DO NOTHING',
+    'taco_photos': 'ON CONFLICT (taco_id, photo_id) DO NOTHING',
+    'reviews': '''ON CONFLICT (id) DO UPDATE SET
+        google_rating = EXCLUDED.google_rating, review_text = EXCLUDED.review_text,
+        content = EXCLUDED.content, relative_time_description = EXCLUDED.relative_time_description,
+        updated_at = NOW()''',
+}
+
+# Namespace for ids derived from Google identifiers, so the same place gets the same ids every run
+STABLE_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'https://github.com/rafrdz/taco-price-index')
+
+
+def stable_id(*parts) -> str:
+    """Deterministic UUID for a row, derived from the identifiers that make it unique"""
+    return str(uuid.uuid5(STABLE_ID_NAMESPACE, '|'.join(str(part) for part in parts)))
+
+
+# Nearby Search returns at most 3 pages of 20 results per query
+MAX_RESULTS_PER_QUERY = 60
+
+# Default keyword lists; override them with the collector's keyword_lists argument
+DEFAULT_KEYWORD_LISTS = {
+    # Keywords that indicate likely bean and cheese taco availability
+    'positive': [
+        'taco', 'taqueria', 'mexican', 'tex-mex', 'breakfast',
+        'burrito', 'bean', 'cheese', 'tortilla', 'authentic',
+        'traditional', 'local', 'familia', 'casa', 'el', 'la', 'los'
+    ],
+    # Keywords that might indicate less likely candidates
+    'negative': [
+        'pizza', 'burger', 'chinese', 'thai', 'sushi', 'italian',
+        'steakhouse', 'seafood', 'bbq', 'wings', 'bar', 'club'
+    ],
+    # Review phrases that count as a bean and cheese taco mention
+    'bean_cheese': [
+        'bean and cheese', 'bean cheese', 'beans and cheese',
+        'refried bean', 'breakfast taco', 'simple taco',
+        'basic taco', 'vegetarian taco'
+    ],
+}
+
 class GooglePlacesTacoCollector:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, max_concurrent_requests: int = 8,
+                 response_cache: Optional[PlacesResponseCache] = None,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 incremental: bool = False, refresh_window_hours: float = 24,
+                 journal: Optional[RunJournal] = None,
+                 keyword_lists: Optional[Dict[str, List[str]]] = None,
+                 db_pool: Optional[ConnectionPool] = None,
+                 metrics: Optional[RunMetrics] = None,
+                 base_url: str = "https://maps.googleapis.com/maps/api"):
         """
         Initialize the Google Places API taco data collector
 
         Args:
             api_key: Your Google Places API key
+            max_concurrent_requests: Maximum number of details requests in flight at once
+            response_cache: Optional on-disk cache for search and details responses
+            rate_limiter: Shared rate limiter for all API requests (default 10 QPS, burst 10)
+            incremental: Keep existing rows and upsert into them instead of starting from empty tables
+            refresh_window_hours: In incremental mode, skip places refreshed within this many hours
+            journal: Optional progress journal that lets an interrupted run resume
+            keyword_lists: Optional replacements for the 'positive', 'negative' and 'bean_cheese'
+                lists in DEFAULT_KEYWORD_LISTS
+            db_pool: Connection pool to check the collector's connection out of (default: shared pool from env)
+            metrics: Run metrics to record stage timings, API calls and database writes into
+            base_url: Places API base URL (point at a local stand-in such as benchmarks/mock_places_server.py)
         """
         self.api_key = api_key
+        self.incremental = incremental
+        self.refresh_window_hours = refresh_window_hours
+        self.journal = journal
+        self.response_cache = response_cache
+        self.metrics = metrics or RunMetrics()
+        self.max_concurrent_requests = max(1, max_concurrent_requests)
         self.session = requests.Session()
-        self.base_url = "https://maps.googleapis.com/maps/api"
+        # Size the connection pool so concurrent fetchers don't wait on sockets
+        adapter = HTTPAdapter(pool_connections=self.max_concurrent_requests,
+                              pool_maxsize=self.max_concurrent_requests)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.base_url = base_url.rstrip('/')
 
         # Default coordinates (from your first curl - San Antonio, TX)
         self.default_lat = 29.4241
         self.default_lng = -98.4936
         self.default_radius = 10000  # 10km radius
 
+        # Area (tiled) search: tiles start no larger than default_radius and stop splitting at this size
+        self.min_tile_radius = 250  # meters
+
+        # Multiple search terms to find bean and cheese taco spots
+        self.search_terms = [
+            "bean and cheese taco",
+            "bean cheese taco",
+            "breakfast taco",
+            "mexican restaurant bean taco",
+            "taqueria bean cheese",
+            "tex mex bean cheese taco"
+        ]
+
+        # Keywords for candidate filtering and review mentions, compiled once into matchers
+        self.keyword_lists = {**DEFAULT_KEYWORD_LISTS, **(keyword_lists or {})}
+        self.compile_keyword_matchers()
+
         # Rate limiting
-        self.request_delay = 0.1  # 100ms between requests to respect API limits
+        self.rate_limiter = rate_limiter or TokenBucketRateLimiter(qps=10, burst=10)
+        self.max_retries = 3           # Retries after quota or server errors
+        self.page_token_delay = 2.0    # Google needs a moment before a next_page_token is valid
+        self.page_token_retries = 3    # Extra attempts while a page token is still INVALID_REQUEST
+
+        # Batched database writes
+        self.write_batch_size = 500      # Rows buffered before a flush
+        self.write_flush_interval = 5.0  # Seconds before buffered rows are flushed regardless
 
-        # Database connection
+        # Database connection, checked out of the pool for the collector's lifetime
+        self.db_pool = db_pool
         self.db_connection = None
         self.setup_database_connection()
 
@@ -46,190 +190,311 @@ class GooglePlacesTacoCollector:
         if self.db_connection:
             self.create_database_tables()
 
+    def compile_keyword_matchers(self):
+        """Compile self.keyword_lists into matchers; call again after changing the lists"""
+        self.positive_matcher = KeywordMatcher(self.keyword_lists['positive'])
+        self.negative_matcher = KeywordMatcher(self.keyword_lists['negative'])
+        self.bean_cheese_matcher = KeywordMatcher(self.keyword_lists['bean_cheese'])
+        self.price_extractor = PriceExtractor()
+
     def setup_database_connection(self):
-        """Setup PostgreSQL database connection"""
+        """Check out a PostgreSQL connection from the pool"""
         try:
-            self.db_connection = psycopg2.connect(
-                host="localhost",
-                database=os.getenv("POSTGRES_DB"),
-                user=os.getenv("POSTGRES_USER"),
-                password=os.getenv("POSTGRES_PASSWORD"),
-                port="5432"
-            )
-            self.db_connection.autocommit = True
+            if self.db_pool is None:
+                self.db_pool = get_pool()
+            self.db_connection = self.db_pool.getconn(autocommit=True)
             logger.info("Successfully connected to PostgreSQL database")
         except Exception as e:
             logger.error(f"Error connecting to database: {e}")
             self.db_connection = None
 
     def create_database_tables(self):
-        """Create the required database tables if they don't exist"""
+        """
+        Bring the database schema up to date
+
+        Schema changes are versioned migrations that run once per database (see
+        schema.py).
+        """
         if not self.db_connection:
             logger.error("No database connection available")
             return False
 
         try:
-            cursor = self.db_connection.cursor()
+            version = migrate(self.db_connection)
+            logger.info(f"Database schema is at version {version}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error preparing database tables: {e}")
+            return False
+
+    def clear_collected_data(self) -> bool:
+        """
+        Empty the collector tables so a full run starts from scratch
 
-            # Drop and recreate restaurants table with Google fields
-            cursor.execute("DROP TABLE IF EXISTS photos CASCADE;")
-            cursor.execute("DROP TABLE IF EXISTS reviews CASCADE;")
-            cursor.execute("DROP TABLE IF EXISTS tacos CASCADE;")
-            cursor.execute("DROP TABLE IF EXISTS restaurants CASCADE;")
-
-            # Create restaurants table with Google rating and price level
-            cursor.execute("""
-                CREATE TABLE restaurants (
-                    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    name TEXT NOT NULL,
-                    street_address TEXT,
-                    city TEXT,
-                    state TEXT,
-                    zip TEXT,
-                    latitude DOUBLE PRECISION,
-                    longitude DOUBLE PRECISION,
-                    phone TEXT,
-                    website TEXT,
-                    yelp_id TEXT,
-                    google_rating DECIMAL(2,1),
-                    google_price_level INTEGER,
-                    google_user_ratings_total INTEGER,
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    updated_at TIMESTAMP DEFAULT NOW()
-                );
-            """)
-
-            # Create tacos table
-            cursor.execute("""
-                CREATE TABLE tacos (
-                    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    restaurant_id UUID REFERENCES restaurants(id) ON DELETE CASCADE,
-                    name TEXT,
-                    description TEXT,
-                    price_cents INTEGER,
-                    calories INTEGER,
-                    tortilla_type TEXT,
-                    protein_type TEXT,
-                    is_vegan BOOLEAN DEFAULT FALSE,
-                    is_bulk BOOLEAN DEFAULT FALSE,
-                    is_daily_special BOOLEAN DEFAULT FALSE,
-                    available_from TIME,
-                    available_to TIME,
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    updated_at TIMESTAMP DEFAULT NOW()
-                );
-            """)
-
-            # Create photos table
-            cursor.execute("""
-                CREATE TABLE photos (
-                    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    taco_id UUID REFERENCES tacos(id) ON DELETE CASCADE,
-                    user_id UUID,
-                    url TEXT NOT NULL,
-                    is_user_uploaded BOOLEAN DEFAULT TRUE,
-                    created_at TIMESTAMP DEFAULT NOW()
-                );
-            """)
-
-            # Create reviews table (for future use)
-            cursor.execute("""
-                CREATE TABLE reviews (
-                    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    user_id UUID,
-                    taco_id UUID REFERENCES tacos(id) ON DELETE CASCADE,
-                    content TEXT,
-                    submitted_at TIMESTAMP DEFAULT NOW(),
-                    verified_location BOOLEAN DEFAULT FALSE,
-                    gps_latitude DOUBLE PRECISION,
-                    gps_longitude DOUBLE PRECISION,
-                    fullness_rating INTEGER CHECK (fullness_rating BETWEEN 1 AND 5),
-                    authenticity_id UUID,
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    updated_at TIMESTAMP DEFAULT NOW()
-                );
-            """)
+        CASCADE also empties tables with foreign keys into these ones, such as the
+        Rails app's user_favorites, just as dropping the tables used to.
 
-            cursor.close()
-            logger.info("Database tables created successfully")
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.db_connection:
+            logger.error("No database connection available")
+            return False
+
+        try:
+            with self.db_connection.cursor() as cursor:
+                cursor.execute("TRUNCATE restaurants, tacos, photos, taco_photos, reviews CASCADE;")
+            logger.info("Cleared data from previous runs")
             return True
 
         except Exception as e:
-            logger.error(f"Error creating database tables: {e}")
+            self.db_connection.rollback()
+            logger.error(f"Error clearing data from previous runs: {e}")
             return False
 
+    def load_known_places(self) -> Tuple[Dict[str, str], set]:
+        """
+        Look up restaurants already stored from previous runs
+
+        Returns:
+            Tuple of (restaurant id by place_id, set of place_ids refreshed within refresh_window_hours)
+        """
+        if not self.db_connection:
+            return {}, set()
+
+        cursor = self.db_connection.cursor()
+        cursor.execute("""
+            SELECT place_id, id, updated_at >= NOW() - make_interval(secs => %s)
+            FROM restaurants
+            WHERE place_id IS NOT NULL
+        """, (self.refresh_window_hours * 3600,))
+
+        known_ids = {}
+        fresh_place_ids = set()
+        for place_id, restaurant_id, is_fresh in cursor.fetchall():
+            known_ids[place_id] = str(restaurant_id)
+            if is_fresh:
+                fresh_place_ids.add(place_id)
+        cursor.close()
+
+        return known_ids, fresh_place_ids
+
+    def load_known_photos(self) -> Dict[Tuple[str, str], str]:
+        """
+        Look up Google photos already stored from previous runs
+
+        Photos deduplicated by schema migration 4 keep the id of one of their
+        per-taco copies, so ids can't be rederived with stable_id.
+
+        Returns:
+            Photo id by (restaurant id, photo_reference)
+        """
+        if not self.db_connection:
+            return {}
+
+        cursor = self.db_connection.cursor()
+        cursor.execute("""
+            SELECT restaurant_id::text, photo_reference, id::text
+            FROM photos
+            WHERE restaurant_id IS NOT NULL AND photo_reference IS NOT NULL
+        """)
+        known_photo_ids = {(restaurant_id, photo_reference): photo_id
+                           for restaurant_id, photo_reference, photo_id in cursor.fetchall()}
+        cursor.close()
+
+        return known_photo_ids
+
     def close_database_connection(self):
-        """Close database connection"""
+        """Return the database connection to the pool"""
         if self.db_connection:
-            self.db_connection.close()
+            self.db_pool.putconn(self.db_connection)
+            self.db_connection = None
             logger.info("Database connection closed")
 
-    def search_taco_places(self, lat: float = None, lng: float = None,
-                           radius: int = None, keyword: str = "bean and cheese taco") -> List[Dict]:
+    def _get_json(self, endpoint: str, params: Dict, not_before: float = 0.0) -> Dict:
         """
-        Search for places serving bean and cheese tacos using Google Places Nearby Search API
+        GET a Places API endpoint, serving from the response cache when possible
 
         Args:
-            lat: Latitude (defaults to San Antonio)
-            lng: Longitude (defaults to San Antonio)
-            radius: Search radius in meters (default 10km)
-            keyword: Search keyword (default "bean and cheese taco")
+            endpoint: Endpoint relative to base_url, without the /json suffix (e.g. 'place/details')
+            params: Request params, including the API key
+            not_before: time.monotonic() value before which the network request must not be sent
+
+        Requests pass through the shared rate limiter, and quota or server errors
+        are retried up to max_retries times while the limiter backs off.
 
         Returns:
-            List of place dictionaries from API response
+            Parsed JSON response
+
+        Raises:
+            requests.RequestException: If the HTTP request fails
+            CacheMissError: If the cache is in replay mode and has no entry for the request
         """
-        # Use defaults if not provided
-        lat = lat or self.default_lat
-        lng = lng or self.default_lng
-        radius = radius or self.default_radius
+        if self.response_cache:
+            cached = self.response_cache.get(endpoint, params)
+            if cached is not None:
+                self.metrics.increment('cache_hits', endpoint=endpoint)
+                return cached
+
+        delay = not_before - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            request_start = time.monotonic()
+            response = self.session.get(f"{self.base_url}/{endpoint}/json", params=params)
+
+            data = response.json() if response.ok else {}
+            self.metrics.observe_request(endpoint, time.monotonic() - request_start, response.status_code,
+                                         data.get('status'), len(response.content))
+            throttled = self.rate_limiter.observe(response.status_code, data.get('status'))
+            if throttled:
+                self.metrics.increment('throttled_responses', endpoint=endpoint)
+            if throttled and attempt < self.max_retries:
+                logger.warning(f"Retrying {endpoint} after HTTP {response.status_code} {data.get('status', '')}")
+                continue
+
+            response.raise_for_status()
+            break
 
-        url = f"{self.base_url}/place/nearbysearch/json"
+        if self.response_cache and data.get('status') in CACHEABLE_STATUSES:
+            self.response_cache.set(endpoint, params, data)
 
-        params = {
-            'location': f"{lat},{lng}",
-            'radius': radius,
+        return data
+
+    def _nearby_search_params(self, query: Dict) -> Dict:
+        """Build Nearby Search request params for a query dict (lat, lng, radius, keyword)"""
+        return {
+            'location': f"{query['lat']},{query['lng']}",
+            'radius': query['radius'],
             'type': 'restaurant',
-            'keyword': keyword,
+            'keyword': query['keyword'],
             'key': self.api_key
         }
 
+    def search_interleaved(self, queries: List[Dict],
+                           on_query_complete: Callable[[Dict, int, bool], List[Dict]] = None) -> List[Dict]:
+        """
+        Run several Nearby Search queries with their pagination interleaved
+
+        Each query's next page only becomes fetchable page_token_delay seconds after
+        its token is issued. Pages are scheduled by the time they become ready, so
+        while one query waits on its token the others keep fetching, and the whole
+        batch finishes in roughly the time of the slowest single query.
+
+        With a journal attached, a query's results are recorded once its last page
+        arrives. A resumed run replays the finished queries and searches the rest
+        again from their first page, since their page tokens will have expired.
+
+        Args:
+            queries: Query dicts with 'lat', 'lng', 'radius' and 'keyword'
+            on_query_complete: Optional callback invoked as (query, result_count, truncated) when a
+                query has no more pages; it may return follow-up queries to schedule
+
+        Returns:
+            List of unique places (deduplicated by place_id) in the order they arrived
+        """
         all_places = []
-        next_page_token = None
+        seen_place_ids = set()
 
-        while True:
-            if next_page_token:
-                params['pagetoken'] = next_page_token
-                # Google requires a delay before using next_page_token
-                time.sleep(2)
+        # Heap of (ready_at, sequence, state); sequence keeps ordering stable for ties
+        schedule = []
+        sequence = itertools.count()
 
-            try:
-                logger.info(f"Searching for bean and cheese taco places near ({lat}, {lng}) with radius {radius}m")
-                response = self.session.get(url, params=params)
-                response.raise_for_status()
+        def enqueue(query: Dict, ready_at: float = 0.0):
+            state = {'query': query, 'params': self._nearby_search_params(query),
+                     'result_count': 0, 'token_attempts': 0, 'page': 0, 'places': []}
+            heapq.heappush(schedule, (ready_at, next(sequence), state))
 
-                data = response.json()
+        for query in queries:
+            enqueue(query)
 
-                if data.get('status') != 'OK':
+        while schedule:
+            ready_at, _, state = heapq.heappop(schedule)
+            query = state['query']
+            params = state['params']
+            next_page_token = None
+
+            try:
+                logger.info(f"Searching '{query['keyword']}' near ({query['lat']}, {query['lng']}) "
+                            f"with radius {query['radius']}m")
+                # Only finished queries are journaled, as one page holding every result
+                journaled = self.journal.search_results(query) if self.journal else None
+                if journaled is not None:
+                    data = {'status': 'OK', 'results': journaled}
+                else:
+                    data = self._get_json('place/nearbysearch', params, not_before=ready_at)
+
+                # A page token used too early comes back INVALID_REQUEST; give it a little longer
+                if (data.get('status') == 'INVALID_REQUEST' and 'pagetoken' in params
+                        and state['token_attempts'] < self.page_token_retries):
+                    state['token_attempts'] += 1
+                    heapq.heappush(schedule, (time.monotonic() + self.page_token_delay / 2, next(sequence), state))
+                    continue
+
+                if data.get('status') not in CACHEABLE_STATUSES:
                     logger.warning(f"API returned status: {data.get('status')} - {data.get('error_message', '')}")
-                    break
+                else:
+                    places = data.get('results', [])
+                    state['result_count'] += len(places)
+                    if self.journal and journaled is None:
+                        state['places'].extend(places)
+
+                    # Dedupe as results stream in
+                    for place in places:
+                        place_id = place.get('place_id')
+                        if place_id and place_id not in seen_place_ids:
+                            seen_place_ids.add(place_id)
+                            all_places.append(place)
+
+                    logger.info(f"Found {len(places)} places for '{query['keyword']}'. "
+                                f"Unique so far: {len(all_places)}")
+                    next_page_token = data.get('next_page_token')
+                    if self.journal and journaled is None and not next_page_token:
+                        self.journal.record_search(query, state['places'])
+
+            except (requests.RequestException, CacheMissError) as e:
+                logger.error(f"Error searching places: {e}")
 
-                places = data.get('results', [])
-                all_places.extend(places)
-                logger.info(f"Found {len(places)} places in this batch. Total so far: {len(all_places)}")
+            if next_page_token:
+                # Google requires a delay before using next_page_token (skipped on cache hits)
+                state['params'] = {**params, 'pagetoken': next_page_token}
+                state['token_attempts'] = 0
+                state['page'] += 1
+                heapq.heappush(schedule, (time.monotonic() + self.page_token_delay, next(sequence), state))
+            elif on_query_complete:
+                # Google stops paginating at MAX_RESULTS_PER_QUERY, so hitting it means results were cut off
+                truncated = state['result_count'] >= MAX_RESULTS_PER_QUERY
+                for follow_up in on_query_complete(query, state['result_count'], truncated) or []:
+                    enqueue(follow_up)
 
-                # Check for next page
-                next_page_token = data.get('next_page_token')
-                if not next_page_token:
-                    break
+        return all_places
 
-                # Remove pagetoken for next iteration if it exists
-                params.pop('pagetoken', None)
+    def search_taco_places(self, lat: float = None, lng: float = None,
+                           radius: int = None, keyword: str = "bean and cheese taco") -> List[Dict]:
+        """
+        Search for places serving bean and cheese tacos using Google Places Nearby Search API
 
-            except requests.RequestException as e:
-                logger.error(f"Error searching places: {e}")
-                break
+        Args:
+            lat: Latitude (defaults to San Antonio)
+            lng: Longitude (defaults to San Antonio)
+            radius: Search radius in meters (default 10km)
+            keyword: Search keyword (default "bean and cheese taco")
 
-            time.sleep(self.request_delay)
+        Returns:
+            List of place dictionaries from API response
+        """
+        # Use defaults if not provided
+        query = {
+            'lat': lat or self.default_lat,
+            'lng': lng or self.default_lng,
+            'radius': radius or self.default_radius,
+            'keyword': keyword,
+        }
+
+        all_places = self.search_interleaved([query])
 
         logger.info(f"Total places found: {len(all_places)}")
         return all_places
@@ -239,6 +504,9 @@ class GooglePlacesTacoCollector:
         """
         Enhanced search specifically for bean and cheese tacos using multiple search strategies
 
+        All search terms are paginated together, so each term's page token wait is
+        spent fetching pages for the other terms.
+
         Args:
             lat: Latitude (defaults to San Antonio)
             lng: Longitude (defaults to San Antonio)
@@ -247,34 +515,81 @@ class GooglePlacesTacoCollector:
         Returns:
             List of unique places that likely serve bean and cheese tacos
         """
-        all_places = []
-        seen_place_ids = set()
+        queries = [{
+            'lat': lat or self.default_lat,
+            'lng': lng or self.default_lng,
+            'radius': radius or self.default_radius,
+            'keyword': term,
+        } for term in self.search_terms]
 
-        # Multiple search terms to find bean and cheese taco spots
-        search_terms = [
-            "bean and cheese taco",
-            "bean cheese taco",
-            "breakfast taco",
-            "mexican restaurant bean taco",
-            "taqueria bean cheese",
-            "tex mex bean cheese taco"
-        ]
+        logger.info(f"Searching with terms: {', '.join(repr(term) for term in self.search_terms)}")
+        all_places = self.search_interleaved(queries)
 
-        for term in search_terms:
-            logger.info(f"Searching with term: '{term}'")
-            places = self.search_taco_places(lat, lng, radius, term)
+        logger.info(f"Found {len(all_places)} unique places across all search terms")
+        return all_places
 
-            # Filter for unique places
-            for place in places:
-                place_id = place.get('place_id')
-                if place_id and place_id not in seen_place_ids:
-                    seen_place_ids.add(place_id)
-                    all_places.append(place)
+    def search_area(self, bounds: Tuple[float, float, float, float] = None,
+                    polygon: List[Tuple[float, float]] = None, keywords: List[str] = None) -> List[Dict]:
+        """
+        Search a whole bounding box or polygon with an adaptive quadtree of tiles
 
-            # Small delay between different search terms
-            time.sleep(0.5)
+        The area is covered by a grid of tiles no larger than default_radius. Any tile
+        whose search hits the 60 result cap is split into four children and searched
+        again, until results are complete or tiles reach min_tile_radius. Each tile is
+        fetched at most once per keyword, and all tiles paginate interleaved.
 
-        logger.info(f"Found {len(all_places)} unique places across all search terms")
+        Args:
+            bounds: (south, west, north, east) in degrees
+            polygon: List of (lat, lng) vertices; overrides bounds and drops places outside it
+            keywords: Search keywords (defaults to search_terms)
+
+        Returns:
+            List of unique places found inside the area
+        """
+        if polygon:
+            bounds = polygon_bounds(polygon)
+        if not bounds:
+            raise ValueError("search_area needs bounds or a polygon")
+
+        keywords = keywords or self.search_terms
+        fetched_tiles = set()
+        stats = {'tiles': 0, 'splits': 0}
+
+        def tile_queries(tiles: List[Dict], tile_keywords: List[str]) -> List[Dict]:
+            queries = []
+            for keyword in tile_keywords:
+                for tile in tiles:
+                    key = (keyword, tile_key(tile))
+                    if key in fetched_tiles or not tile_intersects_polygon(tile, polygon):
+                        continue
+                    fetched_tiles.add(key)
+                    queries.append({**tile, 'keyword': keyword})
+            stats['tiles'] += len(queries)
+            return queries
+
+        def on_tile_complete(query: Dict, result_count: int, truncated: bool) -> List[Dict]:
+            if not truncated:
+                return []
+            if query['radius'] / 2 < self.min_tile_radius:
+                logger.warning(f"Tile at ({query['lat']:.5f}, {query['lng']:.5f}) is still truncated "
+                               f"at the minimum tile size, some places may be missing")
+                return []
+            stats['splits'] += 1
+            return tile_queries(split_tile(query), [query['keyword']])
+
+        initial_tiles = grid_tiles(*bounds, max_radius=self.default_radius)
+        logger.info(f"Searching area {bounds} with {len(initial_tiles)} initial tiles and {len(keywords)} keywords")
+        all_places = self.search_interleaved(tile_queries(initial_tiles, keywords), on_query_complete=on_tile_complete)
+
+        if polygon:
+            all_places = [
+                place for place in all_places
+                if point_in_polygon(place.get('geometry', {}).get('location', {}).get('lat', 0),
+                                    place.get('geometry', {}).get('location', {}).get('lng', 0), polygon)
+            ]
+
+        logger.info(f"Area search complete: {len(all_places)} unique places from {stats['tiles']} tile queries "
+                    f"({stats['splits']} splits)")
         return all_places
 
     def filter_bean_cheese_candidates(self, places: List[Dict]) -> List[Dict]:
@@ -289,30 +604,17 @@ class GooglePlacesTacoCollector:
         """
         filtered_places = []
 
-        # Keywords that indicate likely bean and cheese taco availability
-        positive_keywords = [
-            'taco', 'taqueria', 'mexican', 'tex-mex', 'breakfast',
-            'burrito', 'bean', 'cheese', 'tortilla', 'authentic',
-            'traditional', 'local', 'familia', 'casa', 'el', 'la', 'los'
-        ]
-
-        # Keywords that might indicate less likely candidates
-        negative_keywords = [
-            'pizza', 'burger', 'chinese', 'thai', 'sushi', 'italian',
-            'steakhouse', 'seafood', 'bbq', 'wings', 'bar', 'club'
-        ]
-
         for place in places:
-            name = place.get('name', '').lower()
+            name = place.get('name', '')
             types = place.get('types', [])
 
             # Convert types to string for keyword checking
-            types_str = ' '.join(types).lower()
-            combined_text = f"{name} {types_str}".lower()
+            types_str = ' '.join(types)
+            combined_text = f"{name} {types_str}"
 
-            # Score based on positive keywords
-            positive_score = sum(1 for keyword in positive_keywords if keyword in combined_text)
-            negative_score = sum(1 for keyword in negative_keywords if keyword in combined_text)
+            # Score by the number of distinct whole-word keyword matches
+            positive_score = self.positive_matcher.count(combined_text)
+            negative_score = self.negative_matcher.count(combined_text)
 
             # Include if it has positive indicators and minimal negative indicators
             if positive_score > 0 and negative_score == 0:
@@ -328,6 +630,47 @@ class GooglePlacesTacoCollector:
         logger.info(f"Filtered to {len(filtered_places)} places likely to serve bean and cheese tacos")
         return filtered_places
 
+    def rank_bean_cheese_candidates(self, places: List[Dict]) -> List[Dict]:
+        """
+        Batch version of filter_bean_cheese_candidates that scores all places at once
+
+        All names and types are scanned in one regex pass per matcher and scores
+        are computed as columns instead of place by place. Scores, filtering and
+        ordering are the same as filter_bean_cheese_candidates. The regex scan
+        dominates both, so this only breaks even with the loop from about 10k
+        places (benchmarks/benchmark_candidate_scoring.py) and runs use the loop.
+
+        Args:
+            places: List of place dictionaries from search
+
+        Returns:
+            Filtered list of places likely to have bean and cheese tacos, highest score first
+        """
+        if not places:
+            logger.info("Filtered to 0 places likely to serve bean and cheese tacos")
+            return []
+
+        names = pd.Series([place.get('name', '') for place in places], dtype='object')
+        types = pd.Series([' '.join(place.get('types', [])) for place in places], dtype='object')
+        combined_text = names.fillna('') + ' ' + types
+
+        positive_score = self.positive_matcher.count_series(combined_text)
+        negative_score = self.negative_matcher.count_series(combined_text)
+
+        # Same rule as the loop: positive indicators and no negatives, or a high positive score
+        # that can override a single negative
+        keep = ((positive_score > 0) & (negative_score == 0)) | ((positive_score >= 2) & (negative_score <= 1))
+        scores = (positive_score - negative_score)[keep].sort_values(ascending=False, kind='stable')
+
+        filtered_places = []
+        for index, score in scores.items():
+            place = places[index]
+            place['bean_cheese_likelihood_score'] = int(score)
+            filtered_places.append(place)
+
+        logger.info(f"Filtered to {len(filtered_places)} places likely to serve bean and cheese tacos")
+        return filtered_places
+
     def extract_taco_specific_data(self, place_details: Dict, restaurant_id: str) -> List[Dict]:
         """
         Extract potential taco menu items from reviews and description text
@@ -345,12 +688,6 @@ class GooglePlacesTacoCollector:
         # Look through reviews for taco mentions
         reviews = place_details.get('reviews', [])
 
-        bean_cheese_indicators = [
-            'bean and cheese', 'bean cheese', 'beans and cheese',
-            'refried bean', 'breakfast taco', 'simple taco',
-            'basic taco', 'vegetarian taco'
-        ]
-
         found_bean_cheese = False
         taco_mentions = []
 
@@ -358,23 +695,27 @@ class GooglePlacesTacoCollector:
             text = review.get('text', '').lower()
 
             # Check for bean and cheese mentions
-            for indicator in bean_cheese_indicators:
-                if indicator in text:
-                    found_bean_cheese = True
-                    taco_mentions.append({
-                        'mention_text': indicator,
-                        'review_rating': review.get('rating', 0),
-                        'full_review': text[:200] + '...' if len(text) > 200 else text
-                    })
+            for indicator in self.bean_cheese_matcher.find_all(text):
+                found_bean_cheese = True
+                taco_mentions.append({
+                    'mention_text': indicator,
+                    'review_rating': review.get('rating', 0),
+                    'full_review': text[:200] + '...' if len(text) > 200 else text
+                })
 
         # If we found bean and cheese mentions, create a taco entry
         if found_bean_cheese:
+            # Prices quoted in reviews near the taco name, e.g. "$2.50 bean and cheese" or "3 for $5"
+            price_cents, price_confidence = self.price_extractor.estimate(review.get('text', '') for review in reviews)
+            if price_confidence < MIN_PRICE_CONFIDENCE:
+                price_cents = None
+
             taco_data = {
-                'id': str(uuid.uuid4()),  # Generate UUID for taco
+                'id': stable_id('taco', restaurant_id, 'Bean and Cheese Taco'),
                 'restaurant_id': restaurant_id,
                 'name': 'Bean and Cheese Taco',
                 'description': f"Traditional bean and cheese taco. Mentioned in {len(taco_mentions)} reviews.",
-                'price_cents': None,       # We don't have price data from Google
+                'price_cents': price_cents,  # Estimated from review text, None if unsure
                 'calories': None,          # We don't have calorie data
                 'tortilla_type': 'flour',  # Common for bean and cheese tacos
                 'protein_type': 'none',    # Bean and cheese typically don't have meat
@@ -384,6 +725,7 @@ class GooglePlacesTacoCollector:
                 'available_from': None,    # We don't have time data
                 'available_to': None,      # We don't have time data
                 'mention_count': len(taco_mentions),  # Extra field for our analysis
+                'price_confidence': price_confidence,  # Extra field for our analysis
             }
 
             tacos_data.append(taco_data)
@@ -400,8 +742,6 @@ class GooglePlacesTacoCollector:
         Returns:
             Dictionary with detailed place information
         """
-        url = f"{self.base_url}/place/details/json"
-
         # Request specific fields that match our database schema
         fields = [
             'name', 'formatted_address', 'formatted_phone_number',
@@ -416,10 +756,7 @@ class GooglePlacesTacoCollector:
         }
 
         try:
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-
-            data = response.json()
+            data = self._get_json('place/details', params)
 
             if data.get('status') != 'OK':
                 logger.warning(f"Details API returned status: {data.get('status')} for place_id: {place_id}")
@@ -427,10 +764,54 @@ class GooglePlacesTacoCollector:
 
             return data.get('result', {})
 
-        except requests.RequestException as e:
+        except (requests.RequestException, CacheMissError) as e:
             logger.error(f"Error getting place details for {place_id}: {e}")
             return None
 
+    def iter_place_details(self, place_ids: Iterable[str]) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        Fetch place details concurrently, yielding results in input order
+
+        Up to max_concurrent_requests calls are in flight at once, all sharing the
+        collector's rate limiter, and only a small window of finished results is
+        held in memory while waiting for earlier ones.
+
+        Args:
+            place_ids: The place_ids to fetch, in the order results should be yielded
+
+        Yields:
+            (place_id, details) tuples; details is None where the fetch failed
+        """
+        if self.max_concurrent_requests == 1:
+            for place_id in place_ids:
+                yield place_id, self.get_place_details(place_id)
+            return
+
+        window = self.max_concurrent_requests * 2
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            in_flight = deque()
+            for place_id in place_ids:
+                in_flight.append((place_id, executor.submit(self.get_place_details, place_id)))
+                if len(in_flight) >= window:
+                    done_id, future = in_flight.popleft()
+                    yield done_id, future.result()
+
+            while in_flight:
+                done_id, future = in_flight.popleft()
+                yield done_id, future.result()
+
+    def fetch_place_details(self, place_ids: List[str]) -> List[Optional[Dict]]:
+        """
+        Fetch place details for many places concurrently
+
+        Args:
+            place_ids: The place_ids to fetch, in the order results should be returned
+
+        Returns:
+            List of detail dictionaries (None where the fetch failed), in the same order as place_ids
+        """
+        return [details for _, details in self.iter_place_details(place_ids)]
+
     def extract_restaurant_data(self, place: Dict, details: Dict = None) -> Dict:
         """
         Extract restaurant data that matches our database schema
@@ -463,13 +844,15 @@ class GooglePlacesTacoCollector:
                 state = parts[0]
                 zip_code = parts[1]
 
+        place_id = source.get('place_id') or place.get('place_id', '')
+
         # Extract coordinates
         geometry = source.get('geometry', {})
         location = geometry.get('location', {})
 
         restaurant_data = {
-            'id': str(uuid.uuid4()),  # Generate UUID for restaurant
-            'place_id': source.get('place_id', ''),  # Keep for reference but not in DB schema
+            'id': stable_id('restaurant', place_id) if place_id else str(uuid.uuid4()),
+            'place_id': place_id,  # Google place_id, stored for matching on later runs
             'name': source.get('name', ''),
             'street_address': street_address,
             'city': city,
@@ -505,6 +888,8 @@ class GooglePlacesTacoCollector:
 
         for review in reviews:
             review_data = {
+                'id': stable_id('review', restaurant_place_id, review.get('author_url') or review.get('author_name', ''),
+                                review.get('time', 0)),
                 'restaurant_place_id': restaurant_place_id,
                 'author_name': review.get('author_name', ''),
                 'author_url': review.get('author_url', ''),
@@ -528,13 +913,14 @@ class GooglePlacesTacoCollector:
 
         return reviews_data
 
-    def extract_photos_data(self, place_details: Dict, taco_id: str) -> List[Dict]:
+    def extract_photos_data(self, place_details: Dict, restaurant_id: str, taco_id: str = None) -> List[Dict]:
         """
-        Extract photo data from place details
+        Extract photo data from place details, once per restaurant
 
         Args:
             place_details: Detailed place data from details API
-            taco_id: The taco UUID to link photos to taco
+            restaurant_id: The restaurant UUID the photos belong to
+            taco_id: The taco UUID set as each photo's taco_id (other tacos link through taco_photos)
 
         Returns:
             List of photo dictionaries
@@ -543,14 +929,17 @@ class GooglePlacesTacoCollector:
         photos_data = []
 
         for photo in photos:
+            if not photo.get('photo_reference'):
+                continue
+
             # Construct photo URL using the photo_reference
-            photo_url = ''
-            if photo.get('photo_reference'):
-                photo_url = f"{self.base_url}/place/photo?maxwidth=400&photoreference={photo['photo_reference']}&key={self.api_key}"
+            photo_url = f"{self.base_url}/place/photo?maxwidth=400&photoreference={photo['photo_reference']}&key={self.api_key}"
 
             photo_data = {
-                'id': str(uuid.uuid4()),  # Generate UUID for photo
+                'id': stable_id('photo', restaurant_id, photo['photo_reference']),
+                'restaurant_id': restaurant_id,
                 'taco_id': taco_id,
+                'photo_reference': photo['photo_reference'],
                 'user_id': None,  # These are from Google, not users
                 'url': photo_url,
                 'is_user_uploaded': False,  # These are from Google, not users
@@ -560,6 +949,100 @@ class GooglePlacesTacoCollector:
 
         return photos_data
 
+    def restaurant_row(self, restaurant_data: Dict) -> Tuple:
+        """Restaurant values in TABLE_COLUMNS['restaurants'] order"""
+        return (
+            restaurant_data['id'],
+            restaurant_data['name'],
+            restaurant_data['street_address'],
+            restaurant_data['city'],
+            restaurant_data['state'],
+            restaurant_data['zip'],
+            restaurant_data['latitude'],
+            restaurant_data['longitude'],
+            restaurant_data['phone'],
+            restaurant_data['website'],
+            restaurant_data['yelp_id'],
+            restaurant_data.get('google_rating'),
+            restaurant_data.get('google_price_level'),
+            restaurant_data.get('google_user_ratings_total'),
+            restaurant_data.get('place_id') or None
+        )
+
+    def taco_row(self, taco_data: Dict) -> Tuple:
+        """Taco values in TABLE_COLUMNS['tacos'] order"""
+        return (
+            taco_data['id'],
+            taco_data['restaurant_id'],
+            taco_data['name'],
+            taco_data['description'],
+            taco_data['price_cents'],
+            taco_data['calories'],
+            taco_data['tortilla_type'],
+            taco_data['protein_type'],
+            taco_data['is_vegan'],
+            taco_data['is_bulk'],
+            taco_data['is_daily_special'],
+            taco_data['available_from'],
+            taco_data['available_to']
+        )
+
+    def photo_row(self, photo_data: Dict) -> Tuple:
+        """Photo values in TABLE_COLUMNS['photos'] order"""
+        return (
+            photo_data['id'],
+            photo_data['restaurant_id'],
+            photo_data['taco_id'],
+            photo_data['photo_reference'],
+            photo_data['user_id'],
+            photo_data['url'],
+            photo_data['is_user_uploaded']
+        )
+
+    def taco_photo_row(self, link: Dict) -> Tuple:
+        """Taco photo link values in TABLE_COLUMNS['taco_photos'] order"""
+        return (link['taco_id'], link['photo_id'])
+
+    def review_row(self, review_data: Dict, restaurant_id: str) -> Tuple:
+        """Review values in TABLE_COLUMNS['reviews'] order"""
+        return (
+            review_data.get('id') or str(uuid.uuid4()),
+            restaurant_id,
+            review_data.get('author_name', ''),
+            review_data.get('author_url', ''),
+            review_data.get('rating', 0),
+            review_data.get('text', ''),
+            review_data.get('time', 0),
+            review_data.get('relative_time_description', ''),
+            review_data.get('language', ''),
+            review_data.get('review_date', None),
+            review_data.get('text', '')  # Also populate the existing content field
+        )
+
+    def _single_row_insert_sql(self, table: str) -> str:
+        columns = TABLE_COLUMNS[table]
+        placeholders = ', '.join(['%s'] * len(columns))
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) {CONFLICT_CLAUSES[table]}"
+
+    def create_batch_writer(self, on_flush: Callable[[], None] = None) -> Optional[BatchWriter]:
+        """
+        Create a batched writer for the collector tables
+
+        Args:
+            on_flush: Optional callback run after each successful flush
+
+        Returns:
+            BatchWriter flushing every write_batch_size rows or write_flush_interval seconds,
+            or None without a database connection
+        """
+        if not self.db_connection:
+            logger.error("No database connection available")
+            return None
+
+        return BatchWriter(self.db_connection, TABLE_COLUMNS, CONFLICT_CLAUSES,
+                           batch_size=self.write_batch_size, flush_interval=self.write_flush_interval,
+                           on_flush=on_flush, metrics=self.metrics)
+
     def insert_restaurant_to_db(self, restaurant_data: Dict) -> bool:
         """
         Insert restaurant data into PostgreSQL database
@@ -577,30 +1060,7 @@ class GooglePlacesTacoCollector:
         try:
             cursor = self.db_connection.cursor()
 
-            insert_query = """
-                INSERT INTO restaurants (id, name, street_address, city, state, zip, latitude, longitude, 
-                                       phone, website, yelp_id, google_rating, google_price_level, 
-                                       google_user_ratings_total)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO NOTHING
-            """
-
-            cursor.execute(insert_query, (
-                restaurant_data['id'],
-                restaurant_data['name'],
-                restaurant_data['street_address'],
-                restaurant_data['city'],
-                restaurant_data['state'],
-                restaurant_data['zip'],
-                restaurant_data['latitude'],
-                restaurant_data['longitude'],
-                restaurant_data['phone'],
-                restaurant_data['website'],
-                restaurant_data['yelp_id'],
-                restaurant_data.get('google_rating'),
-                restaurant_data.get('google_price_level'),
-                restaurant_data.get('google_user_ratings_total')
-            ))
+            cursor.execute(self._single_row_insert_sql('restaurants'), self.restaurant_row(restaurant_data))
 
             cursor.close()
             rating_text = f"Rating: {restaurant_data.get('google_rating', 'N/A')}"
@@ -629,29 +1089,7 @@ class GooglePlacesTacoCollector:
         try:
             cursor = self.db_connection.cursor()
 
-            insert_query = """
-                INSERT INTO tacos (id, restaurant_id, name, description, price_cents, calories, 
-                                 tortilla_type, protein_type, is_vegan, is_bulk, is_daily_special, 
-                                 available_from, available_to)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO NOTHING
-            """
-
-            cursor.execute(insert_query, (
-                taco_data['id'],
-                taco_data['restaurant_id'],
-                taco_data['name'],
-                taco_data['description'],
-                taco_data['price_cents'],
-                taco_data['calories'],
-                taco_data['tortilla_type'],
-                taco_data['protein_type'],
-                taco_data['is_vegan'],
-                taco_data['is_bulk'],
-                taco_data['is_daily_special'],
-                taco_data['available_from'],
-                taco_data['available_to']
-            ))
+            cursor.execute(self._single_row_insert_sql('tacos'), self.taco_row(taco_data))
 
             cursor.close()
             logger.info(f"Inserted taco: {taco_data['name']} for restaurant {taco_data['restaurant_id']}")
@@ -678,19 +1116,7 @@ class GooglePlacesTacoCollector:
         try:
             cursor = self.db_connection.cursor()
 
-            insert_query = """
-                INSERT INTO photos (id, taco_id, user_id, url, is_user_uploaded)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO NOTHING
-            """
-
-            cursor.execute(insert_query, (
-                photo_data['id'],
-                photo_data['taco_id'],
-                photo_data['user_id'],
-                photo_data['url'],
-                photo_data['is_user_uploaded']
-            ))
+            cursor.execute(self._single_row_insert_sql('photos'), self.photo_row(photo_data))
 
             cursor.close()
             logger.info(f"Inserted photo for taco {photo_data['taco_id']}")
@@ -711,44 +1137,7 @@ class GooglePlacesTacoCollector:
         try:
             cursor = self.db_connection.cursor()
 
-            # We'll need to modify the existing reviews table to accommodate Google reviews
-            # Add columns for Google review data
-            try:
-                cursor.execute("""
-                    ALTER TABLE reviews 
-                    ADD COLUMN IF NOT EXISTS author_name TEXT,
-                    ADD COLUMN IF NOT EXISTS author_url TEXT,
-                    ADD COLUMN IF NOT EXISTS google_rating INTEGER,
-                    ADD COLUMN IF NOT EXISTS review_text TEXT,
-                    ADD COLUMN IF NOT EXISTS review_time BIGINT,
-                    ADD COLUMN IF NOT EXISTS relative_time_description TEXT,
-                    ADD COLUMN IF NOT EXISTS language TEXT,
-                    ADD COLUMN IF NOT EXISTS review_date TIMESTAMP,
-                    ADD COLUMN IF NOT EXISTS restaurant_id UUID REFERENCES restaurants(id) ON DELETE CASCADE;
-                """)
-            except Exception as alter_error:
-                logger.warning(f"Could not alter reviews table: {alter_error}")
-
-            insert_query = """
-                INSERT INTO reviews (restaurant_id, author_name, author_url, google_rating, 
-                                   review_text, review_time, relative_time_description, 
-                                   language, review_date, content)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT DO NOTHING
-            """
-
-            cursor.execute(insert_query, (
-                restaurant_id,
-                review_data.get('author_name', ''),
-                review_data.get('author_url', ''),
-                review_data.get('rating', 0),
-                review_data.get('text', ''),
-                review_data.get('time', 0),
-                review_data.get('relative_time_description', ''),
-                review_data.get('language', ''),
-                review_data.get('review_date', None),
-                review_data.get('text', '')  # Also populate the existing content field
-            ))
+            cursor.execute(self._single_row_insert_sql('reviews'), self.review_row(review_data, restaurant_id))
 
             cursor.close()
             logger.info(f"Inserted review by {review_data.get('author_name', 'Unknown')} for restaurant {restaurant_id}")
@@ -759,95 +1148,256 @@ class GooglePlacesTacoCollector:
             return False
 
 
-    def collect_all_data(self, lat: float = None, lng: float = None,
-                         radius: int = None, save_to_db: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    def iter_place_records(self, lat: float = None, lng: float = None, radius: int = None,
+                           bounds: Tuple[float, float, float, float] = None,
+                           polygon: List[Tuple[float, float]] = None,
+                           save_to_db: bool = True) -> Iterator[Dict]:
         """
-        Complete bean and cheese taco data collection workflow
+        Search, filter and fetch details, yielding each place as soon as it is processed
 
         Args:
             lat: Latitude for search center
             lng: Longitude for search center
             radius: Search radius in meters
-            save_to_db: Whether to save data to database (default True)
+            bounds: Optional (south, west, north, east) box to cover with a tiled area search instead
+            polygon: Optional list of (lat, lng) vertices to cover with a tiled area search instead
+            save_to_db: Whether the records are headed for the database; full runs then clear
+                previous data first and incremental runs skip recently refreshed places
 
-        Returns:
-            Tuple of (restaurants_df, tacos_df, reviews_df, photos_df)
+        The journal is left unfinished; run_pipeline marks it complete once the
+        records are safely written.
+
+        Yields:
+            Record dicts with 'place_id', 'restaurant', 'tacos', 'reviews', 'photos' and 'taco_photos'
+            (see sinks.py)
         """
-        logger.info("Starting bean and cheese taco data collection...")
+        resuming = False
+        if self.journal:
+            resuming = self.journal.start({
+                'lat': lat, 'lng': lng, 'radius': radius, 'save_to_db': save_to_db,
+                'bounds': list(bounds) if bounds else None,
+                'polygon': [list(vertex) for vertex in polygon] if polygon else None,
+                'search_terms': self.search_terms, 'incremental': self.incremental,
+            })
+
+        # A full run starts from empty tables, unless it is picking up an interrupted run
+        if save_to_db and not self.incremental and not resuming and self.db_connection:
+            if not self.clear_collected_data():
+                # Nothing was collected, so the next run should start over rather than resume
+                self._finish_journal()
+                raise RuntimeError("Could not clear data from previous runs; see the error above")
+
+        if self.journal and self.journal.candidates is not None:
+            filtered_places = self.journal.candidates
+            logger.info(f"Using {len(filtered_places)} journaled candidates, skipping search")
+        else:
+            # Step 1: Search for places that might serve bean and cheese tacos
+            with self.metrics.stage('search'):
+                if bounds or polygon:
+                    places = self.search_area(bounds=bounds, polygon=polygon)
+                else:
+                    places = self.search_bean_cheese_taco_places(lat, lng, radius)
+            self.metrics.increment('places_found', len(places or []))
+
+            if not places:
+                logger.warning("No places found")
+                return
+
+            # Step 2: Filter for most likely candidates
+            with self.metrics.stage('filter'):
+                filtered_places = self.filter_bean_cheese_candidates(places)
+
+            if self.journal:
+                self.journal.record_candidates(filtered_places)
 
-        # Step 1: Search for places that might serve bean and cheese tacos
-        places = self.search_bean_cheese_taco_places(lat, lng, radius)
+        if not filtered_places:
+            logger.warning("No suitable places found after filtering")
+            return
 
-        if not places:
-            logger.warning("No places found")
-            return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        # Step 3: Get detailed information for each place (fetched concurrently)
+        filtered_places = [place for place in filtered_places if place.get('place_id')]
 
-        # Step 2: Filter for most likely candidates
-        filtered_places = self.filter_bean_cheese_candidates(places)
+        if self.journal and self.journal.done_place_ids:
+            filtered_places = [place for place in filtered_places
+                               if place['place_id'] not in self.journal.done_place_ids]
+            logger.info(f"Skipping {len(self.journal.done_place_ids)} places finished before the interruption")
 
-        if not filtered_places:
-            logger.warning("No suitable places found after filtering")
-            return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        # In incremental mode, skip places refreshed recently and reuse the ids of known ones
+        known_ids = {}
+        known_photo_ids = {}
+        if self.incremental and save_to_db:
+            known_ids, fresh_place_ids = self.load_known_places()
+            known_photo_ids = self.load_known_photos()
+            filtered_places = [place for place in filtered_places if place['place_id'] not in fresh_place_ids]
+            logger.info(f"Incremental mode: skipping {len(fresh_place_ids)} places refreshed in the last "
+                        f"{self.refresh_window_hours}h, {len(filtered_places)} places to fetch")
 
-        # Step 3: Get detailed information for each place
-        restaurants_data = []
-        tacos_data = []
-        reviews_data = []
-        photos_data = []
+        places_by_id = {place['place_id']: place for place in filtered_places}
+        all_details = self.metrics.timed_iter(
+            'details', self.iter_place_details(place['place_id'] for place in filtered_places))
 
-        for i, place in enumerate(filtered_places):
-            place_id = place.get('place_id')
-            if not place_id:
-                continue
+        for i, (place_id, details) in enumerate(all_details):
+            place = places_by_id[place_id]
 
             logger.info(f"Processing place {i+1}/{len(filtered_places)}: {place.get('name', 'Unknown')} (Score: {place.get('bean_cheese_likelihood_score', 0)})")
 
-            # Get detailed information
-            details = self.get_place_details(place_id)
+            with self.metrics.stage('extraction'):
+                # Extract restaurant data
+                restaurant_data = self.extract_restaurant_data(place, details)
+                restaurant_data['id'] = known_ids.get(place_id, restaurant_data['id'])
+                restaurant_data['bean_cheese_likelihood_score'] = place.get('bean_cheese_likelihood_score', 0)
+
+                record = {'place_id': place_id, 'restaurant': restaurant_data, 'tacos': [], 'reviews': [],
+                          'photos': [], 'taco_photos': []}
+
+                # Extract taco, reviews and photos if details available
+                if details:
+                    # Look for bean and cheese taco mentions
+                    record['tacos'] = self.extract_taco_specific_data(details, restaurant_data['id'])
+
+                    # Photos are stored once per restaurant and linked to every taco found there
+                    if record['tacos']:
+                        photos = self.extract_photos_data(details, restaurant_data['id'], record['tacos'][0]['id'])
+                        for photo in photos:
+                            photo_key = (restaurant_data['id'], photo['photo_reference'])
+                            photo['id'] = known_photo_ids.get(photo_key, photo['id'])
+                        record['photos'] = photos
+                        record['taco_photos'] = [{'taco_id': taco['id'], 'photo_id': photo['id']}
+                                                 for taco in record['tacos'] for photo in photos]
+
+                    record['reviews'] = self.extract_reviews_data(details, place_id)
 
-            # Extract restaurant data
-            restaurant_data = self.extract_restaurant_data(place, details)
-            restaurant_data['bean_cheese_likelihood_score'] = place.get('bean_cheese_likelihood_score', 0)
-            restaurants_data.append(restaurant_data)
+            self.metrics.increment('places_processed')
+            yield record
 
-            # Save restaurant to database
-            if save_to_db:
-                self.insert_restaurant_to_db(restaurant_data)
+    def run_pipeline(self, sinks: List, save_to_db: bool = True, **search_args) -> int:
+        """
+        Stream place records into sinks as they are produced
+
+        With a journal attached, a place is marked done only once its rows are
+        durable in every sink: after a database flush, or without a database
+        every write_batch_size rows or write_flush_interval seconds, when the
+        file sinks are checkpointed too. A resumed run continues the same files.
+
+        Args:
+            sinks: Sink objects with write(record) and close(), optionally checkpoint() and resume() (see sinks.py)
+            save_to_db: Also write records to the database through a batched DatabaseSink
+            **search_args: lat, lng, radius, bounds or polygon for iter_place_records
+
+        Returns:
+            Number of places processed
+        """
+        # Places handed to the sinks but not yet durable in all of them
+        pending_place_ids = []
+        file_sinks = list(sinks)
+        closing = False
+        resumed = False
+        last_checkpoint = {'rows': 0, 'time': time.monotonic()}
+
+        def checkpoint():
+            # Interrupted runs leave their pending places to be redone; clean ones journal them after closing
+            if closing:
+                return
+            last_checkpoint.update(rows=0, time=time.monotonic())
+            states = []
+            for sink in file_sinks:
+                state = sink.checkpoint() if hasattr(sink, 'checkpoint') else {}
+                if state is None:
+                    # Its output is unreadable until it is closed, so nothing can count as done before then
+                    return
+                states.append(state)
+            if self.journal:
+                self.journal.mark_places_done(pending_place_ids, sink_states=states)
+            pending_place_ids.clear()
+
+        def resume_sinks():
+            # Pick up the interrupted attempt's files where its last checkpoint left them
+            nonlocal resumed
+            resumed = True
+            if not (self.journal and self.journal.resumed and self.journal.sink_states):
+                return
+            if len(self.journal.sink_states) != len(file_sinks):
+                logger.warning("The journaled run used different sinks; not resuming their output")
+                return
+            for sink, state in zip(file_sinks, self.journal.sink_states):
+                if state:
+                    sink.resume(state)
+
+        sinks = list(sinks)
+        if save_to_db:
+            # The place counts as done once everything it buffered has been flushed
+            sinks.append(DatabaseSink(self, on_flush=checkpoint))
 
-            # Extract taco, reviews and photos if details available
-            if details:
-                # Look for bean and cheese taco mentions
-                place_tacos = self.extract_taco_specific_data(details, restaurant_data['id'])
-                tacos_data.extend(place_tacos)
+        processed = 0
+        try:
+            for record in self.iter_place_records(save_to_db=save_to_db, **search_args):
+                if not resumed:
+                    resume_sinks()
+                for sink in sinks:
+                    sink.write(record)
+                processed += 1
+
+                pending_place_ids.append(record['place_id'])
+                if not save_to_db:
+                    # Without a database, checkpoint the files as often as the database writer would flush
+                    last_checkpoint['rows'] += sum(len(record_rows(record, table)) for table in RECORD_TABLES)
+                    if (last_checkpoint['rows'] >= self.write_batch_size or
+                            time.monotonic() - last_checkpoint['time'] >= self.write_flush_interval):
+                        checkpoint()
+
+        finally:
+            # Commit whatever is buffered, even when interrupted, so the journal can skip it next time.
+            # Every sink gets closed; the first error is re-raised afterwards
+            closing = True
+            if not resumed:
+                resume_sinks()
+            close_error = None
+            for sink in sinks:
+                try:
+                    sink.close()
+                except Exception as e:
+                    logger.error(f"Error closing {sink.__class__.__name__}: {e}")
+                    close_error = close_error or e
+            if close_error:
+                raise close_error
+
+        if self.journal:
+            self.journal.mark_places_done(pending_place_ids)
+        # Only once the last flush has committed may the next run start fresh instead of resuming
+        self._finish_journal()
+        return processed
 
-                # Save tacos to database and collect photos for each taco
-                for taco in place_tacos:
-                    if save_to_db:
-                        self.insert_taco_to_db(taco)
+    def collect_all_data(self, lat: float = None, lng: float = None,
+                         radius: int = None, save_to_db: bool = True,
+                         bounds: Tuple[float, float, float, float] = None,
+                         polygon: List[Tuple[float, float]] = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Complete bean and cheese taco data collection workflow
 
-                    # Extract photos for this taco
-                    taco_photos = self.extract_photos_data(details, taco['id'])
-                    photos_data.extend(taco_photos)
+        With a journal attached, progress is checkpointed as it goes and an
+        interrupted run with the same arguments resumes where it stopped; the
+        returned DataFrames then only hold the places processed in this attempt.
+        For runs too large to hold in memory, use run_pipeline with streaming sinks.
 
-                    # Save photos to database
-                    if save_to_db:
-                        for photo in taco_photos:
-                            self.insert_photo_to_db(photo)
+        Args:
+            lat: Latitude for search center
+            lng: Longitude for search center
+            radius: Search radius in meters
+            save_to_db: Whether to save data to database (default True)
+            bounds: Optional (south, west, north, east) box to cover with a tiled area search instead
+            polygon: Optional list of (lat, lng) vertices to cover with a tiled area search instead
 
-                place_reviews = self.extract_reviews_data(details, place_id)
-                reviews_data.extend(place_reviews)
-                if save_to_db:
-                    for review in place_reviews:
-                        self.insert_review_to_db(review, restaurant_data['id'])
+        Returns:
+            Tuple of (restaurants_df, tacos_df, reviews_df, photos_df)
+        """
+        logger.info("Starting bean and cheese taco data collection...")
 
-            # Rate limiting
-            time.sleep(self.request_delay)
+        frames_sink = DataFrameSink()
+        self.run_pipeline([frames_sink], save_to_db=save_to_db, lat=lat, lng=lng, radius=radius,
+                          bounds=bounds, polygon=polygon)
 
         # Create DataFrames
-        restaurants_df = pd.DataFrame(restaurants_data)
-        tacos_df = pd.DataFrame(tacos_data)
-        reviews_df = pd.DataFrame(reviews_data)
-        photos_df = pd.DataFrame(photos_data)
+        restaurants_df, tacos_df, reviews_df, photos_df = frames_sink.frames()
 
         logger.info(f"Collection complete: {len(restaurants_df)} restaurants, {len(tacos_df)} bean & cheese tacos found, {len(reviews_df)} reviews, {len(photos_df)} photos")
 
@@ -856,40 +1406,50 @@ class GooglePlacesTacoCollector:
 
         return restaurants_df, tacos_df, reviews_df, photos_df
 
+    def _finish_journal(self):
+        """Mark the journaled run complete so the next run starts fresh"""
+        if self.journal:
+            self.journal.mark_complete()
+
     def save_data(self, restaurants_df: pd.DataFrame, tacos_df: pd.DataFrame,
                   reviews_df: pd.DataFrame, photos_df: pd.DataFrame,
-                  base_filename: str = 'bean_cheese_taco_data'):
+                  base_filename: str = 'bean_cheese_taco_data', output_format: str = 'csv'):
         """
-        Save all DataFrames to CSV files
+        Save all DataFrames to CSV files, or to typed Parquet / Arrow IPC files
 
         Args:
             restaurants_df: Restaurant data
             tacos_df: Bean and cheese taco data
             reviews_df: Reviews data
             photos_df: Photos data
-            base_filename: Base filename for CSV files
+            base_filename: Base filename for the output files
+            output_format: 'csv', 'parquet' (zstd-compressed) or 'arrow' (memory-mappable, see columnar.py)
         """
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        with self.metrics.stage('save'):
+            self._save_frames(restaurants_df, tacos_df, reviews_df, photos_df, base_filename, output_format)
 
-        if not restaurants_df.empty:
-            filename = f"{base_filename}_restaurants_{timestamp}.csv"
-            restaurants_df.to_csv(filename, index=False)
-            logger.info(f"Restaurants data saved to {filename}")
+    def _save_frames(self, restaurants_df: pd.DataFrame, tacos_df: pd.DataFrame, reviews_df: pd.DataFrame,
+                     photos_df: pd.DataFrame, base_filename: str, output_format: str):
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
-        if not tacos_df.empty:
-            filename = f"{base_filename}_tacos_{timestamp}.csv"
-            tacos_df.to_csv(filename, index=False)
-            logger.info(f"Bean and cheese tacos data saved to {filename}")
+        frames = [
+            ('restaurants', restaurants_df, "Restaurants data"),
+            ('tacos', tacos_df, "Bean and cheese tacos data"),
+            ('reviews', reviews_df, "Reviews data"),
+            ('photos', photos_df, "Photos data"),
+        ]
 
-        if not reviews_df.empty:
-            filename = f"{base_filename}_reviews_{timestamp}.csv"
-            reviews_df.to_csv(filename, index=False)
-            logger.info(f"Reviews data saved to {filename}")
+        for table, df, description in frames:
+            if df.empty:
+                continue
 
-        if not photos_df.empty:
-            filename = f"{base_filename}_photos_{timestamp}.csv"
-            photos_df.to_csv(filename, index=False)
-            logger.info(f"Photos data saved to {filename}")
+            if output_format == 'csv':
+                filename = f"{base_filename}_{table}_{timestamp}.csv"
+                df.to_csv(filename, index=False)
+            else:
+                filename = f"{base_filename}_{table}_{timestamp}.{EXTENSIONS[output_format]}"
+                write_dataframe(df, filename, output_format)
+            logger.info(f"{description} saved to {filename}")
 
     def display_summary(self, restaurants_df: pd.DataFrame, tacos_df: pd.DataFrame,
                         reviews_df: pd.DataFrame, photos_df: pd.DataFrame):
@@ -956,6 +1516,12 @@ class GooglePlacesTacoCollector:
 
 # Example usage
 def main():
+    parser = argparse.ArgumentParser(description="Collect bean and cheese taco data from Google Places")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profile each stage (cProfile, sampled stacks for flamegraphs, tracemalloc)")
+    parser.add_argument('--profile-dir', default='profiles', help="Where --profile writes its files")
+    args = parser.parse_args()
+
     # Load environment variables
     load_dotenv()
 
@@ -966,17 +1532,78 @@ def main():
         logger.error("APIKEY not found in environment variables")
         return None, None, None, None
 
-    # Initialize collector
-    collector = GooglePlacesTacoCollector(API_KEY)
+    # Response cache: "on" (default) reads and writes, "replay" serves only from cache, "off" disables it
+    cache_mode = os.getenv("PLACES_CACHE_MODE", "on").lower()
+    response_cache = None
+    if cache_mode != "off":
+        response_cache = PlacesResponseCache(
+            os.getenv("PLACES_CACHE_DIR", ".places_cache"),
+            max_size_bytes=int(os.getenv("PLACES_CACHE_MAX_MB", "512")) * 1024 * 1024,
+            replay_only=(cache_mode == "replay")
+        )
+
+    rate_limiter = TokenBucketRateLimiter(
+        qps=float(os.getenv("PLACES_QPS", "10")),
+        burst=int(os.getenv("PLACES_BURST", "10"))
+    )
+
+    # Progress journal; an interrupted run started with the same settings resumes from it
+    journal = RunJournal(os.getenv("RUN_JOURNAL_PATH", ".collector_journal.jsonl"))
+
+    # Optional JSON file replacing any of the 'positive', 'negative' or 'bean_cheese' keyword lists
+    keyword_lists = None
+    if os.getenv("KEYWORDS_FILE"):
+        with open(os.getenv("KEYWORDS_FILE"), encoding='utf-8') as f:
+            keyword_lists = json.load(f)
+
+    # Run report: JSON always, Prometheus textfile (for node_exporter's textfile collector) when a path is set
+    profiler = StageProfiler(args.profile_dir, run_name='collector') if args.profile else None
+    metrics = RunMetrics('collector', profiler=profiler)
+    metrics_report_path = os.getenv("METRICS_REPORT_PATH", "collector_run_report.json")
+    metrics_prometheus_path = os.getenv("METRICS_PROMETHEUS_PATH")
+
+    # Initialize collector ("full" clears previous data, "incremental" upserts into it)
+    max_concurrent_requests = int(os.getenv("PLACES_MAX_CONCURRENT_REQUESTS", "8"))
+    collector = GooglePlacesTacoCollector(API_KEY, max_concurrent_requests=max_concurrent_requests,
+                                          response_cache=response_cache, rate_limiter=rate_limiter,
+                                          incremental=(os.getenv("COLLECTION_MODE", "full").lower() == "incremental"),
+                                          refresh_window_hours=float(os.getenv("REFRESH_WINDOW_HOURS", "24")),
+                                          journal=journal, keyword_lists=keyword_lists, metrics=metrics,
+                                          base_url=os.getenv("PLACES_BASE_URL", "https://maps.googleapis.com/maps/api"))
 
     if not collector.db_connection:
         logger.error("Failed to connect to database")
         return None, None, None, None
 
+    # Optional "south,west,north,east" box to cover with the tiled area search
+    search_bounds = None
+    if os.getenv("SEARCH_BOUNDS"):
+        search_bounds = tuple(float(value) for value in os.getenv("SEARCH_BOUNDS").split(","))
+
+    # Optional streaming output ("csv", "parquet" or "arrow"): rows go straight to files and the
+    # database without building DataFrames, so memory stays flat on large runs
+    stream_output = os.getenv("STREAM_OUTPUT", "").lower()
+
+    # Format for the files written at the end of a normal run: "csv" (default), "parquet" or "arrow"
+    save_format = os.getenv("SAVE_FORMAT", "csv").lower()
+
+    if profiler:
+        profiler.start()
     try:
+        if stream_output:
+            if stream_output in EXTENSIONS:
+                sink = ParquetSink('bean_cheese_taco_data', file_format=stream_output)
+            else:
+                sink = CsvSink('bean_cheese_taco_data')
+            print("Streaming bean and cheese taco data for San Antonio...")
+            processed = collector.run_pipeline([sink], bounds=search_bounds)
+            print(f"Processed {processed} places")
+            return None, None, None, None
+
         # Option 1: Use default San Antonio coordinates for bean and cheese tacos
+        # (or the SEARCH_BOUNDS area, e.g. 29.20,-98.80,29.75,-98.20 for greater San Antonio)
         print("Collecting bean and cheese taco data for San Antonio...")
-        restaurants_df, tacos_df, reviews_df, photos_df = collector.collect_all_data()
+        restaurants_df, tacos_df, reviews_df, photos_df = collector.collect_all_data(bounds=search_bounds)
 
         # Option 2: Use custom coordinates (example: Austin, TX)
         # austin_lat, austin_lng = 30.2672, -97.7431
@@ -986,14 +1613,23 @@ def main():
         # Display summary
         collector.display_summary(restaurants_df, tacos_df, reviews_df, photos_df)
 
-        # Save to CSV files
-        collector.save_data(restaurants_df, tacos_df, reviews_df, photos_df)
+        # Save to CSV (or Parquet / Arrow) files
+        collector.save_data(restaurants_df, tacos_df, reviews_df, photos_df, output_format=save_format)
 
         return restaurants_df, tacos_df, reviews_df, photos_df
 
     finally:
         # Always close the database connection
         collector.close_database_connection()
+        close_pool()
+        if response_cache:
+            response_cache.close()
+        journal.close()
+        metrics.write_json(metrics_report_path)
+        if metrics_prometheus_path:
+            metrics.write_prometheus(metrics_prometheus_path)
+        if profiler:
+            print(f"🔬 Profiles written to {profiler.finish()}")
 
 if __name__ == "__main__":
     restaurants_df, tacos_df, reviews_df, photos_df = main()
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+Benchmark candidate scoring: the per-place loop against the batch pandas path
+
+Run from the data_collection directory:
+
+    python benchmarks/benchmark_candidate_scoring.py [sizes...]
+
+Places are synthetic search results; no API key or database is needed.
+"""
+
+import copy
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bc_tacos import GooglePlacesTacoCollector
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+NAME_WORDS = ['Taqueria', 'El', 'La', 'Los', 'Tacos', 'Casa', 'Familia', 'Pizza', 'Burger', 'Sushi',
+              'Bar', 'Grill', 'Cafe', 'Kitchen', 'Mexican', 'Tex-Mex', 'Breakfast', 'Hotel', 'Club',
+              'Barbacoa', 'Panaderia', 'Express', 'Original', 'Garcia', 'Thai', 'Seafood']
+PLACE_TYPES = ['restaurant', 'food', 'point_of_interest', 'establishment', 'meal_takeaway',
+               'bar', 'cafe', 'bakery', 'night_club', 'lodging']
+
+
+def make_places(count: int, seed: int = 42):
+    """Synthetic Nearby Search results"""
+    rng = random.Random(seed)
+    return [
+        {
+            'place_id': f'place-{i}',
+            'name': ' '.join(rng.sample(NAME_WORDS, rng.randint(1, 4))),
+            'types': rng.sample(PLACE_TYPES, rng.randint(1, 4)),
+        }
+        for i in range(count)
+    ]
+
+
+def time_call(function, places):
+    # Scoring writes into the place dicts, so each run gets its own copy
+    places = copy.deepcopy(places)
+    start = time.perf_counter()
+    result = function(places)
+    return time.perf_counter() - start, result
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or DEFAULT_SIZES
+
+    # Only the keyword matchers are exercised; the collector runs fine without a database
+    logging.disable(logging.CRITICAL)
+    collector = GooglePlacesTacoCollector('benchmark')
+
+    print(f"{'places':>8}  {'loop (s)':>10}  {'batch (s)':>10}  {'speedup':>8}")
+    for size in sizes:
+        places = make_places(size)
+        loop_seconds, loop_result = time_call(collector.filter_bean_cheese_candidates, places)
+        batch_seconds, batch_result = time_call(collector.rank_bean_cheese_candidates, places)
+
+        loop_ranking = [(place['place_id'], place['bean_cheese_likelihood_score']) for place in loop_result]
+        batch_ranking = [(place['place_id'], place['bean_cheese_likelihood_score']) for place in batch_result]
+        if loop_ranking != batch_ranking:
+            raise SystemExit(f"Rankings differ at {size} places")
+
+        print(f"{size:>8}  {loop_seconds:>10.3f}  {batch_seconds:>10.3f}  {loop_seconds / batch_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+End-to-end pipeline benchmark against the mock Places server and a throwaway database
+
+For each dataset size, a fresh process starts benchmarks/mock_places_server.py
+and creates an empty PostgreSQL database next to POSTGRES_DB. It then runs
+collect_all_data over the whole dataset area, optionally stores the photos
+with photo_store, exports the seeds with export_to_rails_seeds, and drops the
+database again. Run from the data_collection directory with the database from
+docker-compose.yml up:
+
+    python benchmarks/benchmark_pipeline.py                      # 100, 10000 and 100000 places
+    python benchmarks/benchmark_pipeline.py 100 10000 --latency-ms 30 --error-rate 0.01
+    python benchmarks/benchmark_pipeline.py 10000 --output results.json
+
+Reported per size: places/sec through the collector, peak RSS of the
+collector process (and of the export workers), database rows/sec for the
+collector's batched writes and for the export, and the mock's request counts.
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import psycopg2
+from dotenv import load_dotenv
+
+DEFAULT_SIZES = [100, 10000, 100000]
+
+
+def run_admin_sql(sql: str):
+    """Run a statement such as CREATE DATABASE on the server's maintenance database"""
+    connection = psycopg2.connect(
+        host=os.getenv("POSTGRES_HOST", "localhost"),
+        port=os.getenv("POSTGRES_PORT", "5432"),
+        database=os.getenv("BENCHMARK_ADMIN_DB", "postgres"),
+        user=os.getenv("POSTGRES_USER", "tacos"),
+        password=os.getenv("POSTGRES_PASSWORD", "tacos_password"),
+    )
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+    finally:
+        connection.close()
+
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+
+def run_one(args) -> dict:
+    """Benchmark one dataset size in this process and return the measurements"""
+    # Imported here so the parent process never loads pandas or opens a pool
+    from mock_places_server import MockPlacesServer, SyntheticPlaces
+    from bc_tacos import GooglePlacesTacoCollector
+    from db import close_pool, get_pool
+    from export_to_rails_seeds import export_full
+    from metrics import RunMetrics
+    from rate_limiter import TokenBucketRateLimiter
+
+    logging.disable(logging.WARNING)
+    dataset = SyntheticPlaces(args.run_one, seed=args.seed)
+    server = MockPlacesServer(dataset, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                              error_rate=args.error_rate, quota_error_rate=args.quota_error_rate,
+                              token_delay=args.token_delay, seed=args.seed).start()
+
+    database = f"taco_benchmark_{os.getpid()}"
+    # UTF8 like the docker-compose server, whatever the local server's default encoding
+    run_admin_sql(f"CREATE DATABASE {database} ENCODING 'UTF8' TEMPLATE template0")
+    os.environ["POSTGRES_DB"] = database
+
+    result = {'places': args.run_one}
+    try:
+        metrics = RunMetrics('benchmark')
+        collector = GooglePlacesTacoCollector(
+            'benchmark-key', max_concurrent_requests=args.concurrency, base_url=server.base_url,
+            rate_limiter=TokenBucketRateLimiter(qps=args.qps, burst=args.concurrency * 2), metrics=metrics)
+        collector.page_token_delay = args.token_delay
+
+        start = time.perf_counter()
+        restaurants_df, tacos_df, reviews_df, photos_df = collector.collect_all_data(bounds=dataset.bounds)
+        collect_seconds = time.perf_counter() - start
+        collector.close_database_connection()
+
+        report = metrics.report()
+        processed = report['counters'].get('places_processed', 0)
+        result.update({
+            'collect_seconds': round(collect_seconds, 2),
+            'places_processed': processed,
+            'places_per_second': round(processed / collect_seconds, 1) if collect_seconds else None,
+            'collect_peak_rss_mb': peak_rss_mb(),
+            'db_rows_written': sum(report['db']['rows_written'].values()),
+            'db_rows_per_second': report['db']['rows_per_second'],
+            'api_requests': report['api_requests_total'],
+            'stages': report['stages'],
+        })
+
+        if args.photos:
+            from photo_store import PhotoFetcher, PhotoStore, ingest_photos
+            with tempfile.TemporaryDirectory() as store_dir:
+                fetcher = PhotoFetcher('benchmark-key', PhotoStore(store_dir), max_concurrent_requests=args.concurrency,
+                                       rate_limiter=TokenBucketRateLimiter(qps=args.qps, burst=args.concurrency * 2),
+                                       base_url=server.base_url)
+                start = time.perf_counter()
+                with get_pool().connection() as connection:
+                    rewritten, failed = ingest_photos(connection, fetcher)
+                photo_seconds = time.perf_counter() - start
+            result.update({'photos_stored': rewritten, 'photos_failed': failed,
+                           'photos_per_second': round(rewritten / photo_seconds, 1) if photo_seconds else None})
+
+        with tempfile.TemporaryDirectory() as seeds_dir:
+            conn = get_pool().getconn(autocommit=False)
+            try:
+                conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_export_snapshot()")
+                    snapshot_id = cursor.fetchone()[0]
+                start = time.perf_counter()
+                counts = export_full(conn, snapshot_id, seeds_dir, os.path.join(seeds_dir, 'seeds.rb'),
+                                     workers=args.export_workers)
+                export_seconds = time.perf_counter() - start
+            finally:
+                conn.rollback()
+                get_pool().putconn(conn)
+
+        exported = sum(counts.values())
+        result.update({
+            'export_seconds': round(export_seconds, 2),
+            'export_rows': exported,
+            'export_rows_per_second': round(exported / export_seconds, 1) if export_seconds else None,
+            'export_workers_peak_rss_mb': peak_rss_mb(resource.RUSAGE_CHILDREN),
+            'mock_requests': dict(server.request_counts),
+        })
+        return result
+
+    finally:
+        close_pool()
+        server.stop()
+        run_admin_sql(f"DROP DATABASE IF EXISTS {database}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the collector and exporter against a mock Places server")
+    parser.add_argument('sizes', nargs='*', type=int, help="Dataset sizes (default: 100 10000 100000)")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Mock latency per request")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Random extra mock latency per request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of mock requests failing with HTTP 500")
+    parser.add_argument('--quota-error-rate', type=float, default=0.0,
+                        help="Fraction of mock requests answered with OVER_QUERY_LIMIT")
+    parser.add_argument('--token-delay', type=float, default=0.0, help="Seconds before mock page tokens work")
+    parser.add_argument('--concurrency', type=int, default=8, help="Details requests in flight")
+    parser.add_argument('--qps', type=float, default=1000.0, help="Rate limit for mock requests")
+    parser.add_argument('--export-workers', type=int, default=4)
+    parser.add_argument('--photos', action='store_true', help="Also store every photo with photo_store")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write all results to this JSON file")
+    parser.add_argument('--run-one', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.run_one:
+        print(json.dumps(run_one(args)))
+        return
+
+    # Each size runs in its own process so peak RSS is per size
+    passthrough = [
+        '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+        '--error-rate', str(args.error_rate), '--quota-error-rate', str(args.quota_error_rate),
+        '--token-delay', str(args.token_delay), '--concurrency', str(args.concurrency), '--qps', str(args.qps),
+        '--export-workers', str(args.export_workers), '--seed', str(args.seed),
+    ] + (['--photos'] if args.photos else [])
+
+    results = []
+    print(f"{'places':>8}  {'places/s':>9}  {'collect s':>9}  {'peak RSS MB':>11}  {'db rows/s':>10}  "
+          f"{'export rows/s':>13}  {'api calls':>9}")
+    for size in args.sizes or DEFAULT_SIZES:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-one', str(size), *passthrough],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{size:>8}  {result['places_per_second']:>9}  {result['collect_seconds']:>9}  "
+              f"{result['collect_peak_rss_mb']:>11}  {result['db_rows_per_second']!s:>10}  "
+              f"{result['export_rows_per_second']!s:>13}  {result['api_requests']:>9}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'settings': {key: value for key, value in vars(args).items() if key not in ('sizes', 'run_one')},
+                       'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark review text cleaning: the old per-row regex path against clean_text_column
+
+Run from the data_collection directory:
+
+    python benchmarks/benchmark_text_cleaning.py            # full reviews table (POSTGRES_* env)
+    python benchmarks/benchmark_text_cleaning.py 200000     # synthetic reviews, no database needed
+
+The old path deleted non-ASCII characters instead of transliterating them, so
+the outputs differ wherever a review had accents or typographic punctuation;
+the benchmark reports how many values that affects.
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dotenv import load_dotenv
+
+from db import close_pool, get_pool
+from export_to_rails_seeds import TEXT_COLUMNS
+from text_cleaning import clean_text, clean_text_column
+
+SAMPLE_REVIEWS = [
+    "Best bean and cheese in town, $2.50 and huge.",
+    "Chela’s never misses — the “breakfast special” is 3 for $5!",
+    "Jalapeño salsa is 🔥🔥 and the tortillas are made fresh. Muy rico 🌮",
+    "Service was slow   but the   food was worth it.\n\nWill be back.",
+    "Café con leche + migas taco = perfect morning. Señora at the register is the sweetest.",
+    "Not my favorite.",
+    "Solid breakfast tacos, friendly staff and plenty of parking.",
+    "Two bean and cheese tacos and a coffee for under six bucks.",
+    "The salsa verde is great. Get there early on weekends, the line gets long.",
+    "Ordered online and it was ready in ten minutes. Tortillas could be warmer.",
+]
+
+
+def per_row_regex(text):
+    """The exporter's previous cleaning: delete non-ASCII runs, then collapse whitespace"""
+    if not text:
+        return text
+    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def load_review_columns():
+    """Every review text column from the database, as lists of values"""
+    columns = TEXT_COLUMNS['reviews']
+    with get_pool().connection() as connection, connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(columns)} FROM reviews")
+        rows = cursor.fetchall()
+    return {column: [row[i] for row in rows] for i, column in enumerate(columns)}
+
+
+def make_review_columns(count: int, seed: int = 42):
+    """Synthetic review text columns"""
+    rng = random.Random(seed)
+    texts = [' '.join(rng.sample(SAMPLE_REVIEWS, rng.randint(1, 4))) for _ in range(count)]
+    return {'review_text': texts, 'content': list(texts),
+            'author_name': [rng.choice(['Ana María', 'José', 'Chris', None, 'Zoë K.']) for _ in range(count)]}
+
+
+def time_call(function, columns):
+    start = time.perf_counter()
+    result = {column: function(values) for column, values in columns.items()}
+    return time.perf_counter() - start, result
+
+
+def main():
+    load_dotenv()
+    if sys.argv[1:]:
+        columns = make_review_columns(int(sys.argv[1]))
+        source = 'synthetic reviews'
+    else:
+        try:
+            columns = load_review_columns()
+        finally:
+            close_pool()
+        source = 'reviews table'
+
+    rows = len(next(iter(columns.values())))
+    print(f"{rows} rows from the {source}, columns: {', '.join(columns)}")
+
+    paths = [
+        ('per-row regex (old)', lambda values: [per_row_regex(value) for value in values]),
+        ('per-row clean_text', lambda values: [clean_text(value) for value in values]),
+        ('clean_text_column', clean_text_column),
+    ]
+    results = {}
+    baseline = None
+    print(f"{'path':<22}  {'seconds':>8}  {'rows/s':>10}  {'speedup':>8}")
+    for name, function in paths:
+        seconds, results[name] = time_call(function, columns)
+        baseline = baseline or seconds
+        print(f"{name:<22}  {seconds:>8.3f}  {rows / seconds:>10.0f}  {baseline / seconds:>7.1f}x")
+
+    if results['per-row clean_text'] != results['clean_text_column']:
+        raise SystemExit("clean_text and clean_text_column disagree")
+
+    changed = sum(old != new for column in columns
+                  for old, new in zip(results['per-row regex (old)'][column], results['clean_text_column'][column]))
+    print(f"{changed} values now keep transliterated text the old path deleted")
+
+
+if __name__ == "__main__":
+    main()
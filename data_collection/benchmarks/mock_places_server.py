@@ -0,0 +1,295 @@
+"""
+Local stand-in for the Google Places endpoints the collector uses
+
+Serves place/nearbysearch/json, place/details/json and place/photo over HTTP
+from a synthetic, seeded dataset, so the collector and photo store can be
+exercised end to end without an API key or quota. Nearby Search behaves like
+the real one where the collector depends on it: results sorted by distance,
+20 per page, at most 60 per query, and next_page_token pagination (optionally
+refusing tokens used too early). Latency, jitter, HTTP 500s and
+OVER_QUERY_LIMIT responses can be injected.
+
+Run standalone (from the data_collection directory) and point the scripts at it:
+
+    python benchmarks/mock_places_server.py --places 10000 --port 8765
+    PLACES_BASE_URL=http://127.0.0.1:8765/maps/api python bc_tacos.py
+"""
+
+import argparse
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+PAGE_SIZE = 20
+MAX_RESULTS_PER_QUERY = 60
+
+# Dataset sizes named in the benchmark docs
+DATASET_SIZES = {'small': 100, 'medium': 10000, 'large': 100000}
+
+# Places per square kilometre; the dataset box grows with the number of places
+PLACE_DENSITY = 40
+
+NAME_WORDS = ['Taqueria', 'El', 'La', 'Los', 'Tacos', 'Casa', 'Familia', 'Pizza', 'Burger', 'Sushi',
+              'Bar', 'Grill', 'Cafe', 'Kitchen', 'Mexican', 'Tex-Mex', 'Breakfast', 'Hotel', 'Club',
+              'Barbacoa', 'Panaderia', 'Express', 'Original', 'Garcia', 'Thai', 'Seafood']
+PLACE_TYPES = ['restaurant', 'food', 'point_of_interest', 'establishment', 'meal_takeaway',
+               'bar', 'cafe', 'bakery', 'night_club', 'lodging']
+REVIEW_TEXTS = [
+    "Best bean and cheese taco in town, only $2.50 and it's huge.",
+    "Bean & cheese breakfast tacos are 3 for $6. Great salsa.",
+    "Solid breakfast tacos, friendly staff and plenty of parking.",
+    "Refried bean tacos were a little cold but the tortillas are homemade.",
+    "Not my favorite. Long wait and the coffee was weak.",
+    "Their bean and cheese is the move, around $2 each.",
+    "Great migas taco, the barbacoa on Sundays sells out fast.",
+]
+
+# Smallest valid GIF (1x1 pixel), served as every photo's image bytes
+PHOTO_BYTES = (b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00'
+               b',\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;')
+
+
+class SyntheticPlaces:
+    def __init__(self, count: int, center: Tuple[float, float] = (29.4241, -98.4936), seed: int = 42):
+        """
+        Generate a reproducible set of places spread evenly over a box around center
+
+        Args:
+            count: Number of places
+            center: (lat, lng) of the box center
+            seed: Random seed; the same seed always produces the same places
+        """
+        rng = random.Random(seed)
+        side_km = math.sqrt(max(count, 1) / PLACE_DENSITY)
+        half_lat = side_km / 2 / 111.32
+        half_lng = side_km / 2 / (111.32 * math.cos(math.radians(center[0])))
+        self.bounds = (center[0] - half_lat, center[1] - half_lng, center[0] + half_lat, center[1] + half_lng)
+
+        self.place_ids = [f"mock-place-{i}" for i in range(count)]
+        self.lats = np.array([rng.uniform(self.bounds[0], self.bounds[2]) for _ in range(count)])
+        self.lngs = np.array([rng.uniform(self.bounds[1], self.bounds[3]) for _ in range(count)])
+        self.names = [' '.join(rng.sample(NAME_WORDS, rng.randint(1, 4))) for _ in range(count)]
+        self.types = [rng.sample(PLACE_TYPES, rng.randint(1, 4)) for _ in range(count)]
+        self.index = {place_id: i for i, place_id in enumerate(self.place_ids)}
+        self.seed = seed
+
+    def nearby(self, lat: float, lng: float, radius: float) -> List[int]:
+        """Indexes of places within radius meters, nearest first (equirectangular distance)"""
+        dlat = (self.lats - lat) * 111320.0
+        dlng = (self.lngs - lng) * 111320.0 * math.cos(math.radians(lat))
+        distances = np.hypot(dlat, dlng)
+        inside = np.flatnonzero(distances <= radius)
+        return inside[np.argsort(distances[inside], kind='stable')].tolist()
+
+    def search_result(self, i: int) -> Dict:
+        return {
+            'place_id': self.place_ids[i],
+            'name': self.names[i],
+            'types': self.types[i],
+            'geometry': {'location': {'lat': float(self.lats[i]), 'lng': float(self.lngs[i])}},
+        }
+
+    def details(self, place_id: str) -> Optional[Dict]:
+        i = self.index.get(place_id)
+        if i is None:
+            return None
+        rng = random.Random(f"{self.seed}:{place_id}")
+        now = int(time.time())
+        return {
+            **self.search_result(i),
+            'formatted_address': f"{100 + i} Main St, San Antonio, TX 782{i % 100:02d}",
+            'formatted_phone_number': f"(210) 555-{i % 10000:04d}",
+            'website': f"https://example.com/{place_id}",
+            'rating': round(rng.uniform(3.0, 5.0), 1),
+            'user_ratings_total': rng.randint(5, 2000),
+            'price_level': rng.randint(1, 3),
+            'reviews': [{
+                'author_name': f"Reviewer {i}-{n}",
+                'author_url': f"https://example.com/reviewers/{i}-{n}",
+                'language': 'en',
+                'rating': rng.randint(1, 5),
+                'relative_time_description': 'a month ago',
+                'text': rng.choice(REVIEW_TEXTS),
+                'time': now - rng.randint(0, 365 * 24 * 3600),
+            } for n in range(5)],
+            'photos': [{'photo_reference': f"{place_id}-photo-{n}", 'height': 1200, 'width': 1600}
+                       for n in range(rng.randint(0, 3))],
+        }
+
+
+class MockPlacesServer:
+    def __init__(self, dataset: SyntheticPlaces, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, quota_error_rate: float = 0.0, token_delay: float = 0.0,
+                 host: str = '127.0.0.1', port: int = 0, seed: int = 42):
+        """
+        HTTP server for a synthetic dataset; call start() and use base_url
+
+        Args:
+            dataset: Places to serve
+            latency_ms: Added delay per request
+            jitter_ms: Random extra delay per request, uniform between 0 and this
+            error_rate: Fraction of requests answered with HTTP 500
+            quota_error_rate: Fraction of API requests answered with status OVER_QUERY_LIMIT
+            token_delay: Seconds before a next_page_token is accepted (INVALID_REQUEST before that)
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            seed: Seed for the injected latency and errors
+        """
+        self.dataset = dataset
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.quota_error_rate = quota_error_rate
+        self.token_delay = token_delay
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+        # next_page_token -> (ordered place indexes, offset, issued at)
+        self._tokens: Dict[str, Tuple[List[int], int, float]] = {}
+        self._token_ids = itertools.count()
+        self._tokens_lock = threading.Lock()
+
+        self.request_counts: Dict[str, int] = {}
+        self._counts_lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/maps/api"
+
+    def start(self) -> 'MockPlacesServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _count(self, endpoint: str):
+        with self._counts_lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+
+    def nearby_search(self, params: Dict[str, str]) -> Dict:
+        if 'pagetoken' in params:
+            with self._tokens_lock:
+                entry = self._tokens.get(params['pagetoken'])
+            if entry is None or time.monotonic() - entry[2] < self.token_delay:
+                return {'status': 'INVALID_REQUEST', 'results': []}
+            indexes, offset, _ = entry
+        else:
+            lat, lng = (float(value) for value in params['location'].split(','))
+            indexes = self.dataset.nearby(lat, lng, float(params.get('radius', 1000)))[:MAX_RESULTS_PER_QUERY]
+            offset = 0
+
+        if not indexes:
+            return {'status': 'ZERO_RESULTS', 'results': []}
+
+        response = {'status': 'OK',
+                    'results': [self.dataset.search_result(i) for i in indexes[offset:offset + PAGE_SIZE]]}
+        if offset + PAGE_SIZE < len(indexes):
+            token = f"mock-token-{next(self._token_ids)}"
+            with self._tokens_lock:
+                self._tokens[token] = (indexes, offset + PAGE_SIZE, time.monotonic())
+            response['next_page_token'] = token
+        return response
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are separate writes; with Nagle on, keep-alive clients stall ~40ms per request
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: Dict[str, str] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, data: Dict):
+                self._send(200, json.dumps(data).encode('utf-8'), 'application/json; charset=UTF-8')
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                endpoint = url.path.rsplit('/maps/api/', 1)[-1]
+
+                if endpoint.startswith('photo-bytes/'):
+                    self._send(200, PHOTO_BYTES, 'image/gif')
+                    return
+
+                server._count(endpoint)
+                delay = server.latency_ms + server._random() * server.jitter_ms
+                if delay:
+                    time.sleep(delay / 1000)
+                if server._random() < server.error_rate:
+                    self._send(500, b'Internal Server Error', 'text/plain')
+                    return
+
+                if endpoint == 'place/photo':
+                    reference = params.get('photoreference', '')
+                    self._send(302, b'', 'text/plain', {'Location': f"/maps/api/photo-bytes/{reference}"})
+                elif server._random() < server.quota_error_rate:
+                    self._send_json({'status': 'OVER_QUERY_LIMIT', 'error_message': 'Mock quota exceeded'})
+                elif endpoint == 'place/nearbysearch/json':
+                    self._send_json(server.nearby_search(params))
+                elif endpoint == 'place/details/json':
+                    details = server.dataset.details(params.get('place_id', ''))
+                    self._send_json({'status': 'OK', 'result': details} if details else {'status': 'NOT_FOUND'})
+                else:
+                    self._send(404, b'Not Found', 'text/plain')
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic Google Places dataset locally")
+    parser.add_argument('--places', type=int, default=DATASET_SIZES['small'], help="Number of places")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--quota-error-rate', type=float, default=0.0)
+    parser.add_argument('--token-delay', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    dataset = SyntheticPlaces(args.places, seed=args.seed)
+    server = MockPlacesServer(dataset, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                              error_rate=args.error_rate, quota_error_rate=args.quota_error_rate,
+                              token_delay=args.token_delay, port=args.port, seed=args.seed)
+    south, west, north, east = dataset.bounds
+    print(f"Serving {args.places} places at {server.base_url}")
+    print(f"SEARCH_BOUNDS={south:.5f},{west:.5f},{north:.5f},{east:.5f}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
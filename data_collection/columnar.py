@@ -0,0 +1,167 @@
+"""
+Typed columnar files (Parquet or Arrow IPC) for collected and exported taco data
+
+Parquet files are zstd-compressed and suit archiving and sharing. Arrow IPC
+files are written uncompressed by default so read_table can memory-map them
+without copying, which makes loading the full dataset in a notebook
+near-instant:
+
+    from columnar import load_tables
+    tables = load_tables('exports')          # {'restaurants': DataFrame, ...}
+
+Requires pyarrow (pip install pyarrow).
+"""
+
+import glob
+import logging
+import os
+from typing import Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # Columnar output is optional
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# File extension per format
+EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+TABLES = ['restaurants', 'tacos', 'taco_photos', 'photos', 'reviews']
+
+
+def require_pyarrow():
+    """Raise a helpful error if pyarrow is not installed"""
+    if pa is None:
+        raise RuntimeError("Parquet/Arrow output requires pyarrow (pip install pyarrow)")
+
+
+def _ingest_schema(schema: 'pa.Schema') -> 'pa.Schema':
+    # Timestamps arrive as ISO strings from the JSON-oriented converters and are cast afterwards
+    return pa.schema([
+        pa.field(field.name, pa.string()) if pa.types.is_timestamp(field.type) else field
+        for field in schema
+    ])
+
+
+class ColumnarWriter:
+    """Writes dict rows to a Parquet or Arrow IPC file in batches with a fixed schema"""
+
+    def __init__(self, path: str, schema: 'pa.Schema', file_format: str = 'parquet',
+                 batch_size: int = 10000, compression: Optional[str] = None):
+        """
+        Args:
+            path: Output file
+            schema: Arrow schema; keys missing from a row are null and extra keys are dropped
+            file_format: 'parquet' or 'arrow'
+            batch_size: Rows buffered before a row group / record batch is written
+            compression: Codec (default zstd for Parquet, none for Arrow so it can be memory-mapped)
+        """
+        require_pyarrow()
+        if file_format not in EXTENSIONS:
+            raise ValueError(f"Unknown columnar format {file_format!r}; use 'parquet' or 'arrow'")
+
+        self.path = path
+        self.schema = schema
+        self.ingest_schema = _ingest_schema(schema)
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.rows: List[Dict] = []
+        self.count = 0
+
+        if file_format == 'parquet':
+            self.writer = pq.ParquetWriter(path, schema, compression=compression or 'zstd')
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=compression)
+            self.writer = pa.ipc.new_file(path, schema, options=options)
+
+    def write(self, row: Dict):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self._write_batch()
+
+    def _write_batch(self):
+        if not self.rows:
+            return
+        table = pa.Table.from_pylist(self.rows, schema=self.ingest_schema)
+        if self.ingest_schema != self.schema:
+            table = table.cast(self.schema)
+        self.writer.write_table(table)
+        self.count += len(self.rows)
+        self.rows = []
+
+    def close(self):
+        self._write_batch()
+        self.writer.close()
+
+
+def write_dataframe(df, path: str, file_format: str = 'parquet', compression: Optional[str] = None):
+    """
+    Write a pandas DataFrame as Parquet or Arrow IPC, keeping its column types
+
+    Args:
+        df: DataFrame to write
+        path: Output file
+        file_format: 'parquet' or 'arrow'
+        compression: Codec (default zstd for Parquet, none for Arrow so it can be memory-mapped)
+    """
+    require_pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if file_format == 'parquet':
+        pq.write_table(table, path, compression=compression or 'zstd')
+    elif file_format == 'arrow':
+        with pa.ipc.new_file(path, table.schema, options=pa.ipc.IpcWriteOptions(compression=compression)) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Unknown columnar format {file_format!r}; use 'parquet' or 'arrow'")
+
+
+def read_table(path: str) -> 'pa.Table':
+    """
+    Open a Parquet or Arrow IPC file, memory-mapping it rather than reading it into memory
+
+    Uncompressed Arrow files are zero-copy: columns point straight into the mapped file.
+    """
+    require_pyarrow()
+    if path.endswith('.arrow'):
+        return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return pq.read_table(path, memory_map=True)
+
+
+def _table_name(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    for table in TABLES:
+        if stem == table or f"_{table}_" in f"_{stem}_":
+            return table
+    return stem
+
+
+def load_tables(directory: str, as_pandas: bool = True) -> Dict:
+    """
+    Load every Parquet / Arrow file in a directory, keyed by table name
+
+    For a table present in both formats the Arrow file is used. Timestamped file
+    names from save_data ('<base>_<table>_<timestamp>') load the newest file per table.
+
+    Args:
+        directory: Directory with the files
+        as_pandas: Return DataFrames instead of Arrow tables
+
+    Returns:
+        Dict of table name to DataFrame (or pyarrow.Table)
+    """
+    paths = {}
+    for extension in EXTENSIONS.values():
+        # Sorted so the newest timestamped file wins
+        for path in sorted(glob.glob(os.path.join(directory, f"*.{extension}"))):
+            paths[_table_name(path)] = path
+
+    tables = {}
+    for name, path in paths.items():
+        table = read_table(path)
+        tables[name] = table.to_pandas() if as_pandas else table
+        logger.info(f"Loaded {table.num_rows} {name} rows from {path}")
+    return tables
@@ -0,0 +1,177 @@
+"""
+Pooled PostgreSQL connections shared by the collector, exporter and backfills
+
+ConnectionPool wraps psycopg2's ThreadedConnectionPool with blocking checkout
+(instead of raising when every connection is in use), a health check on
+checkout so connections dropped by the server are replaced transparently, and
+a reset on return so the next borrower always gets a clean connection.
+
+Settings come from the same environment variables as docker-compose.yml:
+
+    POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD,
+    DB_POOL_MIN, DB_POOL_MAX
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    def __init__(self, minconn: int = 1, maxconn: int = 8, health_check_interval: float = 30.0,
+                 **connect_kwargs):
+        """
+        Open a pool of connections
+
+        Args:
+            minconn: Connections opened up front and kept open
+            maxconn: Most connections open at once; further checkouts wait for a return
+            health_check_interval: Connections idle longer than this are checked with SELECT 1 on checkout
+            **connect_kwargs: Passed to psycopg2.connect (host, port, database, user, password, ...)
+        """
+        self.minconn = minconn
+        self.maxconn = max(minconn, maxconn)
+        self.health_check_interval = health_check_interval
+        self._pool = psycopg2.pool.ThreadedConnectionPool(minconn, self.maxconn, **connect_kwargs)
+        self._available = threading.BoundedSemaphore(self.maxconn)
+        self._returned_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs) -> 'ConnectionPool':
+        """Create a pool configured from POSTGRES_* and DB_POOL_* environment variables"""
+        return cls(
+            minconn=int(os.getenv("DB_POOL_MIN", "1")),
+            maxconn=int(os.getenv("DB_POOL_MAX", "8")),
+            host=os.getenv("POSTGRES_HOST", "localhost"),
+            port=os.getenv("POSTGRES_PORT", "5432"),
+            database=os.getenv("POSTGRES_DB", "tacos_db"),
+            user=os.getenv("POSTGRES_USER", "tacos"),
+            password=os.getenv("POSTGRES_PASSWORD", "tacos_password"),
+            **kwargs
+        )
+
+    def _is_healthy(self, connection) -> bool:
+        if connection.closed:
+            return False
+
+        idle_since = self._returned_at.get(id(connection))
+        if idle_since is not None and time.monotonic() - idle_since < self.health_check_interval:
+            return True
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not connection.autocommit:
+                connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self, timeout: Optional[float] = None, autocommit: bool = True):
+        """
+        Check out a healthy connection, waiting for one to be returned if the pool is exhausted
+
+        Args:
+            timeout: Seconds to wait for a free connection (None waits forever)
+            autocommit: Autocommit setting for the checked-out connection
+
+        Returns:
+            psycopg2 connection; give it back with putconn()
+
+        Raises:
+            psycopg2.pool.PoolError: If no connection frees up within timeout
+        """
+        # acquire() only gives up with a timeout; None blocks until a connection is returned
+        if not self._available.acquire(timeout=timeout):
+            raise psycopg2.pool.PoolError(f"No database connection available after {timeout}s")
+
+        try:
+            while True:
+                with self._lock:
+                    connection = self._pool.getconn()
+                if self._is_healthy(connection):
+                    break
+                logger.warning("Replacing a broken pooled database connection")
+                with self._lock:
+                    self._returned_at.pop(id(connection), None)
+                    self._pool.putconn(connection, close=True)
+
+            connection.autocommit = autocommit
+            return connection
+
+        except Exception:
+            self._available.release()
+            raise
+
+    def putconn(self, connection, close: bool = False):
+        """
+        Return a checked-out connection, rolling back anything left uncommitted
+
+        Args:
+            connection: Connection from getconn()
+            close: Close it instead of keeping it for reuse
+        """
+        try:
+            if not close and not connection.closed:
+                try:
+                    if connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                        connection.rollback()
+                except psycopg2.Error:
+                    close = True
+
+            with self._lock:
+                if close or connection.closed:
+                    self._returned_at.pop(id(connection), None)
+                else:
+                    self._returned_at[id(connection)] = time.monotonic()
+                self._pool.putconn(connection, close=close or bool(connection.closed))
+        finally:
+            self._available.release()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None, autocommit: bool = True) -> Iterator:
+        """Context manager that checks out a connection and always returns it"""
+        connection = self.getconn(timeout=timeout, autocommit=autocommit)
+        try:
+            yield connection
+        finally:
+            self.putconn(connection)
+
+    def closeall(self):
+        """Close every connection in the pool"""
+        with self._lock:
+            self._pool.closeall()
+            self._returned_at.clear()
+
+
+_default_pool: Optional[ConnectionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Process-wide pool configured from the environment, created on first use"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None or _default_pool._pool.closed:
+            _default_pool = ConnectionPool.from_env()
+            logger.info("Opened database connection pool")
+        return _default_pool
+
+
+def close_pool():
+    """Close the process-wide pool if it was opened"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is not None:
+            _default_pool.closeall()
+            _default_pool = None
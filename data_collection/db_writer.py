@@ -0,0 +1,146 @@
+"""
+Batched PostgreSQL writer for collected taco data
+
+Rows are buffered per table and flushed with multi-row INSERTs
+(psycopg2.extras.execute_values), one transaction per flush. If a batch
+fails, it is replayed row by row under savepoints so the bad rows can be
+reported without losing the rest of the batch.
+"""
+
+import logging
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Tuple
+
+import psycopg2
+import psycopg2.extras
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    def __init__(self, connection, table_columns: Dict[str, List[str]], conflict_clauses: Dict[str, str] = None,
+                 batch_size: int = 500, flush_interval: float = 5.0, on_flush: Callable[[], None] = None,
+                 metrics=None):
+        """
+        Initialize the batched writer
+
+        Args:
+            connection: psycopg2 connection to write through
+            table_columns: Column names per table, in flush (foreign key) order
+            conflict_clauses: Optional ON CONFLICT clause per table
+            batch_size: Flush once this many rows are buffered across all tables
+            flush_interval: Flush once the oldest buffered row is this many seconds old
+            on_flush: Optional callback run after each flush commits, e.g. to checkpoint progress
+            metrics: Optional metrics.RunMetrics recording flush time and rows written per table
+        """
+        self.connection = connection
+        self.table_columns = table_columns
+        self.conflict_clauses = conflict_clauses or {}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.metrics = metrics
+
+        self.buffers: Dict[str, List[Tuple]] = {table: [] for table in table_columns}
+        self.rows_written: Dict[str, int] = {table: 0 for table in table_columns}
+        self.failed_rows: List[Tuple[str, Tuple, str]] = []  # (table, row, error)
+
+        self._buffered = 0
+        self._oldest_row_time = None
+
+    def add(self, table: str, row: Tuple):
+        """
+        Buffer a row, flushing if a size or time threshold is reached
+
+        Args:
+            table: Target table name
+            row: Values in the table's column order
+        """
+        self.buffers[table].append(row)
+        self._buffered += 1
+        if self._oldest_row_time is None:
+            self._oldest_row_time = time.monotonic()
+
+        if (self._buffered >= self.batch_size
+                or time.monotonic() - self._oldest_row_time >= self.flush_interval):
+            self.flush()
+
+    def _insert_sql(self, table: str) -> str:
+        columns = ', '.join(self.table_columns[table])
+        return f"INSERT INTO {table} ({columns}) VALUES %s {self.conflict_clauses.get(table, '')}"
+
+    def flush(self) -> int:
+        """
+        Write all buffered rows in a single transaction
+
+        Returns:
+            Number of rows written successfully
+        """
+        if not self._buffered:
+            if self.on_flush:
+                self.on_flush()
+            return 0
+
+        batches = {table: rows for table, rows in self.buffers.items() if rows}
+        self.buffers = {table: [] for table in self.table_columns}
+        self._buffered = 0
+        self._oldest_row_time = None
+
+        flush_start = time.monotonic()
+        previous_autocommit = self.connection.autocommit
+        self.connection.autocommit = False
+        try:
+            with self.metrics.profile('db_write') if self.metrics else nullcontext():
+                try:
+                    with self.connection.cursor() as cursor:
+                        for table, rows in batches.items():
+                            psycopg2.extras.execute_values(cursor, self._insert_sql(table), rows,
+                                                           page_size=len(rows))
+                    self.connection.commit()
+                    written = {table: len(rows) for table, rows in batches.items()}
+                except psycopg2.Error as e:
+                    self.connection.rollback()
+                    logger.warning(f"Batch insert failed ({e.__class__.__name__}: {e}), retrying row by row")
+                    written = self._flush_row_by_row(batches)
+        finally:
+            self.connection.autocommit = previous_autocommit
+
+        for table, count in written.items():
+            self.rows_written[table] += count
+        if self.metrics:
+            self.metrics.observe_db_write(time.monotonic() - flush_start, written)
+
+        total = sum(written.values())
+        logger.info(f"Flushed {total} rows: " + ', '.join(f"{count} {table}" for table, count in written.items()))
+
+        if self.on_flush:
+            self.on_flush()
+        return total
+
+    def _flush_row_by_row(self, batches: Dict[str, List[Tuple]]) -> Dict[str, int]:
+        """Replay a failed batch one row at a time, recording rows that still fail"""
+        written = {table: 0 for table in batches}
+
+        with self.connection.cursor() as cursor:
+            for table, rows in batches.items():
+                sql = self._insert_sql(table)
+                for row in rows:
+                    cursor.execute("SAVEPOINT batch_row")
+                    try:
+                        psycopg2.extras.execute_values(cursor, sql, [row])
+                        cursor.execute("RELEASE SAVEPOINT batch_row")
+                        written[table] += 1
+                    except psycopg2.Error as e:
+                        cursor.execute("ROLLBACK TO SAVEPOINT batch_row")
+                        self.failed_rows.append((table, row, str(e).strip()))
+                        logger.error(f"Error inserting row into {table}: {e}")
+
+        self.connection.commit()
+        return written
+
+    def close(self):
+        """Flush remaining rows and log a summary"""
+        self.flush()
+        summary = ', '.join(f"{count} {table}" for table, count in self.rows_written.items())
+        logger.info(f"Batch writer finished: {summary}; {len(self.failed_rows)} failed rows")
@@ -4,33 +4,34 @@ Export PostgreSQL taco data to Rails-compatible seed files
 This script connects to the populated PostgreSQL container and creates a dump for Rails db:seed
 """
 
+import argparse
 import json
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 import psycopg2
 import psycopg2.extras
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
-import re
+import itertools
+from dotenv import load_dotenv
+
+from columnar import EXTENSIONS, ColumnarWriter, pa, require_pyarrow
+from db import close_pool, get_pool
+from profiler import StageProfiler
+from schema import migrate
+from text_cleaning import clean_text_column
+
+# Columns the collector keeps for its own bookkeeping that the Rails models don't have
+COLLECTOR_ONLY_COLUMNS = {
+    'restaurants': ['place_id'],
+    'photos': ['restaurant_id', 'photo_reference', 'updated_at'],
+}
 
 def connect_to_db():
-    """Connect to the populated PostgreSQL container"""
-    return psycopg2.connect(
-        host="localhost",
-        database="tacos_db",
-        user="tacos",
-        password="tacos_password",
-        port="5432",
-        cursor_factory=psycopg2.extras.RealDictCursor
-    )
-
-def clean_unicode_text(text):
-    """Clean problematic Unicode for Ruby"""
-    if not text:
-        return text
-    # Remove problematic Unicode that breaks Ruby parsing
-    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+    """Check out a connection to the populated PostgreSQL container (POSTGRES_* env, docker-compose defaults)"""
+    return get_pool().getconn()
 
 def convert_types(obj):
     """Convert PostgreSQL types to JSON-serializable types"""
@@ -40,120 +41,457 @@ def convert_types(obj):
         return obj.isoformat()
     return obj
 
-def export_all_data(cursor):
-    """Export all data from populated database"""
-
-    # Export restaurants
-    cursor.execute("SELECT * FROM restaurants ORDER BY id")
-    restaurants = []
-    for row in cursor.fetchall():
-        restaurant = {k: convert_types(v) for k, v in dict(row).items()}
-        restaurants.append(restaurant)
-
-    # Export tacos
-    cursor.execute("SELECT * FROM tacos ORDER BY id")
-    tacos = []
-    for row in cursor.fetchall():
-        taco = {k: convert_types(v) for k, v in dict(row).items()}
-        # Handle time fields specially
-        if taco.get('available_from'):
-            taco['available_from'] = str(taco['available_from'])
-        if taco.get('available_to'):
-            taco['available_to'] = str(taco['available_to'])
-        # Clean description
-        if taco.get('description'):
-            taco['description'] = clean_unicode_text(taco['description'])
-        tacos.append(taco)
-
-    # Export photos
-    cursor.execute("SELECT * FROM photos ORDER BY id")
-    photos = []
-    for row in cursor.fetchall():
-        photo = {k: convert_types(v) for k, v in dict(row).items()}
-        photos.append(photo)
-
-    # Export reviews
-    cursor.execute("SELECT * FROM reviews ORDER BY id")
-    reviews = []
-    for row in cursor.fetchall():
-        review = {k: convert_types(v) for k, v in dict(row).items()}
-        # Clean Unicode from text fields
-        for field in ['review_text', 'content', 'author_name']:
-            if review.get(field):
-                review[field] = clean_unicode_text(review[field])
-        reviews.append(review)
-
-    return restaurants, tacos, photos, reviews
-
-def create_rails_seeds_rb(restaurants, tacos, photos, reviews):
-    """Create Rails seeds.rb file"""
-
-    # Convert to Ruby-safe JSON
-    def to_ruby_json(data):
-        json_str = json.dumps(data, indent=2, ensure_ascii=True)
-        return json_str.replace(': null,', ': nil,').replace(': null}', ': nil}')
+def convert_restaurant(row):
+    """Restaurant row as a seed record"""
+    return {k: convert_types(v) for k, v in dict(row).items()
+            if k not in COLLECTOR_ONLY_COLUMNS['restaurants']}
+
+def convert_taco(row):
+    """Taco row as a seed record"""
+    taco = {k: convert_types(v) for k, v in dict(row).items()}
+    # Handle time fields specially
+    if taco.get('available_from'):
+        taco['available_from'] = str(taco['available_from'])
+    if taco.get('available_to'):
+        taco['available_to'] = str(taco['available_to'])
+    return taco
+
+def convert_photo(row):
+    """Photo row as a seed record (one per restaurant photo, under its first taco)"""
+    return {k: convert_types(v) for k, v in dict(row).items()
+            if k not in COLLECTOR_ONLY_COLUMNS['photos']}
+
+def convert_review(row):
+    """Review row as a seed record"""
+    return {k: convert_types(v) for k, v in dict(row).items()}
+
+def seed_schemas():
+    """Arrow schemas for the exported tables, matching the collector's columns (requires pyarrow)"""
+    return {
+        'restaurants': pa.schema([
+            ('id', pa.string()), ('name', pa.string()), ('street_address', pa.string()),
+            ('city', pa.string()), ('state', pa.string()), ('zip', pa.string()),
+            ('latitude', pa.float64()), ('longitude', pa.float64()), ('phone', pa.string()),
+            ('website', pa.string()), ('yelp_id', pa.string()), ('google_rating', pa.float64()),
+            ('google_price_level', pa.int32()), ('google_user_ratings_total', pa.int32()),
+            ('created_at', pa.timestamp('us')), ('updated_at', pa.timestamp('us')),
+        ]),
+        'tacos': pa.schema([
+            ('id', pa.string()), ('restaurant_id', pa.string()), ('name', pa.string()),
+            ('description', pa.string()), ('price_cents', pa.int32()), ('calories', pa.int32()),
+            ('tortilla_type', pa.string()), ('protein_type', pa.string()), ('is_vegan', pa.bool_()),
+            ('is_bulk', pa.bool_()), ('is_daily_special', pa.bool_()), ('available_from', pa.string()),
+            ('available_to', pa.string()), ('created_at', pa.timestamp('us')), ('updated_at', pa.timestamp('us')),
+        ]),
+        'photos': pa.schema([
+            ('id', pa.string()), ('taco_id', pa.string()), ('user_id', pa.string()), ('url', pa.string()),
+            ('is_user_uploaded', pa.bool_()), ('created_at', pa.timestamp('us')),
+        ]),
+        'reviews': pa.schema([
+            ('id', pa.string()), ('user_id', pa.string()), ('taco_id', pa.string()), ('content', pa.string()),
+            ('submitted_at', pa.timestamp('us')), ('verified_location', pa.bool_()),
+            ('gps_latitude', pa.float64()), ('gps_longitude', pa.float64()), ('fullness_rating', pa.int32()),
+            ('authenticity_id', pa.string()), ('created_at', pa.timestamp('us')), ('updated_at', pa.timestamp('us')),
+            ('author_name', pa.string()), ('author_url', pa.string()), ('google_rating', pa.int32()),
+            ('review_text', pa.string()), ('review_time', pa.int64()), ('relative_time_description', pa.string()),
+            ('language', pa.string()), ('review_date', pa.timestamp('us')), ('restaurant_id', pa.string()),
+        ]),
+    }
+
+# Tables in export (foreign key) order with the function turning a row into a seed record
+EXPORT_TABLES = [
+    ('restaurants', convert_restaurant),
+    ('tacos', convert_taco),
+    ('photos', convert_photo),
+    ('reviews', convert_review),
+]
+
+# Free-text columns transliterated to ASCII a batch at a time before conversion
+TEXT_COLUMNS = {
+    'tacos': ['description'],
+    'reviews': ['review_text', 'content', 'author_name'],
+}
+
+# Column that moves forward whenever a row is inserted or changed
+CHANGE_COLUMNS = {
+    'restaurants': 'updated_at',
+    'tacos': 'updated_at',
+    'photos': 'updated_at',
+    'reviews': 'updated_at',
+}
+
+# Delta exports re-read rows stamped this long before the previous export's snapshot, in case
+# a transaction that started earlier committed after it; applying a delta is idempotent
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+def iter_table_rows(conn, table, itersize=2000, since=None):
+    """
+    Stream a table ordered by id through a named server-side cursor
+
+    Only itersize rows are held in memory at a time. The connection must not be
+    in autocommit mode, since server-side cursors live inside a transaction.
+    With since, only rows whose change column is at or after it are returned.
+    """
+    with conn.cursor(name=f"export_{table}", cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+        cursor.itersize = itersize
+        if since is None:
+            cursor.execute(f"SELECT * FROM {table} ORDER BY id")
+        else:
+            cursor.execute(f"SELECT * FROM {table} WHERE {CHANGE_COLUMNS[table]} >= %s ORDER BY id", (since,))
+        for row in cursor:
+            yield row
+
+def iter_table_records(conn, table, itersize=2000, since=None):
+    """
+    Stream a table's seed records, cleaning its text columns a whole batch at a time
+
+    Rows are read itersize at a time; each text column of the batch is cleaned with
+    one clean_text_column call before the rows are converted.
+    """
+    convert = dict(EXPORT_TABLES)[table]
+    text_columns = TEXT_COLUMNS.get(table, [])
+    rows = iter_table_rows(conn, table, itersize, since=since)
+    while True:
+        batch = list(itertools.islice(rows, itersize))
+        if not batch:
+            return
+        for column in text_columns:
+            cleaned = clean_text_column([row[column] for row in batch])
+            for row, value in zip(batch, cleaned):
+                row[column] = value
+        for row in batch:
+            yield convert(row)
+
+def iter_deleted_ids(conn, table, since, itersize=2000):
+    """
+    Stream the ids of a table's rows deleted since a time, from the log kept by schema.py's triggers
+
+    Ids that exist again in the snapshot are left out: a full collection run truncates
+    and re-inserts rows under the same ids, and those rows are upserts, not deletes.
+    """
+    with conn.cursor(name=f"export_{table}_deletes") as cursor:
+        cursor.itersize = itersize
+        cursor.execute(f"""
+            SELECT DISTINCT deleted.id FROM collector_deleted_rows AS deleted
+            WHERE deleted.table_name = %s AND deleted.deleted_at >= %s
+              AND NOT EXISTS (SELECT 1 FROM {table} WHERE {table}.id = deleted.id)
+            ORDER BY deleted.id
+        """, (table, since))
+        for row in cursor:
+            yield str(row[0])
+
+def prune_deleted_rows(conn, exported_at):
+    """Drop deletion log entries older than the next delta export will read; returns how many"""
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM collector_deleted_rows WHERE deleted_at < %s", (exported_at - WATERMARK_OVERLAP,))
+        return cursor.rowcount
+
+def load_export_state(path):
+    """State recorded by the previous export ({'exported_at': snapshot time}), or None before the first one"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_export_state(path, state):
+    """Write the export state atomically so an interrupted export keeps the previous one"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+class JsonArrayWriter:
+    """
+    Writes a JSON array one element at a time
+
+    The output is byte-for-byte what json.dump(items, f, indent=2) would write,
+    without holding the items in memory. With depth, the array is written as if
+    nested that many levels deep in an indented document.
+    """
+
+    def __init__(self, f, ensure_ascii=False, depth=0):
+        self.f = f
+        self.ensure_ascii = ensure_ascii
+        self.indent = '\n' + '  ' * depth
+        self.count = 0
+
+    def write(self, item):
+        chunk = json.dumps(item, indent=2, ensure_ascii=self.ensure_ascii).replace('\n', self.indent + '  ')
+        self.f.write(('[' if self.count == 0 else ',') + self.indent + '  ' + chunk)
+        self.count += 1
+
+    def close(self):
+        self.f.write(self.indent + ']' if self.count else '[]')
+
+class NdjsonWriter:
+    """Writes one JSON object per line"""
+
+    def __init__(self, f, ensure_ascii=False):
+        self.f = f
+        self.ensure_ascii = ensure_ascii
+        self.count = 0
+
+    def write(self, item):
+        self.f.write(json.dumps(item, ensure_ascii=self.ensure_ascii) + '\n')
+        self.count += 1
+
+    def close(self):
+        pass
+
+# seeds.rb loads the exported files instead of inlining them, inserting each table in
+# batches with insert_all (no per-row model instantiation, validations or INSERTs)
+SEEDS_RB = '''# -*- coding: utf-8 -*-
 
-    seeds_content = f'''# -*- coding: utf-8 -*-
 # Taco Price Index - Seed Data
 # Real San Antonio taco data for development
+#
+# Generated by data_collection/export_to_rails_seeds.py. Rows are loaded from the
+# exported files in db/seeds/ and inserted with insert_all, SEED_BATCH_SIZE rows
+# (default 1000) per statement, in foreign key order.
+
+User.find_or_create_by(email_address: "user@example.com") do |u|
+  puts "Creating user with email: #{u.email_address}"
+  u.password = "password"
+  u.password_confirmation = "password"
+end
 
-puts "🌮 Seeding Taco Price Index database..."
-
-# Clear existing data
-Review.destroy_all if defined?(Review)
-Photo.destroy_all if defined?(Photo)
-Taco.destroy_all if defined?(Taco)
-Restaurant.destroy_all if defined?(Restaurant)
+seeds_dir = Rails.root.join("db", "seeds")
+batch_size = Integer(ENV.fetch("SEED_BATCH_SIZE", "1000"))
 
-puts "🏪 Creating restaurants..."
-restaurants_data = {to_ruby_json(restaurants)}
+# Records for a table from its exported .json array or .ndjson lines (whichever is newer)
+load_records = lambda do |table|
+  path = [ seeds_dir.join("#{table}.json"), seeds_dir.join("#{table}.ndjson") ]
+    .select(&:exist?).max_by(&:mtime)
+  next [] unless path
 
-restaurants_data.each do |attrs|
-  Restaurant.create!(attrs.except('created_at', 'updated_at'))
+  if path.extname == ".ndjson"
+    path.each_line.reject(&:blank?).map { |line| JSON.parse(line) }
+  else
+    JSON.parse(path.read)
+  end
 end
 
-puts "✅ Created #{{Restaurant.count}} restaurants"
-
-puts "🌮 Creating tacos..."
-tacos_data = {to_ruby_json(tacos)}
-
-tacos_data.each do |attrs|
-  Taco.create!(attrs.except('created_at', 'updated_at'))
+insert_records = lambda do |model, table|
+  columns = model.column_names - %w[created_at updated_at]
+  load_records.call(table).each_slice(batch_size) do |batch|
+    model.insert_all(batch.map { |attrs| attrs.slice(*columns) })
+  end
 end
 
-puts "✅ Created #{{Taco.count}} tacos"
+if Rails.env.development? && Restaurant.count.zero? && Photo.count.zero? && Review.count.zero? && Taco.count.zero?
+  puts "🌮 Seeding Taco Price Index database with test data..."
 
-puts "📸 Creating photos..."
-photos_data = {to_ruby_json(photos)}
+  ActiveRecord::Base.transaction do
+    puts "🏪 Creating restaurants..."
+    insert_records.call(Restaurant, "restaurants")
+    puts "✅ Created #{Restaurant.count} restaurants"
 
-photos_data.each do |attrs|
-  Photo.create!(attrs.except('created_at', 'updated_at'))
-end
+    puts "🌮 Creating tacos..."
+    insert_records.call(Taco, "tacos")
+    puts "✅ Created #{Taco.count} tacos"
 
-puts "✅ Created #{{Photo.count}} photos"
+    puts "📸 Creating photos..."
+    insert_records.call(Photo, "photos")
+    puts "✅ Created #{Photo.count} photos"
 
-puts "⭐ Creating reviews..."
-if defined?(Review)
-  reviews_data = {to_ruby_json(reviews)}
-  
-  reviews_data.each do |attrs|
-    attrs['review_date'] = DateTime.parse(attrs['review_date']) if attrs['review_date']
-    Review.create!(attrs.except('created_at', 'updated_at'))
+    puts "⭐ Creating reviews..."
+    insert_records.call(Review, "reviews")
+    puts "✅ Created #{Review.count} reviews"
   end
-  
-  puts "✅ Created #{{Review.count}} reviews"
-else
-  puts "⚠️  Review model not found, skipping reviews"
-end
 
-puts "🎉 Database seeding complete!"
-puts "📊 Summary: #{{Restaurant.count}} restaurants, #{{Taco.count}} tacos, #{{Photo.count}} photos, #{{Review.count if defined?(Review)}} reviews"
+  puts "🎉 Database seeding complete!"
+  puts "📊 Summary: #{Restaurant.count} restaurants, #{Taco.count} tacos, #{Photo.count} photos, #{Review.count} reviews"
+end
 '''
 
-    return seeds_content
+def create_rails_seeds_rb():
+    """Create Rails seeds.rb file"""
+    return SEEDS_RB
+
+def export_table(conn, table, data_file, output_format='json', itersize=2000, columnar_writer=None):
+    """
+    Stream one table into its data file (and optionally a Parquet / Arrow file)
+
+    Args:
+        conn: Database connection (not in autocommit mode)
+        table: Table name
+        data_file: Open file for the table's JSON array (or NDJSON lines)
+        output_format: 'json' for a JSON array, 'ndjson' for one object per line
+        itersize: Rows fetched from the server per round trip
+        columnar_writer: Optional columnar.ColumnarWriter receiving the same records
+
+    Returns:
+        Number of rows exported
+    """
+    if output_format == 'ndjson':
+        data_writer = NdjsonWriter(data_file)
+    else:
+        data_writer = JsonArrayWriter(data_file)
+
+    for record in iter_table_records(conn, table, itersize):
+        data_writer.write(record)
+        if columnar_writer:
+            columnar_writer.write(record)
+
+    data_writer.close()
+    if columnar_writer:
+        columnar_writer.close()
+    return data_writer.count
+
+def export_table_file(conn, table, data_path, output_format='json', itersize=2000,
+                      columnar_path=None, columnar_format='parquet'):
+    """Export one table to its data file, and to columnar_path if given; returns the row count"""
+    columnar_writer = None
+    if columnar_path:
+        columnar_writer = ColumnarWriter(columnar_path, seed_schemas()[table], columnar_format)
+    with open(data_path, "w", encoding='utf-8') as data_file:
+        return export_table(conn, table, data_file, output_format=output_format, itersize=itersize,
+                            columnar_writer=columnar_writer)
+
+def export_table_worker(table, snapshot_id, data_path, output_format='json', itersize=2000,
+                        columnar_path=None, columnar_format='parquet'):
+    """
+    Export one table in a worker process, reading from the coordinator's snapshot
+
+    Each worker checks out its own connection and imports the exported snapshot,
+    so every table sees exactly the same database state.
+    """
+    conn = get_pool().getconn(autocommit=False)
+    try:
+        conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+        with conn.cursor() as cursor:
+            cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot_id,))
+        count = export_table_file(conn, table, data_path, output_format, itersize, columnar_path, columnar_format)
+        conn.rollback()
+        conn.set_session(isolation_level='DEFAULT', readonly='DEFAULT')
+        return count
+    finally:
+        get_pool().putconn(conn)
+        close_pool()
+
+def export_full(conn, snapshot_id, seeds_dir, seeds_file, output_format='json', itersize=2000, workers=4,
+                columnar_dir=None, columnar_format='parquet', profiler=None):
+    """
+    Export every table to db/seeds and write seeds.rb
+
+    With columnar_dir, each table is also written there as a typed Parquet or Arrow file.
+    With a profiler (profiler.StageProfiler), each table is a stage; profile with workers=1
+    so the tables are exported in this process.
+
+    Returns:
+        Dict of row counts per table
+    """
+    extension = 'ndjson' if output_format == 'ndjson' else 'json'
+    paths = {table: f"{seeds_dir}/{table}.{extension}" for table, _ in EXPORT_TABLES}
+    columnar_paths = {table: None for table, _ in EXPORT_TABLES}
+    if columnar_dir:
+        os.makedirs(columnar_dir, exist_ok=True)
+        columnar_paths = {table: os.path.join(columnar_dir, f"{table}.{EXTENSIONS[columnar_format]}")
+                          for table, _ in EXPORT_TABLES}
+
+    print(f"📦 Exporting all data ({workers} workers)...")
+    counts = {}
+    if workers > 1:
+        # Spawned workers open their own connections instead of inheriting this process's sockets
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {table: executor.submit(export_table_worker, table, snapshot_id, paths[table],
+                                              output_format, itersize, columnar_paths[table], columnar_format)
+                       for table, _ in EXPORT_TABLES}
+            for table, future in futures.items():
+                counts[table] = future.result()
+                print(f"📝 Exported {table}")
+    else:
+        for table, _ in EXPORT_TABLES:
+            print(f"📝 Streaming {table}...")
+            with profiler.stage(f"export_{table}") if profiler else nullcontext():
+                counts[table] = export_table_file(conn, table, paths[table], output_format, itersize,
+                                                  columnar_paths[table], columnar_format)
+
+    print("🛤️  Creating Rails seeds.rb...")
+    with open(seeds_file, "w", encoding='utf-8') as f:
+        f.write(create_rails_seeds_rb())
+
+    # Remove files left over from an export in the other format
+    stale_extension = 'json' if extension == 'ndjson' else 'ndjson'
+    for table, _ in EXPORT_TABLES:
+        if os.path.exists(f"{seeds_dir}/{table}.{stale_extension}"):
+            os.remove(f"{seeds_dir}/{table}.{stale_extension}")
+
+    return counts
+
+def export_delta(conn, previous_state, deltas_dir, itersize=2000):
+    """
+    Stream the rows changed since the previous export, and the ids deleted since then, to a delta file
+
+    The file holds what json.dump(delta, indent=2) would write for
+    {'generated_at': ..., 'tables': {table: {'upserts': [...], 'deletes': [...]}}},
+    written one record at a time. Deletes come from the collector_deleted_rows log.
+
+    Args:
+        conn: Connection inside the export snapshot
+        previous_state: State saved by the previous export (None exports every row and no deletes)
+        deltas_dir: Directory for delta files
+        itersize: Rows fetched from the server per round trip
+
+    Returns:
+        (path of the delta file or None if nothing changed, dict of (upserts, deletes) counts per table)
+    """
+    since = None
+    if previous_state and previous_state.get('exported_at'):
+        since = datetime.fromisoformat(previous_state['exported_at']) - WATERMARK_OVERLAP
+
+    os.makedirs(deltas_dir, exist_ok=True)
+    path = os.path.join(deltas_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    # Written under a name seeds:apply_deltas ignores until it is complete
+    tmp_path = f"{path}.tmp"
+    counts = {}
+    try:
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            f.write('{\n  "generated_at": ' + json.dumps(datetime.now().isoformat()) + ',\n  "tables": {')
+            for i, (table, _) in enumerate(EXPORT_TABLES):
+                f.write((',' if i else '') + f'\n    {json.dumps(table)}: {{\n      "upserts": ')
+                upserts = JsonArrayWriter(f, depth=3)
+                for record in iter_table_records(conn, table, itersize, since=since):
+                    upserts.write(record)
+                upserts.close()
+
+                f.write(',\n      "deletes": ')
+                deletes = JsonArrayWriter(f, depth=3)
+                if since is not None:
+                    for deleted_id in iter_deleted_ids(conn, table, since, itersize):
+                        deletes.write(deleted_id)
+                deletes.close()
+
+                f.write('\n    }')
+                counts[table] = (upserts.count, deletes.count)
+            f.write('\n  }\n}')
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    if not any(upserts or deletes for upserts, deletes in counts.values()):
+        os.remove(tmp_path)
+        return None, counts
+
+    os.replace(tmp_path, path)
+    return path, counts
+
+def prune_export_log(exported_at):
+    """Prune the deletion log once the export state that makes its old entries unnecessary is saved"""
+    with get_pool().connection() as conn:
+        pruned = prune_deleted_rows(conn, exported_at)
+    if pruned:
+        print(f"🧹 Pruned {pruned} entries from the deletion log")
 
 def main():
     """Export data from populated container to Rails seeds"""
+    parser = argparse.ArgumentParser(description="Export the collected data to Rails seeds")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profile each stage (cProfile, sampled stacks for flamegraphs, tracemalloc); "
+                             "tables are exported in this process")
+    parser.add_argument('--profile-dir', default='profiles', help="Where --profile writes its files")
+    args = parser.parse_args()
+
     print("🚀 Creating Rails seed dump from populated database...")
 
     # Determine paths
@@ -167,40 +505,78 @@ def main():
     os.makedirs(seeds_dir, exist_ok=True)
 
     # Connect and export
-    conn = connect_to_db()
-    cursor = conn.cursor()
+    load_dotenv()
+    export_mode = os.getenv("EXPORT_MODE", "full").lower()
+    output_format = os.getenv("EXPORT_FORMAT", "json").lower()
+    itersize = int(os.getenv("EXPORT_ITERSIZE", "2000"))
+    workers = int(os.getenv("EXPORT_WORKERS", str(len(EXPORT_TABLES))))
+    profiler = StageProfiler(args.profile_dir, run_name='export') if args.profile else None
+    if profiler:
+        # Worker processes are invisible to the profiler
+        workers = 1
+        profiler.start()
+    stage = profiler.stage if profiler else lambda name: nullcontext()
+    # Optional typed columnar copy of the export ("parquet" or "arrow") for analysis
+    columnar_format = os.getenv("EXPORT_COLUMNAR", "").lower() or None
+    columnar_dir = os.getenv("EXPORT_COLUMNAR_DIR",
+                             os.path.join(os.path.dirname(os.path.abspath(__file__)), "exports"))
+    state_path = os.getenv("EXPORT_STATE_PATH",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), ".export_state.json"))
+
+    # The deletion log delta exports read is created by a schema migration
+    with get_pool().connection() as migrate_conn:
+        migrate(migrate_conn)
+
+    # One read-only snapshot for the whole export, shared with the workers, keeps foreign keys consistent
+    conn = get_pool().getconn(autocommit=False)
 
     try:
-        print("📦 Exporting all data...")
-        restaurants, tacos, photos, reviews = export_all_data(cursor)
-
-        print("📝 Creating JSON files...")
-        # Save individual JSON files
-        with open(f"{seeds_dir}/restaurants.json", "w", encoding='utf-8') as f:
-            json.dump(restaurants, f, indent=2, ensure_ascii=False)
-
-        with open(f"{seeds_dir}/tacos.json", "w", encoding='utf-8') as f:
-            json.dump(tacos, f, indent=2, ensure_ascii=False)
-
-        with open(f"{seeds_dir}/photos.json", "w", encoding='utf-8') as f:
-            json.dump(photos, f, indent=2, ensure_ascii=False)
-
-        with open(f"{seeds_dir}/reviews.json", "w", encoding='utf-8') as f:
-            json.dump(reviews, f, indent=2, ensure_ascii=False)
-
-        print("🛤️  Creating Rails seeds.rb...")
-        # Create seeds.rb
-        seeds_content = create_rails_seeds_rb(restaurants, tacos, photos, reviews)
-        with open(seeds_file, "w", encoding='utf-8') as f:
-            f.write(seeds_content)
+        conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_export_snapshot(), now()")
+            snapshot_id, exported_at = cursor.fetchone()
+
+        # The snapshot's time is where the next delta export picks up
+        new_state = {'exported_at': exported_at.isoformat()}
+
+        if export_mode == 'delta':
+            previous_state = load_export_state(state_path)
+            if previous_state is not None and 'exported_at' not in previous_state:
+                print("⚠️  Export state is from an older exporter version, ignoring it")
+                previous_state = None
+            if previous_state is None:
+                print("⚠️  No previous export state found, the delta will contain every row")
+
+            print("📦 Exporting changes since the last export...")
+            with stage('export_delta'):
+                delta_path, delta_counts = export_delta(conn, previous_state, f"{seeds_dir}/deltas", itersize)
+            save_export_state(state_path, new_state)
+            prune_export_log(exported_at)
+
+            if delta_path is None:
+                print("✅ No changes since the last export")
+            else:
+                print("✅ Delta export complete!")
+                print(f"📁 Created: {delta_path}")
+                for table, (upserts, deletes) in delta_counts.items():
+                    print(f"   • {table}: {upserts} changed, {deletes} deleted")
+                print("\n🚀 Apply it with: bin/rails seeds:apply_deltas")
+            return
+
+        if columnar_format:
+            require_pyarrow()
+        counts = export_full(conn, snapshot_id, seeds_dir, seeds_file, output_format, itersize, workers,
+                             columnar_dir if columnar_format else None, columnar_format or 'parquet', profiler)
+        save_export_state(state_path, new_state)
+        prune_export_log(exported_at)
 
         print("✅ Export complete!")
         print(f"📁 Created:")
         print(f"   • {seeds_file}")
-        print(f"   • {len(restaurants)} restaurants")
-        print(f"   • {len(tacos)} tacos")
-        print(f"   • {len(photos)} photos")
-        print(f"   • {len(reviews)} reviews")
+        print(f"   • {counts['restaurants']} restaurants")
+        print(f"   • {counts['tacos']} tacos")
+        print(f"   • {counts['photos']} photos")
+        print(f"   • {counts['reviews']} reviews")
         print("\n🚀 Other developers can now run: rails db:seed")
 
     except Exception as e:
@@ -208,8 +584,13 @@ def main():
         import traceback
         traceback.print_exc()
     finally:
-        cursor.close()
-        conn.close()
+        if not conn.closed:
+            conn.rollback()
+            conn.set_session(isolation_level='DEFAULT', readonly='DEFAULT')
+        get_pool().putconn(conn)
+        close_pool()
+        if profiler:
+            print(f"🔬 Profiles written to {profiler.finish()}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
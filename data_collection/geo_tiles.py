@@ -0,0 +1,137 @@
+"""
+Geometry helpers for tiling a search area into Nearby Search queries
+
+A tile is a lat/lng bounding box. Each tile is searched with a circle centred on
+the tile that just covers its corners, and tiles whose search is truncated are
+split into four children (a quadtree).
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+EARTH_RADIUS_METERS = 6371000
+
+# Largest radius the Nearby Search API accepts
+MAX_SEARCH_RADIUS_METERS = 50000
+
+LatLng = Tuple[float, float]
+
+
+def haversine_meters(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in meters"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
+
+
+def make_tile(south: float, west: float, north: float, east: float) -> Dict:
+    """Build a tile dict with its center and covering search radius"""
+    center_lat = (south + north) / 2
+    center_lng = (west + east) / 2
+    radius = math.ceil(haversine_meters(center_lat, center_lng, north, east))
+    return {
+        'south': south, 'west': west, 'north': north, 'east': east,
+        'lat': center_lat, 'lng': center_lng, 'radius': radius,
+    }
+
+
+def tile_key(tile: Dict) -> Tuple[float, float, float, float]:
+    """Stable key for a tile, used to avoid fetching the same tile twice"""
+    return (round(tile['south'], 6), round(tile['west'], 6), round(tile['north'], 6), round(tile['east'], 6))
+
+
+def split_tile(tile: Dict) -> List[Dict]:
+    """Split a tile into its four quadrants"""
+    mid_lat, mid_lng = tile['lat'], tile['lng']
+    return [
+        make_tile(tile['south'], tile['west'], mid_lat, mid_lng),
+        make_tile(tile['south'], mid_lng, mid_lat, tile['east']),
+        make_tile(mid_lat, tile['west'], tile['north'], mid_lng),
+        make_tile(mid_lat, mid_lng, tile['north'], tile['east']),
+    ]
+
+
+def grid_tiles(south: float, west: float, north: float, east: float, max_radius: float) -> List[Dict]:
+    """
+    Cover a bounding box with a grid of equal tiles
+
+    Args:
+        south, west, north, east: Bounding box in degrees
+        max_radius: Largest covering search radius allowed for a tile, in meters
+
+    Returns:
+        List of tiles whose search circles are no larger than max_radius
+    """
+    max_radius = min(max_radius, MAX_SEARCH_RADIUS_METERS)
+    rows = cols = 1
+    while True:
+        tile = make_tile(south, west, south + (north - south) / rows, west + (east - west) / cols)
+        if tile['radius'] <= max_radius:
+            break
+        # Split along whichever side is longer
+        height = haversine_meters(tile['south'], tile['lng'], tile['north'], tile['lng'])
+        width = haversine_meters(tile['lat'], tile['west'], tile['lat'], tile['east'])
+        if height >= width:
+            rows += 1
+        else:
+            cols += 1
+
+    lat_step = (north - south) / rows
+    lng_step = (east - west) / cols
+    return [
+        make_tile(south + r * lat_step, west + c * lng_step, south + (r + 1) * lat_step, west + (c + 1) * lng_step)
+        for r in range(rows) for c in range(cols)
+    ]
+
+
+def polygon_bounds(polygon: List[LatLng]) -> Tuple[float, float, float, float]:
+    """Bounding box (south, west, north, east) of a polygon given as (lat, lng) vertices"""
+    lats = [lat for lat, _ in polygon]
+    lngs = [lng for _, lng in polygon]
+    return min(lats), min(lngs), max(lats), max(lngs)
+
+
+def point_in_polygon(lat: float, lng: float, polygon: List[LatLng]) -> bool:
+    """Ray-casting point in polygon test"""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lng_i = polygon[i]
+        lat_j, lng_j = polygon[j]
+        if (lat_i > lat) != (lat_j > lat):
+            crossing_lng = lng_i + (lat - lat_i) * (lng_j - lng_i) / (lat_j - lat_i)
+            if lng < crossing_lng:
+                inside = not inside
+        j = i
+    return inside
+
+
+def _segments_intersect(p1: LatLng, p2: LatLng, q1: LatLng, q2: LatLng) -> bool:
+    def orientation(a, b, c):
+        value = (b[1] - a[1]) * (c[0] - b[0]) - (b[0] - a[0]) * (c[1] - b[1])
+        return (value > 0) - (value < 0)
+
+    o1, o2 = orientation(p1, p2, q1), orientation(p1, p2, q2)
+    o3, o4 = orientation(q1, q2, p1), orientation(q1, q2, p2)
+    return o1 != o2 and o3 != o4
+
+
+def tile_intersects_polygon(tile: Dict, polygon: Optional[List[LatLng]]) -> bool:
+    """Whether any part of a tile lies inside the polygon (always True without a polygon)"""
+    if not polygon:
+        return True
+
+    corners = [(tile['south'], tile['west']), (tile['south'], tile['east']),
+               (tile['north'], tile['east']), (tile['north'], tile['west'])]
+
+    if any(point_in_polygon(lat, lng, polygon) for lat, lng in corners):
+        return True
+
+    if any(tile['south'] <= lat <= tile['north'] and tile['west'] <= lng <= tile['east'] for lat, lng in polygon):
+        return True
+
+    tile_edges = list(zip(corners, corners[1:] + corners[:1]))
+    polygon_edges = list(zip(polygon, polygon[1:] + polygon[:1]))
+    return any(_segments_intersect(a1, a2, b1, b2) for a1, a2 in tile_edges for b1, b2 in polygon_edges)
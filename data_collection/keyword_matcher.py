@@ -0,0 +1,162 @@
+"""
+Compiled keyword matching for candidate filtering and mention extraction
+
+All keywords are folded into one case-insensitive regular expression, so each
+text is scanned once however many keywords there are. Keywords only match whole
+words (so 'el' no longer matches inside 'hotel'), an optional trailing 's' is
+accepted ('taco' matches 'tacos'), and spaces, hyphens and underscores are
+interchangeable ('tex mex' matches 'tex-mex', 'meal takeaway' matches the
+Google type 'meal_takeaway').
+
+Each keyword's path through the pattern ends in an empty named group, so a
+match names its keyword directly. Mapping the matched text back to a keyword
+would fail on spellings that only match case-insensitively, such as 'MEXİCAN'
+or 'CLAſS', whose lower-case forms differ from the keyword's.
+"""
+
+import re
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+_SEPARATORS = re.compile(r'[\s_\-]+')
+
+
+def normalize_keyword(text: str) -> str:
+    """Lower-case text and collapse separator runs to single spaces"""
+    return _SEPARATORS.sub(' ', text.strip().lower())
+
+
+def _group_name(index: int) -> str:
+    return f"k{index}"
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    Regex alternation for normalized keywords, factored into a character trie
+
+    Python's regex engine tries alternatives one by one, so sharing prefixes
+    ('taco', 'taqueria', 'tamale' -> 'ta(?:co|queria|male)') keeps matching fast
+    with hundreds of keywords. The end of the i-th keyword is marked with an
+    empty group named _group_name(i), which becomes the match's lastgroup.
+    """
+    trie: Dict = {}
+    for index, keyword in enumerate(keywords):
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = index  # end of keyword
+
+    def build(node: Dict) -> str:
+        # Longer continuations first, so a phrase wins over a keyword it starts with
+        branches = [(r'[\s_\-]+' if char == ' ' else re.escape(char)) + build(child)
+                    for char, child in node.items() if char]
+        if '' in node:
+            branches.append(f"(?P<{_group_name(node[''])}>)")
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Compile a matcher for a list of keywords or phrases
+
+        Args:
+            keywords: Keywords to match; duplicates after normalization are merged
+        """
+        self.keywords: List[str] = []
+        self._canonical: Dict[str, str] = {}
+        for keyword in keywords:
+            normalized = normalize_keyword(keyword)
+            if normalized and normalized not in self._canonical:
+                self._canonical[normalized] = keyword
+                self.keywords.append(keyword)
+
+        # Group name marking the end of a keyword in the pattern -> keyword
+        self._by_group: Dict[str, str] = {_group_name(index): keyword for index, keyword in enumerate(self.keywords)}
+
+        if not self._canonical:
+            self.pattern = None
+            return
+
+        body = _trie_pattern(self._canonical)
+        self.pattern = re.compile(rf'(?<![^\W_])(?:{body})s?(?![^\W_])', re.IGNORECASE)
+
+    def find_all(self, text: str) -> List[str]:
+        """
+        Keywords that occur in text, each listed once, in order of first occurrence
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            List of matched keywords as they were given to the matcher
+        """
+        if not self.pattern or not text:
+            return []
+
+        found = {}
+        for match in self.pattern.finditer(text):
+            found.setdefault(self._by_group[match.lastgroup], None)
+        return list(found)
+
+    def count(self, text: str) -> int:
+        """Number of distinct keywords that occur in text"""
+        return len(self.find_all(text))
+
+    def match_pairs(self, texts: pd.Series) -> pd.DataFrame:
+        """
+        Distinct (text, keyword) matches for a whole Series, found in one regex pass
+
+        The texts are joined and scanned together and matches are mapped back to
+        their texts with NumPy, avoiding a regex call per element.
+
+        Args:
+            texts: Series of strings
+
+        Returns:
+            DataFrame with 'row' (position in texts) and 'keyword' columns, one row per
+            distinct keyword found in each text
+        """
+        values = texts.fillna('').astype(str).tolist()
+        if self.pattern is None or not values:
+            return pd.DataFrame({'row': np.array([], dtype='int64'), 'keyword': []})
+
+        # NUL is neither a word character nor a phrase separator, so no match spans two texts
+        joined = '\x00'.join(values)
+        offsets = np.cumsum([0] + [len(value) + 1 for value in values[:-1]])
+
+        match_starts = []
+        matched_groups = []
+        for match in self.pattern.finditer(joined):
+            match_starts.append(match.start())
+            matched_groups.append(match.lastgroup)
+
+        rows = np.searchsorted(offsets, np.array(match_starts, dtype='int64'), side='right') - 1
+
+        # Resolve each distinct group to its keyword once, then dedupe (row, keyword) pairs
+        group_codes, groups = pd.factorize(pd.Series(matched_groups, dtype='object'))
+        keywords = pd.Series([self._by_group[group] for group in groups], dtype='object')
+        pairs = pd.DataFrame({'row': rows, 'keyword': keywords.to_numpy()[group_codes]})
+        return pairs.drop_duplicates(ignore_index=True)
+
+    def count_series(self, texts: pd.Series) -> pd.Series:
+        """
+        Number of distinct keywords in each text of a Series
+
+        Gives the same result as calling count() on every element, with a single regex pass.
+
+        Args:
+            texts: Series of strings
+
+        Returns:
+            Series of int counts aligned with texts
+        """
+        pairs = self.match_pairs(texts)
+        counts = np.bincount(pairs['row'].to_numpy(dtype='int64'), minlength=len(texts))
+        return pd.Series(counts, index=texts.index, dtype='int64')
@@ -0,0 +1,275 @@
+"""
+Run metrics for the collector
+
+RunMetrics records where a run spends its time and what it costs:
+
+- stage timers (search, filter, details, extraction, db_write, save)
+- per-endpoint API latency histograms, response status tallies and bytes downloaded
+- rows written per table and time spent writing to the database
+- free-form counters (places processed, cache hits, throttles, ...)
+
+At the end of a run the metrics are written as a JSON report and, optionally,
+as a Prometheus textfile for node_exporter's textfile collector, so throughput
+and quota usage can be compared run over run. Everything is thread-safe; the
+details fetchers record from worker threads.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the API latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_PREFIX = 'taco_collector'
+
+
+def _labels(labels: Dict) -> str:
+    if not labels:
+        return ''
+    escaped = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{key}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _write_atomic(path: str, text: str):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class RunMetrics:
+    def __init__(self, run_name: str = 'collector', profiler=None):
+        """
+        Start collecting metrics for one run
+
+        Args:
+            run_name: Name recorded in the report and as the Prometheus 'run' label
+            profiler: Optional profiler.StageProfiler that also profiles every stage (--profile)
+        """
+        self.run_name = run_name
+        self.profiler = profiler
+        self.started_at = datetime.now()
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.requests: Dict[str, Dict] = {}
+        self.statuses: Dict[Tuple[str, int, str], int] = {}
+        self.rows_written: Dict[str, int] = {}
+        self.db_seconds = 0.0
+        self.db_flushes = 0
+        self.bytes_downloaded = 0
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+
+    def add_stage_time(self, stage: str, seconds: float, calls: int = 1):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {'calls': 0, 'seconds': 0.0})
+            entry['calls'] += calls
+            entry['seconds'] += seconds
+
+    def profile(self, name: str):
+        """Context manager profiling a block as a stage when profiling is on, without timing it"""
+        return self.profiler.stage(name) if self.profiler else nullcontext()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block of work as one call of a stage"""
+        start = time.monotonic()
+        try:
+            with self.profile(name):
+                yield
+        finally:
+            self.add_stage_time(name, time.monotonic() - start)
+
+    def timed_iter(self, name: str, iterable: Iterable) -> Iterator:
+        """
+        Yield from iterable, charging the time spent waiting for each item to a stage
+
+        Useful for generators such as iter_place_details, whose work happens
+        between the consumer's steps.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.monotonic()
+            try:
+                with self.profile(name):
+                    item = next(iterator)
+            except StopIteration:
+                self.add_stage_time(name, time.monotonic() - start, calls=0)
+                return
+            self.add_stage_time(name, time.monotonic() - start)
+            yield item
+
+    def observe_request(self, endpoint: str, seconds: float, http_status: int,
+                        api_status: Optional[str] = None, response_bytes: int = 0):
+        """
+        Record one API request
+
+        Args:
+            endpoint: Endpoint name (e.g. 'place/details')
+            seconds: Time from sending the request to having the response body
+            http_status: HTTP status code
+            api_status: The 'status' field of the JSON body, if any
+            response_bytes: Size of the response body
+        """
+        with self._lock:
+            entry = self.requests.setdefault(endpoint, {
+                'count': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'buckets': [0] * len(LATENCY_BUCKETS)
+            })
+            entry['count'] += 1
+            entry['seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    entry['buckets'][i] += 1
+                    break
+
+            key = (endpoint, http_status, api_status or '')
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+            self.bytes_downloaded += response_bytes
+
+    def observe_db_write(self, seconds: float, rows_by_table: Dict[str, int]):
+        """Record one database flush and the rows it wrote per table"""
+        with self._lock:
+            self.db_seconds += seconds
+            self.db_flushes += 1
+            for table, count in rows_by_table.items():
+                self.rows_written[table] = self.rows_written.get(table, 0) + count
+        self.add_stage_time('db_write', seconds)
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        """Add to a free-form counter, e.g. increment('cache_hits', endpoint='place/details')"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def _percentile(self, entry: Dict, fraction: float) -> Optional[float]:
+        # Upper bound of the bucket holding the given fraction of requests
+        target = entry['count'] * fraction
+        running = 0
+        for bound, count in zip(LATENCY_BUCKETS, entry['buckets']):
+            running += count
+            if running >= target:
+                return bound
+        return None  # Beyond the largest bucket
+
+    def report(self) -> Dict:
+        """The metrics as a JSON-serializable dict"""
+        duration = time.monotonic() - self._start
+        with self._lock:
+            endpoints = {}
+            for endpoint, entry in self.requests.items():
+                endpoints[endpoint] = {
+                    'requests': entry['count'],
+                    'seconds_total': round(entry['seconds'], 4),
+                    'seconds_mean': round(entry['seconds'] / entry['count'], 4) if entry['count'] else None,
+                    'seconds_max': round(entry['max_seconds'], 4),
+                    'seconds_p50_bucket': self._percentile(entry, 0.5),
+                    'seconds_p95_bucket': self._percentile(entry, 0.95),
+                    'histogram': {str(bound): count for bound, count in zip(LATENCY_BUCKETS, entry['buckets'])},
+                    'statuses': {f"{http_status} {api_status}".strip(): count
+                                 for (status_endpoint, http_status, api_status), count in sorted(self.statuses.items())
+                                 if status_endpoint == endpoint},
+                }
+
+            counters = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                key = name + ''.join(f"[{label}={value_}]" for label, value_ in labels)
+                counters[key] = value
+
+            rows_total = sum(self.rows_written.values())
+            return {
+                'run': self.run_name,
+                'started_at': self.started_at.isoformat(),
+                'finished_at': datetime.now().isoformat(),
+                'duration_seconds': round(duration, 3),
+                'stages': {name: {'calls': int(entry['calls']), 'seconds': round(entry['seconds'], 4)}
+                           for name, entry in self.stages.items()},
+                'api': endpoints,
+                'api_requests_total': sum(entry['count'] for entry in self.requests.values()),
+                'bytes_downloaded': self.bytes_downloaded,
+                'db': {
+                    'flushes': self.db_flushes,
+                    'seconds': round(self.db_seconds, 4),
+                    'rows_written': dict(self.rows_written),
+                    'rows_per_second': round(rows_total / self.db_seconds, 1) if self.db_seconds else None,
+                },
+                'counters': counters,
+            }
+
+    def write_json(self, path: str) -> Dict:
+        """Write the JSON run report; returns the report"""
+        report = self.report()
+        _write_atomic(path, json.dumps(report, indent=2) + '\n')
+        logger.info(f"Wrote run metrics to {path}")
+        return report
+
+    def prometheus_text(self) -> str:
+        """The metrics in the Prometheus text exposition format"""
+        run = {'run': self.run_name}
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict, float]], suffix: str = ''):
+            full_name = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{full_name}{suffix}{_labels({**run, **labels})} {value}")
+
+        with self._lock:
+            metric('run_duration_seconds', 'gauge', 'Wall time of the run.',
+                   [({}, round(time.monotonic() - self._start, 3))])
+            metric('run_timestamp_seconds', 'gauge', 'Unix time the run started.',
+                   [({}, int(self.started_at.timestamp()))])
+            metric('stage_seconds', 'gauge', 'Time spent per pipeline stage.',
+                   [({'stage': name}, round(entry['seconds'], 4)) for name, entry in self.stages.items()])
+            metric('stage_calls', 'gauge', 'Calls per pipeline stage.',
+                   [({'stage': name}, int(entry['calls'])) for name, entry in self.stages.items()])
+
+            full_name = f"{PROMETHEUS_PREFIX}_api_request_duration_seconds"
+            lines.append(f"# HELP {full_name} Places API request latency per endpoint.")
+            lines.append(f"# TYPE {full_name} histogram")
+            for endpoint, entry in self.requests.items():
+                running = 0
+                for bound, count in zip(LATENCY_BUCKETS, entry['buckets']):
+                    running += count
+                    lines.append(f"{full_name}_bucket{_labels({**run, 'endpoint': endpoint, 'le': bound})} {running}")
+                lines.append(f"{full_name}_bucket{_labels({**run, 'endpoint': endpoint, 'le': '+Inf'})} {entry['count']}")
+                lines.append(f"{full_name}_sum{_labels({**run, 'endpoint': endpoint})} {round(entry['seconds'], 4)}")
+                lines.append(f"{full_name}_count{_labels({**run, 'endpoint': endpoint})} {entry['count']}")
+
+            metric('api_responses', 'gauge', 'Places API responses by HTTP and API status.',
+                   [({'endpoint': endpoint, 'http_status': http_status, 'api_status': api_status}, count)
+                    for (endpoint, http_status, api_status), count in sorted(self.statuses.items())])
+            metric('bytes_downloaded', 'gauge', 'Bytes of API responses downloaded.',
+                   [({}, self.bytes_downloaded)])
+            metric('rows_written', 'gauge', 'Rows written to the database per table.',
+                   [({'table': table}, count) for table, count in self.rows_written.items()])
+            metric('db_write_seconds', 'gauge', 'Time spent flushing rows to the database.',
+                   [({}, round(self.db_seconds, 4))])
+
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                metric(name, 'gauge', f"Run counter {name}.",
+                       [(dict(labels), value) for (counter_name, labels), value in sorted(self.counters.items())
+                        if counter_name == name])
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """Write a Prometheus textfile (atomically, as the textfile collector requires)"""
+        _write_atomic(path, self.prometheus_text())
+        logger.info(f"Wrote Prometheus metrics to {path}")
@@ -0,0 +1,382 @@
+"""
+Local, content-addressed store for Google Places photos
+
+The collector saves photos as Places Photo API URLs with the API key embedded,
+so every page view cost a Places Photo call. This stage downloads each
+referenced photo once, stores it on disk under its SHA-256 digest (identical
+photos are kept once), writes the resized copies the app serves, and rewrites
+photos.url to the local path.
+
+Layout under the store root (served by Rails from public/photos by default):
+
+    ab/cd/abcd...ef.jpg           original
+    ab/cd/abcd...ef_thumb.jpg     one file per configured size (needs Pillow)
+    index.jsonl                   photo_reference -> digest, so stored photos are never refetched
+
+Downloads go through the same token-bucket rate limiter as the collector, with
+a bounded number in flight. base_url can point at a local HTTP stand-in.
+
+Usage (from the data_collection directory):
+
+    python photo_store.py
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import psycopg2.extras
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from db import close_pool, get_pool
+from rate_limiter import TokenBucketRateLimiter
+
+try:
+    from PIL import Image
+except ImportError:  # Resized copies are optional
+    Image = None
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Widths (pixels) of the resized copies written next to each original
+DEFAULT_SIZES = {'thumb': 200, 'medium': 400}
+
+# Width requested from the Places Photo API for the original (the API maximum)
+DEFAULT_MAX_WIDTH = 1600
+
+EXTENSIONS = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp', 'image/gif': 'gif'}
+
+
+def photo_reference_from_url(url: str) -> Optional[str]:
+    """The photoreference param of a Places Photo API URL, or None for any other URL"""
+    if not url or '/place/photo' not in url:
+        return None
+    values = parse_qs(urlparse(url).query).get('photoreference')
+    return values[0] if values else None
+
+
+class PhotoStore:
+    def __init__(self, root: str, public_prefix: str = '/photos', sizes: Dict[str, int] = None):
+        """
+        Open (or create) a photo store
+
+        Args:
+            root: Directory holding the photos
+            public_prefix: URL path the app serves root under
+            sizes: Name -> width of the resized copies to write (default DEFAULT_SIZES)
+        """
+        self.root = root
+        self.public_prefix = public_prefix.rstrip('/')
+        self.sizes = DEFAULT_SIZES if sizes is None else sizes
+        self.index_path = os.path.join(root, 'index.jsonl')
+        self._lock = threading.Lock()
+
+        os.makedirs(root, exist_ok=True)
+        if self.sizes and Image is None:
+            logger.warning("Pillow is not installed; storing originals only (pip install Pillow)")
+
+        # photo_reference -> relative path of the original
+        self.index: Dict[str, str] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Partial last line from an interrupted run
+                    self.index[entry['photo_reference']] = entry['path']
+
+    def relative_path(self, digest: str, extension: str, size: str = None) -> str:
+        """Path of a stored file relative to root, fanned out by the first digest bytes"""
+        name = f"{digest}_{size}" if size else digest
+        return f"{digest[:2]}/{digest[2:4]}/{name}.{extension}"
+
+    def url_for(self, relative_path: str) -> str:
+        return f"{self.public_prefix}/{relative_path}"
+
+    def lookup(self, photo_reference: str) -> Optional[str]:
+        """Public URL of an already stored photo, or None"""
+        relative_path = self.index.get(photo_reference)
+        if relative_path and os.path.exists(os.path.join(self.root, relative_path)):
+            return self.url_for(relative_path)
+        return None
+
+    def _write(self, relative_path: str, data: bytes):
+        path = os.path.join(self.root, relative_path)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _write_sizes(self, digest: str, data: bytes):
+        if Image is None:
+            return
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image = image.convert('RGB')
+                for size, width in self.sizes.items():
+                    relative_path = self.relative_path(digest, 'jpg', size)
+                    if os.path.exists(os.path.join(self.root, relative_path)):
+                        continue
+                    resized = image.copy()
+                    resized.thumbnail((width, width * 4))
+                    buffer = io.BytesIO()
+                    resized.save(buffer, 'JPEG', quality=85, optimize=True)
+                    self._write(relative_path, buffer.getvalue())
+        except OSError as e:
+            logger.warning(f"Could not resize photo {digest}: {e}")
+
+    def add(self, photo_reference: str, data: bytes, content_type: str = 'image/jpeg') -> str:
+        """
+        Store a downloaded photo and its resized copies
+
+        Args:
+            photo_reference: Places photo_reference the data was downloaded for
+            data: Image bytes
+            content_type: Content-Type of the download, used for the file extension
+
+        Returns:
+            Public URL of the original
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        extension = EXTENSIONS.get(content_type.split(';')[0].strip().lower(), 'jpg')
+        relative_path = self.relative_path(digest, extension)
+
+        self._write(relative_path, data)
+        if self.sizes:
+            self._write_sizes(digest, data)
+
+        with self._lock:
+            self.index[photo_reference] = relative_path
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'photo_reference': photo_reference, 'path': relative_path}) + '\n')
+
+        return self.url_for(relative_path)
+
+
+class PhotoFetcher:
+    def __init__(self, api_key: str, store: PhotoStore, max_concurrent_requests: int = 8,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None, max_width: int = DEFAULT_MAX_WIDTH,
+                 base_url: str = "https://maps.googleapis.com/maps/api", timeout: float = 30.0):
+        """
+        Download Places photos into a PhotoStore
+
+        Args:
+            api_key: Google Places API key
+            store: Where downloaded photos go
+            max_concurrent_requests: Downloads in flight at once
+            rate_limiter: Shared rate limiter for all API requests (default 10 QPS, burst 10)
+            max_width: Width requested from the Places Photo API
+            base_url: Places API base URL (point at a local stand-in for testing)
+            timeout: Seconds before a download is abandoned
+        """
+        self.api_key = api_key
+        self.store = store
+        self.max_concurrent_requests = max(1, max_concurrent_requests)
+        self.rate_limiter = rate_limiter or TokenBucketRateLimiter(qps=10, burst=10)
+        self.max_width = max_width
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = 3
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_concurrent_requests,
+                              pool_maxsize=self.max_concurrent_requests)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch(self, photo_reference: str) -> Optional[str]:
+        """
+        Store one photo, downloading it only if it is not stored yet
+
+        Args:
+            photo_reference: Places photo_reference
+
+        Returns:
+            Public URL of the stored photo, or None if the download failed
+        """
+        stored_url = self.store.lookup(photo_reference)
+        if stored_url:
+            return stored_url
+
+        params = {'maxwidth': self.max_width, 'photoreference': photo_reference, 'key': self.api_key}
+        try:
+            for attempt in range(self.max_retries + 1):
+                self.rate_limiter.acquire()
+                # The Photo API answers with a redirect to the image, which requests follows
+                response = self.session.get(f"{self.base_url}/place/photo", params=params, timeout=self.timeout)
+                throttled = self.rate_limiter.observe(response.status_code)
+                if throttled and attempt < self.max_retries:
+                    logger.warning(f"Retrying photo download after HTTP {response.status_code}")
+                    continue
+                response.raise_for_status()
+                break
+
+            content_type = response.headers.get('Content-Type', 'image/jpeg')
+            if not content_type.startswith('image/'):
+                logger.error(f"Photo {photo_reference[:20]}... returned {content_type}, not an image")
+                return None
+
+            return self.store.add(photo_reference, response.content, content_type)
+
+        except requests.RequestException as e:
+            logger.error(f"Error downloading photo {photo_reference[:20]}...: {e}")
+            return None
+
+    def iter_fetch(self, photo_references: Iterable[str]) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Store photos concurrently, yielding results in input order
+
+        Up to max_concurrent_requests downloads are in flight at once and only a
+        small window of finished results is held while waiting for earlier ones.
+
+        Yields:
+            (photo_reference, public URL or None) tuples
+        """
+        window = self.max_concurrent_requests * 2
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            in_flight = deque()
+            for photo_reference in photo_references:
+                in_flight.append((photo_reference, executor.submit(self.fetch, photo_reference)))
+                if len(in_flight) >= window:
+                    done_reference, future = in_flight.popleft()
+                    yield done_reference, future.result()
+
+            while in_flight:
+                done_reference, future = in_flight.popleft()
+                yield done_reference, future.result()
+
+
+def iter_remote_photos(connection, fetch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+    """
+    Stream photos that still point at the Places Photo API
+
+    Yields:
+        (photo id, photo_reference)
+    """
+    with connection.cursor(name='photo_store_photos') as cursor:
+        cursor.itersize = fetch_size
+        cursor.execute("SELECT id::text, url, photo_reference FROM photos WHERE url LIKE %s ORDER BY id",
+                       ('%/place/photo?%',))
+        for photo_id, url, photo_reference in cursor:
+            photo_reference = photo_reference or photo_reference_from_url(url)
+            if photo_reference:
+                yield photo_id, photo_reference
+
+
+def ingest_photos(connection, fetcher: PhotoFetcher, batch_size: int = 500) -> Tuple[int, int]:
+    """
+    Store every remote photo locally and point photos.url at the stored copy
+
+    Rows sharing a photo_reference are downloaded once. Photos that fail to
+    download keep their remote URL and are retried on the next run.
+
+    Args:
+        connection: psycopg2 connection
+        fetcher: PhotoFetcher writing into the target store
+        batch_size: Rows per UPDATE batch
+
+    Returns:
+        (rows rewritten, rows that failed)
+    """
+    update_sql = """
+        UPDATE photos SET url = v.url, updated_at = NOW()
+        FROM (VALUES %s) AS v(id, url)
+        WHERE photos.id = v.id::uuid
+    """
+
+    # Collect the references up front so no transaction stays open during the downloads
+    previous_autocommit = connection.autocommit
+    connection.autocommit = False
+    try:
+        ids_by_reference: Dict[str, List[str]] = {}
+        for photo_id, photo_reference in iter_remote_photos(connection):
+            ids_by_reference.setdefault(photo_reference, []).append(photo_id)
+        connection.commit()
+    finally:
+        connection.autocommit = previous_autocommit
+
+    logger.info(f"Storing {len(ids_by_reference)} distinct photos locally")
+    start = time.monotonic()
+    rewritten = 0
+    failed = 0
+    pending = []
+    with connection.cursor() as cursor:
+        for photo_reference, url in fetcher.iter_fetch(ids_by_reference):
+            photo_ids = ids_by_reference[photo_reference]
+            if url is None:
+                failed += len(photo_ids)
+                continue
+            pending.extend((photo_id, url) for photo_id in photo_ids)
+            if len(pending) >= batch_size:
+                psycopg2.extras.execute_values(cursor, update_sql, pending, page_size=batch_size)
+                rewritten += len(pending)
+                pending = []
+
+        if pending:
+            psycopg2.extras.execute_values(cursor, update_sql, pending, page_size=batch_size)
+            rewritten += len(pending)
+
+    logger.info(f"Rewrote {rewritten} photo URLs ({failed} failed) in {time.monotonic() - start:.1f}s")
+    return rewritten, failed
+
+
+def parse_sizes(value: str) -> Dict[str, int]:
+    """Parse 'thumb:200,medium:400' into {'thumb': 200, 'medium': 400}"""
+    sizes = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, width = item.split(':')
+        sizes[name.strip()] = int(width)
+    return sizes
+
+
+def main():
+    load_dotenv()
+
+    api_key = os.getenv("APIKEY")
+    if not api_key:
+        logger.error("APIKEY not found in environment variables")
+        return
+
+    default_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'public', 'photos')
+    store = PhotoStore(
+        os.getenv("PHOTO_STORE_DIR", default_root),
+        public_prefix=os.getenv("PHOTO_PUBLIC_PREFIX", "/photos"),
+        sizes=parse_sizes(os.getenv("PHOTO_SIZES", "thumb:200,medium:400"))
+    )
+    rate_limiter = TokenBucketRateLimiter(
+        qps=float(os.getenv("PLACES_QPS", "10")),
+        burst=int(os.getenv("PLACES_BURST", "10"))
+    )
+    fetcher = PhotoFetcher(
+        api_key, store,
+        max_concurrent_requests=int(os.getenv("PLACES_MAX_CONCURRENT_REQUESTS", "8")),
+        rate_limiter=rate_limiter,
+        max_width=int(os.getenv("PHOTO_MAX_WIDTH", str(DEFAULT_MAX_WIDTH))),
+        base_url=os.getenv("PLACES_BASE_URL", "https://maps.googleapis.com/maps/api")
+    )
+
+    pool = get_pool()
+    try:
+        with pool.connection() as connection:
+            ingest_photos(connection, fetcher)
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
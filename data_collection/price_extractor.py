@@ -0,0 +1,292 @@
+"""
+Taco price mining from review text
+
+Reviews often quote prices ("$2.50 bean and cheese", "3 for $5", "$12 for 6",
+"2 bucks", "99 cents").
+PriceExtractor finds price mentions close to a taco name, normalizes them to
+cents per taco, and combines a restaurant's mentions into one estimate with a
+confidence score. All patterns are compiled once, so the extractor is cheap to
+run over every stored review; main() backfills the tacos table in bulk using a
+process pool.
+
+Usage (from the data_collection directory):
+
+    python price_extractor.py
+"""
+
+import itertools
+import logging
+import os
+import re
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extras
+from dotenv import load_dotenv
+
+from db import close_pool, get_pool
+from keyword_matcher import KeywordMatcher
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Names that tie a price to the bean and cheese taco, and weaker generic ones
+DEFAULT_TACO_TERMS = ['bean and cheese', 'bean & cheese', 'bean n cheese', 'bean cheese', 'beans and cheese', 'refried bean']
+DEFAULT_GENERIC_TERMS = ['taco', 'breakfast taco']
+
+# Weight of a price mention by the kind of name it was found next to
+TACO_TERM_WEIGHT = 1.0
+GENERIC_TERM_WEIGHT = 0.5
+
+# Prices outside this range (in cents per taco) are assumed to be something else, like a whole order
+MIN_TACO_PRICE_CENTS = 50
+MAX_TACO_PRICE_CENTS = 1500
+
+# Estimates below this confidence are not written to price_cents
+MIN_PRICE_CONFIDENCE = 0.3
+
+# Name of the taco row the collector creates; the backfill updates only these rows
+TACO_NAME = 'Bean and Cheese Taco'
+
+_NUMBER_WORDS = {'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'a dozen': 12, 'dozen': 12}
+
+_QUANTITY = r'\d{1,2}|two|three|four|five|six|a dozen|dozen'
+
+# One pass finds every kind of price mention. Multi-buy offers, either way round, come
+# before bare dollar amounts, so "3 for $5" and "$12 for 6" are each read as one offer
+# rather than as a $5 or $12 taco
+PRICE_PATTERN = re.compile(
+    rf'(?P<quantity>{_QUANTITY})\s+(?:\w+\s+){{0,4}}?for\s+'
+    r'\$\s?(?P<total>\d{1,3}(?:\.\d{1,2})?)'
+    r'|\$\s?(?P<offer_total>\d{1,3}(?:\.\d{1,2})?)\s+for\s+'
+    rf'(?P<offer_quantity>{_QUANTITY})\b'
+    r'|\$\s?(?P<dollars>\d{1,3}(?:\.\d{1,2})?)'
+    r'|(?P<bucks>\d{1,3}(?:\.\d{1,2})?)\s?(?:dollars|bucks)\b'
+    r'|(?P<cents>\d{2,3})\s?(?:cents\b|¢)',
+    re.IGNORECASE
+)
+
+
+def price_to_cents(match: re.Match) -> Tuple[Optional[int], int]:
+    """
+    Convert a PRICE_PATTERN match to cents per taco
+
+    Returns:
+        (cents per item, quantity) - cents is None if the match is not a usable price
+    """
+    if match.group('quantity') or match.group('offer_quantity'):
+        quantity_text = (match.group('quantity') or match.group('offer_quantity')).lower()
+        quantity = _NUMBER_WORDS.get(quantity_text) or int(quantity_text)
+        if quantity < 1:
+            return None, 0
+        total = match.group('total') or match.group('offer_total')
+        return round(float(total) * 100 / quantity), quantity
+
+    if match.group('cents'):
+        return int(match.group('cents')), 1
+
+    amount = match.group('dollars') or match.group('bucks')
+    return round(float(amount) * 100), 1
+
+
+def weighted_median(values: List[int], weights: List[float]) -> float:
+    """Median of values where each value counts with its weight"""
+    pairs = sorted(zip(values, weights))
+    half = sum(weights) / 2
+    running = 0.0
+    for value, weight in pairs:
+        running += weight
+        if running >= half:
+            return value
+    return pairs[-1][0]
+
+
+class PriceExtractor:
+    def __init__(self, taco_terms: Iterable[str] = None, generic_terms: Iterable[str] = None,
+                 window: int = 60):
+        """
+        Compile the price extractor
+
+        Args:
+            taco_terms: Names that tie a price to the bean and cheese taco
+            generic_terms: Weaker names such as 'taco'; mentions near them count for less
+            window: Maximum characters between a price and a taco name
+        """
+        self.taco_matcher = KeywordMatcher(taco_terms or DEFAULT_TACO_TERMS)
+        self.generic_matcher = KeywordMatcher(generic_terms or DEFAULT_GENERIC_TERMS)
+        self.window = window
+
+    def _name_spans(self, text: str) -> List[Tuple[int, int, float]]:
+        spans = []
+        for matcher, weight in ((self.taco_matcher, TACO_TERM_WEIGHT), (self.generic_matcher, GENERIC_TERM_WEIGHT)):
+            if matcher.pattern:
+                spans.extend((match.start(), match.end(), weight) for match in matcher.pattern.finditer(text))
+        return spans
+
+    def extract_mentions(self, text: str) -> List[Dict]:
+        """
+        Find taco price mentions in one review
+
+        Args:
+            text: Review text
+
+        Returns:
+            List of mentions with 'price_cents' (per taco), 'quantity', 'weight' and 'text'
+        """
+        if not text or not any(char in text for char in '$¢0123456789'):
+            return []
+
+        mentions = []
+        spans = None
+        for match in PRICE_PATTERN.finditer(text):
+            cents, quantity = price_to_cents(match)
+            if cents is None or not MIN_TACO_PRICE_CENTS <= cents <= MAX_TACO_PRICE_CENTS:
+                continue
+
+            if spans is None:
+                spans = self._name_spans(text)
+
+            # Weight of the strongest taco name within the window on either side
+            weight = max((span_weight for start, end, span_weight in spans
+                          if start - self.window <= match.end() and match.start() <= end + self.window),
+                         default=0.0)
+            if weight:
+                mentions.append({'price_cents': cents, 'quantity': quantity, 'weight': weight,
+                                 'text': match.group()})
+        return mentions
+
+    def estimate(self, texts: Iterable[str]) -> Tuple[Optional[int], float]:
+        """
+        Estimate a restaurant's bean and cheese taco price from its reviews
+
+        The estimate is the weighted median of all mentions. Confidence grows with the
+        total weight of evidence and shrinks when mentions disagree with the estimate.
+
+        Args:
+            texts: Review texts for one restaurant
+
+        Returns:
+            (price_cents, confidence between 0 and 1) - price_cents is None without mentions
+        """
+        mentions = [mention for text in texts for mention in self.extract_mentions(text)]
+        if not mentions:
+            return None, 0.0
+
+        prices = [mention['price_cents'] for mention in mentions]
+        weights = [mention['weight'] for mention in mentions]
+        price = int(weighted_median(prices, weights))
+
+        total_weight = sum(weights)
+        agreeing_weight = sum(weight for cents, weight in zip(prices, weights) if abs(cents - price) <= price * 0.25)
+        confidence = (total_weight / (total_weight + 1.0)) * (agreeing_weight / total_weight)
+        return price, round(confidence, 2)
+
+
+# Worker state for the bulk backfill; each process compiles its own extractor once
+_worker_extractor: Optional[PriceExtractor] = None
+
+
+def _init_worker():
+    global _worker_extractor
+    _worker_extractor = PriceExtractor()
+
+
+def _estimate_restaurant(item: Tuple[str, List[str]]) -> Tuple[str, Optional[int], float]:
+    restaurant_id, texts = item
+    price, confidence = _worker_extractor.estimate(texts)
+    return restaurant_id, price, confidence
+
+
+def iter_restaurant_reviews(connection, fetch_size: int = 5000) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Stream review texts grouped by restaurant with a server-side cursor
+
+    Yields:
+        (restaurant_id, list of review texts)
+    """
+    with connection.cursor(name='price_backfill_reviews') as cursor:
+        cursor.itersize = fetch_size
+        cursor.execute("""
+            SELECT restaurant_id::text, COALESCE(review_text, content)
+            FROM reviews
+            WHERE restaurant_id IS NOT NULL AND COALESCE(review_text, content) IS NOT NULL
+            ORDER BY restaurant_id
+        """)
+        for restaurant_id, rows in itertools.groupby(cursor, key=lambda row: row[0]):
+            yield restaurant_id, [text for _, text in rows]
+
+
+def backfill_prices(connection, processes: int = None, min_confidence: float = MIN_PRICE_CONFIDENCE,
+                    batch_size: int = 1000) -> int:
+    """
+    Estimate prices from every stored review and write them to the bean and cheese taco rows
+
+    Reviews are read in one streaming pass, estimated in a process pool and
+    written back with batched UPDATEs.
+
+    Args:
+        connection: psycopg2 connection
+        processes: Worker processes (default: one per CPU)
+        min_confidence: Estimates below this confidence are skipped
+        batch_size: Restaurants per UPDATE batch
+
+    Returns:
+        Number of restaurants whose price was written
+    """
+    update_sql = f"""
+        UPDATE tacos SET price_cents = v.price_cents, updated_at = NOW()
+        FROM (VALUES %s) AS v(restaurant_id, price_cents)
+        WHERE tacos.restaurant_id = v.restaurant_id::uuid AND tacos.name = '{TACO_NAME}'
+    """
+
+    # The server-side cursor only lives inside a transaction, so the reads and the
+    # updates share one transaction that is committed at the end
+    previous_autocommit = connection.autocommit
+    connection.autocommit = False
+
+    estimated = 0
+    pending = []
+    try:
+        with Pool(processes=processes, initializer=_init_worker) as pool, connection.cursor() as update_cursor:
+            results = pool.imap_unordered(_estimate_restaurant, iter_restaurant_reviews(connection), chunksize=64)
+            for restaurant_id, price, confidence in results:
+                if price is not None and confidence >= min_confidence:
+                    pending.append((restaurant_id, price))
+
+                if pending and (len(pending) >= batch_size):
+                    psycopg2.extras.execute_values(update_cursor, update_sql, pending, page_size=batch_size)
+                    estimated += len(pending)
+                    pending = []
+
+            if pending:
+                psycopg2.extras.execute_values(update_cursor, update_sql, pending, page_size=batch_size)
+                estimated += len(pending)
+
+        connection.commit()
+        logger.info(f"Backfilled prices for {estimated} restaurants")
+        return estimated
+
+    except Exception:
+        connection.rollback()
+        raise
+
+    finally:
+        connection.autocommit = previous_autocommit
+
+
+def main():
+    load_dotenv()
+
+    pool = get_pool()
+    try:
+        processes = int(os.getenv("PRICE_BACKFILL_PROCESSES", "0")) or None
+        min_confidence = float(os.getenv("PRICE_MIN_CONFIDENCE", str(MIN_PRICE_CONFIDENCE)))
+        with pool.connection() as connection:
+            backfill_prices(connection, processes=processes, min_confidence=min_confidence)
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Per-stage CPU and memory profiling for --profile runs
+
+StageProfiler leaves enough evidence behind a slow run to diagnose it later.
+The collector's stages (search, filter, details, extraction, db_write, save)
+and the exporter's tables each get:
+
+- a cProfile profile of the thread running the stage, saved as <stage>.prof
+  (pstats format, readable by snakeviz or gprof2dot)
+- sampled stacks of every thread in collapsed-stack format, saved as
+  <stage>.collapsed and, with the stage as the root frame, all_stages.collapsed
+  (flamegraph.pl, inferno or speedscope read these directly)
+- tracemalloc counters (net and peak traced memory) for every call, and the top
+  allocation sites of the first call(s), in summary.txt
+
+The sampler sees the details fetcher's worker threads too, under their thread
+names, which cProfile (current thread only) does not. Profiling slows the run
+down, so stage times from a profiled run are only comparable with each other.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Root frame for samples from threads outside any stage
+UNSTAGED = 'unstaged'
+
+TOP_N = 25
+
+# Allocation sites from these files are the profiler's own
+_OWN_FILES = (tracemalloc.__file__, __file__)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+
+
+class StageProfiler:
+    def __init__(self, output_dir: str, run_name: str = 'run', sample_interval: float = 0.01,
+                 traceback_frames: int = 1, snapshot_calls: int = 1):
+        """
+        Set up profiling for one run
+
+        Args:
+            output_dir: Parent directory; each run writes to <output_dir>/<run_name>_<timestamp>
+            run_name: Prefix of the run's directory
+            sample_interval: Seconds between stack samples
+            traceback_frames: Frames tracemalloc keeps per allocation (more is slower)
+            snapshot_calls: Calls per stage to diff allocation snapshots around; comparing snapshots
+                takes seconds once millions of objects are alive, and the per-place stages run
+                thousands of times
+        """
+        self.output_dir = os.path.join(output_dir, f"{run_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self.sample_interval = sample_interval
+        self.traceback_frames = traceback_frames
+        self.snapshot_calls = snapshot_calls
+
+        self._lock = threading.Lock()
+        self._stacks: Dict[int, List[str]] = {}           # thread id -> active stages, innermost last
+        self._profiles: Dict[tuple, cProfile.Profile] = {}  # (stage, thread id) -> profile
+        self._active_profiles: Dict[int, List[cProfile.Profile]] = {}
+        self._samples: Counter = Counter()                # (stage, collapsed stack) -> samples
+        self._stats: Dict[str, Dict] = {}
+        self._allocations: Dict[str, Dict] = {}          # stage -> {site: [size_diff, count_diff]}
+        self._open_peaks: List[List[int]] = []           # peak traced memory carried per open stage
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._started_tracemalloc = False
+
+    def start(self):
+        """Start tracemalloc and the stack sampler"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.traceback_frames)
+            self._started_tracemalloc = True
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name='stage-profiler', daemon=True)
+        self._sampler.start()
+        logger.info(f"Profiling enabled, writing to {self.output_dir}")
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.sample_interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, frame in frames.items():
+                    if thread_id == own_id:
+                        continue
+                    stages = self._stacks.get(thread_id)
+                    stage = stages[-1] if stages else UNSTAGED
+                    labels = []
+                    while frame is not None:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    labels.append(names.get(thread_id, str(thread_id)).replace(';', ':'))
+                    self._samples[(stage, ';'.join(reversed(labels)))] += 1
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Profile a block of work as one call of a stage"""
+        thread_id = threading.get_ident()
+        with self._lock:
+            profile = self._profiles.setdefault((name, thread_id), cProfile.Profile())
+            stats = self._stats.setdefault(name, {'calls': 0, 'seconds': 0.0, 'memory_net': 0, 'memory_peak': 0})
+            stats['calls'] += 1
+            take_snapshot = stats['calls'] <= self.snapshot_calls
+            self._stacks.setdefault(thread_id, []).append(name)
+
+        # Only one profile can be enabled per thread; pause the enclosing stage's
+        active = self._active_profiles.setdefault(thread_id, [])
+        if active:
+            active[-1].disable()
+        active.append(profile)
+
+        before = tracemalloc.take_snapshot() if take_snapshot else None
+        with self._lock:
+            # The traced peak is process-wide, so resetting it for this stage would lose the peak of
+            # every stage already open (enclosing ones, or stages on other threads); carry it over first
+            memory_start, memory_peak = tracemalloc.get_traced_memory()
+            for open_peak in self._open_peaks:
+                open_peak[0] = max(open_peak[0], memory_peak)
+            carried_peak = [memory_start]
+            self._open_peaks.append(carried_peak)
+            tracemalloc.reset_peak()
+        start = time.monotonic()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            seconds = time.monotonic() - start
+            with self._lock:
+                memory_end, memory_peak = tracemalloc.get_traced_memory()
+                memory_peak = max(memory_peak, carried_peak[0])
+                self._open_peaks = [open_peak for open_peak in self._open_peaks if open_peak is not carried_peak]
+            if before is not None:
+                self._record_allocations(name, tracemalloc.take_snapshot().compare_to(before, 'lineno'))
+
+            active.pop()
+            if active:
+                active[-1].enable()
+
+            with self._lock:
+                self._stacks[thread_id].pop()
+                stats['seconds'] += seconds
+                stats['memory_net'] += memory_end - memory_start
+                stats['memory_peak'] = max(stats['memory_peak'], memory_peak - memory_start)
+
+    def _record_allocations(self, stage: str, differences: List[tracemalloc.StatisticDiff]):
+        with self._lock:
+            sites = self._allocations.setdefault(stage, {})
+            for difference in differences:
+                frame = difference.traceback[0]
+                if difference.size_diff <= 0 or frame.filename in _OWN_FILES:
+                    continue
+                entry = sites.setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+                entry[0] += difference.size_diff
+                entry[1] += difference.count_diff
+
+    def finish(self) -> str:
+        """
+        Stop sampling and write the profile files
+
+        Returns:
+            The directory the files were written to
+        """
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        with self._lock:
+            stage_names = list(self._stats)
+            for stage in stage_names:
+                profiles = [profile for (name, _), profile in self._profiles.items() if name == stage]
+                stats = pstats.Stats(profiles[0])
+                for profile in profiles[1:]:
+                    stats.add(profile)
+                stats.dump_stats(os.path.join(self.output_dir, f"{stage}.prof"))
+
+            by_stage: Dict[str, List[str]] = {}
+            for (stage, stack), count in sorted(self._samples.items()):
+                by_stage.setdefault(stage, []).append(f"{stack} {count}")
+            for stage, lines in by_stage.items():
+                with open(os.path.join(self.output_dir, f"{stage}.collapsed"), 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+            with open(os.path.join(self.output_dir, 'all_stages.collapsed'), 'w', encoding='utf-8') as f:
+                for (stage, stack), count in sorted(self._samples.items()):
+                    f.write(f"{stage};{stack} {count}\n")
+
+            with open(os.path.join(self.output_dir, 'summary.txt'), 'w', encoding='utf-8') as f:
+                f.write(self._summary(stage_names))
+
+        logger.info(f"Wrote profiles for {len(stage_names)} stages to {self.output_dir}")
+        return self.output_dir
+
+    def _summary(self, stage_names: List[str]) -> str:
+        out = io.StringIO()
+        out.write(f"{'stage':<24} {'calls':>8} {'seconds':>10} {'net MB':>9} {'peak MB':>9} {'samples':>8}\n")
+        samples = Counter()
+        for (stage, _), count in self._samples.items():
+            samples[stage] += count
+        for stage in stage_names:
+            stats = self._stats[stage]
+            out.write(f"{stage:<24} {stats['calls']:>8} {stats['seconds']:>10.3f} "
+                      f"{stats['memory_net'] / 1e6:>9.2f} {stats['memory_peak'] / 1e6:>9.2f} {samples[stage]:>8}\n")
+        if samples[UNSTAGED]:
+            out.write(f"{UNSTAGED:<24} {'':>8} {'':>10} {'':>9} {'':>9} {samples[UNSTAGED]:>8}\n")
+
+        for stage in stage_names:
+            out.write(f"\n=== {stage} ===\n\nTop functions by cumulative time:\n")
+            profile_path = os.path.join(self.output_dir, f"{stage}.prof")
+            pstats.Stats(profile_path, stream=out).sort_stats('cumulative').print_stats(TOP_N)
+
+            calls = min(self._stats[stage]['calls'], self.snapshot_calls)
+            out.write(f"Top allocation sites (memory still held after the first {calls} call(s)):\n")
+            sites = sorted(self._allocations.get(stage, {}).items(), key=lambda item: item[1][0], reverse=True)
+            for site, (size, count) in sites[:TOP_N]:
+                out.write(f"  {size / 1024:>10.1f} KiB  {count:>8} blocks  {site}\n")
+            if not sites:
+                out.write("  (none)\n")
+        return out.getvalue()
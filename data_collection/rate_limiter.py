@@ -0,0 +1,104 @@
+"""
+Shared token-bucket rate limiter for Google Places API requests
+
+The bucket refills at a configurable QPS up to a burst size. When the API
+reports quota exhaustion or server errors the refill rate is cut
+multiplicatively, and it climbs back towards the configured QPS additively as
+requests succeed (AIMD). One limiter can be shared by threads and asyncio tasks.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Google API statuses that mean we are sending too fast
+THROTTLE_STATUSES = ('OVER_QUERY_LIMIT', 'RESOURCE_EXHAUSTED')
+
+
+class TokenBucketRateLimiter:
+    def __init__(self, qps: float = 10.0, burst: int = 10, min_qps: float = 0.5,
+                 backoff_factor: float = 0.5, recovery_step: float = None):
+        """
+        Initialize the rate limiter
+
+        Args:
+            qps: Target requests per second
+            burst: Maximum number of requests that may be sent back to back
+            min_qps: Floor for the refill rate while backing off
+            backoff_factor: Multiplier applied to the rate on each throttle signal
+            recovery_step: QPS added back per successful request (default 5% of qps)
+        """
+        self.qps = float(qps)
+        self.burst = max(1, int(burst))
+        self.min_qps = min(float(min_qps), self.qps)
+        self.backoff_factor = backoff_factor
+        self.recovery_step = recovery_step if recovery_step is not None else self.qps * 0.05
+
+        self.rate = self.qps
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Take one token, going into debt if the bucket is empty
+
+        Returns:
+            Seconds the caller must wait before sending its request
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Block the calling thread until a request may be sent"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be sent"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record_success(self):
+        """Speed back up towards the target QPS after a successful request"""
+        with self._lock:
+            if self.rate < self.qps:
+                self.rate = min(self.qps, self.rate + self.recovery_step)
+
+    def record_throttle(self):
+        """Slow down after a quota or server error"""
+        with self._lock:
+            self.rate = max(self.min_qps, self.rate * self.backoff_factor)
+            # Drop any saved-up burst so the slower rate takes effect immediately
+            self._tokens = min(self._tokens, 0.0)
+            rate = self.rate
+        logger.warning(f"Rate limited by API, slowing down to {rate:.2f} requests/sec")
+
+    def observe(self, http_status: int, api_status: str = None) -> bool:
+        """
+        Feed a response outcome back into the limiter
+
+        Args:
+            http_status: HTTP status code of the response
+            api_status: The 'status' field of the JSON body, if any
+
+        Returns:
+            bool: True if the response was a throttle signal worth retrying
+        """
+        if http_status == 429 or http_status >= 500 or api_status in THROTTLE_STATUSES:
+            self.record_throttle()
+            return True
+
+        self.record_success()
+        return False
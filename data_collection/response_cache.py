@@ -0,0 +1,179 @@
+"""
+On-disk response cache for Google Places API calls
+
+Responses are stored in a small SQLite database keyed on the endpoint plus the
+request params (without the API key). Entries expire per endpoint and the cache
+is kept under a size cap by evicting the least recently used entries.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached response stays fresh, per endpoint
+DEFAULT_TTLS = {
+    'place/nearbysearch': 24 * 60 * 60,     # 1 day - search rankings shift often
+    'place/details': 7 * 24 * 60 * 60,      # 7 days - reviews and hours change slowly
+}
+
+DEFAULT_MAX_SIZE_BYTES = 512 * 1024 * 1024  # 512MB
+
+# Params that never take part in the cache key
+IGNORED_PARAMS = {'key'}
+
+
+class CacheMissError(Exception):
+    """Raised in replay mode when a request is not in the cache"""
+
+
+class PlacesResponseCache:
+    def __init__(self, cache_dir: str, ttls: Dict[str, int] = None,
+                 max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES, replay_only: bool = False):
+        """
+        Open (or create) the response cache
+
+        Args:
+            cache_dir: Directory holding the cache database
+            ttls: Seconds each endpoint's responses stay fresh (merged over DEFAULT_TTLS)
+            max_size_bytes: Size cap for stored responses; least recently used entries are evicted
+            replay_only: Serve only from the cache, ignoring TTLs and never touching the network
+        """
+        self.cache_dir = cache_dir
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_size_bytes = max_size_bytes
+        self.replay_only = replay_only
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(os.path.join(cache_dir, 'responses.sqlite3'),
+                                           check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                body BLOB NOT NULL
+            )
+        """)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._connection.commit()
+
+        self._total_size = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict) -> str:
+        """
+        Build the content key for a request
+
+        Args:
+            endpoint: API endpoint relative to the Maps API base url (e.g. 'place/details')
+            params: Request params; the API key is excluded
+
+        Returns:
+            Hex digest identifying the request
+        """
+        key_params = {k: str(v) for k, v in params.items() if k not in IGNORED_PARAMS}
+        payload = json.dumps([endpoint, key_params], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, endpoint: str, params: Dict) -> Optional[Dict]:
+        """
+        Look up a cached response
+
+        Args:
+            endpoint: API endpoint relative to the Maps API base url
+            params: Request params
+
+        Returns:
+            The cached JSON response, or None if missing or expired
+
+        Raises:
+            CacheMissError: In replay mode when the request has no cached response
+        """
+        key = self.make_key(endpoint, params)
+        now = time.time()
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT created_at, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            ttl = self.ttls.get(endpoint)
+            if row and (self.replay_only or ttl is None or now - row[0] <= ttl):
+                self._connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self._connection.commit()
+                self.hits += 1
+                return json.loads(zlib.decompress(row[1]))
+
+            self.misses += 1
+
+        if self.replay_only:
+            raise CacheMissError(f"No cached response for {endpoint} {self._describe(params)}")
+        return None
+
+    def set(self, endpoint: str, params: Dict, data: Dict):
+        """
+        Store a response, evicting least recently used entries if over the size cap
+
+        Args:
+            endpoint: API endpoint relative to the Maps API base url
+            params: Request params
+            data: Parsed JSON response
+        """
+        if self.replay_only:
+            return
+
+        key = self.make_key(endpoint, params)
+        body = zlib.compress(json.dumps(data).encode('utf-8'))
+        now = time.time()
+
+        with self._lock:
+            previous = self._connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, created_at, accessed_at, size, body) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, endpoint, now, now, len(body), body)
+            )
+            self._total_size += len(body) - (previous[0] if previous else 0)
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits under max_size_bytes"""
+        if self._total_size <= self.max_size_bytes:
+            return
+
+        evicted = 0
+        rows = self._connection.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if self._total_size <= self.max_size_bytes:
+                break
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._total_size -= size
+            evicted += 1
+
+        logger.info(f"Evicted {evicted} cached responses to stay under {self.max_size_bytes} bytes")
+
+    @staticmethod
+    def _describe(params: Dict) -> str:
+        return ', '.join(f"{k}={v}" for k, v in sorted(params.items()) if k not in IGNORED_PARAMS)
+
+    def close(self):
+        """Close the cache database"""
+        with self._lock:
+            self._connection.close()
+        logger.info(f"Response cache closed ({self.hits} hits, {self.misses} misses)")
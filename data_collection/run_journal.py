@@ -0,0 +1,159 @@
+"""
+Append-only progress journal for resumable collection runs
+
+The results of every finished search query, the filtered candidate list and
+each batch of places whose rows are committed are appended to a JSON-lines file
+and fsynced, along with the state file sinks need to continue their output (see
+sinks.py). If a run dies, the next run with the same parameters replays the
+journal and continues where it stopped instead of repeating API calls and DB
+writes.
+
+Searches are journaled per query rather than per page. Page tokens expire within
+minutes, so a resumed run could not use them to fetch the rest of a query; a
+query that was still paginating when the run died is searched again from its
+first page.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RunJournal:
+    def __init__(self, path: str):
+        """
+        Open the journal, loading any progress from an unfinished run
+
+        Args:
+            path: JSON-lines file to append progress to
+        """
+        self.path = path
+        self.run_params = None
+        self.completed = False
+        self.searches: Dict[str, List[Dict]] = {}
+        self.candidates: Optional[List[Dict]] = None
+        self.done_place_ids = set()
+        # Sink states from the latest places_done entry, one per sink (see sinks.py)
+        self.sink_states: Optional[List[Optional[Dict]]] = None
+        self.resumed = False
+        self._valid_length = 0
+
+        if os.path.exists(path):
+            self._load()
+
+        self._file = None
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write; everything before it is intact
+                    logger.warning(f"Ignoring partial journal entry in {self.path}")
+                    break
+                self._apply(entry)
+                self._valid_length += len(line)
+
+    def _apply(self, entry: Dict):
+        kind = entry['type']
+        if kind == 'start':
+            self.run_params = entry['params']
+        elif kind == 'search':
+            self.searches[entry['key']] = entry['places']
+        elif kind == 'candidates':
+            self.candidates = entry['places']
+        elif kind == 'places_done':
+            self.done_place_ids.update(entry['place_ids'])
+            self.sink_states = entry.get('sink_states', self.sink_states)
+        elif kind == 'complete':
+            self.completed = True
+
+    def _append(self, entry: Dict):
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def start(self, run_params: Dict) -> bool:
+        """
+        Begin a run, resuming the journaled one if it is unfinished and has the same parameters
+
+        Args:
+            run_params: JSON-serializable parameters identifying the run
+
+        Returns:
+            bool: True if resuming an interrupted run
+        """
+        resuming = self.run_params is not None and not self.completed and self.run_params == run_params
+
+        if resuming:
+            logger.info(f"Resuming run from {self.path}: {len(self.searches)} searches and "
+                        f"{len(self.done_place_ids)} places already done")
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.truncate(self._valid_length)
+        else:
+            if self.run_params is not None and not self.completed:
+                logger.warning(f"Discarding unfinished run in {self.path}; it was started with different parameters")
+            self.run_params = run_params
+            self.completed = False
+            self.searches = {}
+            self.candidates = None
+            self.done_place_ids = set()
+            self.sink_states = None
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._append({'type': 'start', 'params': run_params})
+
+        self.resumed = resuming
+        return resuming
+
+    @staticmethod
+    def search_key(query: Dict) -> str:
+        """Key for a search query"""
+        return json.dumps(query, sort_keys=True)
+
+    def search_results(self, query: Dict) -> Optional[List[Dict]]:
+        """Journaled results of a search query, if it finished in an earlier attempt"""
+        return self.searches.get(self.search_key(query))
+
+    def record_search(self, query: Dict, places: List[Dict]):
+        """Record the results of every page of a finished search query"""
+        key = self.search_key(query)
+        self.searches[key] = places
+        self._append({'type': 'search', 'key': key, 'places': places})
+
+    def record_candidates(self, places: List[Dict]):
+        """Record the filtered candidate list so a resumed run can skip searching"""
+        self.candidates = places
+        self._append({'type': 'candidates', 'places': places})
+
+    def mark_places_done(self, place_ids: Iterable[str], sink_states: List[Optional[Dict]] = None):
+        """
+        Record places whose rows are committed
+
+        Args:
+            place_ids: Places whose rows are durable in every sink
+            sink_states: Checkpoint state of each sink, handed back to it by a resumed run
+        """
+        place_ids = list(place_ids)
+        if not place_ids:
+            return
+        self.done_place_ids.update(place_ids)
+        entry = {'type': 'places_done', 'place_ids': place_ids}
+        if sink_states is not None:
+            self.sink_states = sink_states
+            entry['sink_states'] = sink_states
+        self._append(entry)
+
+    def mark_complete(self):
+        """Record that the run finished; the next run starts fresh"""
+        self.completed = True
+        self._append({'type': 'complete'})
+
+    def close(self):
+        """Close the journal file"""
+        if self._file:
+            self._file.close()
+            self._file = None
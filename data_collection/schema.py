@@ -0,0 +1,270 @@
+"""
+Versioned schema setup for the collector database
+
+Each migration runs once per database and is recorded in
+collector_schema_migrations, so constructing a collector against an up to date
+database costs a single version lookup.
+"""
+
+import logging
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (version, description, statements) - append new migrations, never edit applied ones
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "create collector tables", [
+        """
+        CREATE TABLE IF NOT EXISTS restaurants (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            name TEXT NOT NULL,
+            street_address TEXT,
+            city TEXT,
+            state TEXT,
+            zip TEXT,
+            latitude DOUBLE PRECISION,
+            longitude DOUBLE PRECISION,
+            phone TEXT,
+            website TEXT,
+            yelp_id TEXT,
+            google_rating DECIMAL(2,1),
+            google_price_level INTEGER,
+            google_user_ratings_total INTEGER,
+            place_id TEXT,
+            created_at TIMESTAMP DEFAULT NOW(),
+            updated_at TIMESTAMP DEFAULT NOW()
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tacos (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            restaurant_id UUID REFERENCES restaurants(id) ON DELETE CASCADE,
+            name TEXT,
+            description TEXT,
+            price_cents INTEGER,
+            calories INTEGER,
+            tortilla_type TEXT,
+            protein_type TEXT,
+            is_vegan BOOLEAN DEFAULT FALSE,
+            is_bulk BOOLEAN DEFAULT FALSE,
+            is_daily_special BOOLEAN DEFAULT FALSE,
+            available_from TIME,
+            available_to TIME,
+            created_at TIMESTAMP DEFAULT NOW(),
+            updated_at TIMESTAMP DEFAULT NOW()
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS photos (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            taco_id UUID REFERENCES tacos(id) ON DELETE CASCADE,
+            user_id UUID,
+            url TEXT NOT NULL,
+            is_user_uploaded BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT NOW()
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS reviews (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            user_id UUID,
+            taco_id UUID REFERENCES tacos(id) ON DELETE CASCADE,
+            content TEXT,
+            submitted_at TIMESTAMP DEFAULT NOW(),
+            verified_location BOOLEAN DEFAULT FALSE,
+            gps_latitude DOUBLE PRECISION,
+            gps_longitude DOUBLE PRECISION,
+            fullness_rating INTEGER CHECK (fullness_rating BETWEEN 1 AND 5),
+            authenticity_id UUID,
+            created_at TIMESTAMP DEFAULT NOW(),
+            updated_at TIMESTAMP DEFAULT NOW(),
+            author_name TEXT,
+            author_url TEXT,
+            google_rating INTEGER,
+            review_text TEXT,
+            review_time BIGINT,
+            relative_time_description TEXT,
+            language TEXT,
+            review_date TIMESTAMP,
+            restaurant_id UUID REFERENCES restaurants(id) ON DELETE CASCADE
+        );
+        """,
+        # Databases created by older versions of the collector predate these columns
+        "ALTER TABLE restaurants ADD COLUMN IF NOT EXISTS place_id TEXT;",
+        """
+        ALTER TABLE reviews
+            ADD COLUMN IF NOT EXISTS author_name TEXT,
+            ADD COLUMN IF NOT EXISTS author_url TEXT,
+            ADD COLUMN IF NOT EXISTS google_rating INTEGER,
+            ADD COLUMN IF NOT EXISTS review_text TEXT,
+            ADD COLUMN IF NOT EXISTS review_time BIGINT,
+            ADD COLUMN IF NOT EXISTS relative_time_description TEXT,
+            ADD COLUMN IF NOT EXISTS language TEXT,
+            ADD COLUMN IF NOT EXISTS review_date TIMESTAMP,
+            ADD COLUMN IF NOT EXISTS restaurant_id UUID REFERENCES restaurants(id) ON DELETE CASCADE;
+        """,
+    ]),
+    (2, "index foreign keys and place_id", [
+        "CREATE INDEX IF NOT EXISTS index_restaurants_on_place_id ON restaurants (place_id);",
+        "CREATE INDEX IF NOT EXISTS index_tacos_on_restaurant_id ON tacos (restaurant_id);",
+        "CREATE INDEX IF NOT EXISTS index_photos_on_taco_id ON photos (taco_id);",
+        "CREATE INDEX IF NOT EXISTS index_reviews_on_restaurant_id ON reviews (restaurant_id);",
+        "CREATE INDEX IF NOT EXISTS index_reviews_on_taco_id ON reviews (taco_id);",
+    ]),
+    (3, "make place_id unique for upserts", [
+        "CREATE UNIQUE INDEX IF NOT EXISTS index_restaurants_on_place_id_unique ON restaurants (place_id);",
+        "DROP INDEX IF EXISTS index_restaurants_on_place_id;",
+    ]),
+    (4, "store photos once per restaurant with a taco_photos link table", [
+        """
+        ALTER TABLE photos
+            ADD COLUMN IF NOT EXISTS restaurant_id UUID REFERENCES restaurants(id) ON DELETE CASCADE,
+            ADD COLUMN IF NOT EXISTS photo_reference TEXT;
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS taco_photos (
+            taco_id UUID NOT NULL REFERENCES tacos(id) ON DELETE CASCADE,
+            photo_id UUID NOT NULL REFERENCES photos(id) ON DELETE CASCADE,
+            PRIMARY KEY (taco_id, photo_id)
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS index_taco_photos_on_photo_id ON taco_photos (photo_id);",
+        # Backfill the new columns for photos written as one copy per taco
+        """
+        UPDATE photos SET restaurant_id = tacos.restaurant_id
+        FROM tacos
+        WHERE photos.taco_id = tacos.id AND photos.restaurant_id IS NULL;
+        """,
+        """
+        UPDATE photos SET photo_reference = substring(url from 'photoreference=([^&]+)')
+        WHERE photo_reference IS NULL AND url LIKE '%photoreference=%';
+        """,
+        # Keep the oldest copy of each restaurant photo, link every taco that had a copy to it,
+        # and drop the other copies
+        """
+        CREATE TEMPORARY TABLE photo_survivors ON COMMIT DROP AS
+        SELECT photos.id, survivor.id AS survivor_id
+        FROM photos
+        JOIN (
+            SELECT DISTINCT ON (restaurant_id, photo_reference) id, restaurant_id, photo_reference
+            FROM photos
+            WHERE restaurant_id IS NOT NULL AND photo_reference IS NOT NULL
+            ORDER BY restaurant_id, photo_reference, created_at, id
+        ) AS survivor USING (restaurant_id, photo_reference);
+        """,
+        """
+        INSERT INTO taco_photos (taco_id, photo_id)
+        SELECT photos.taco_id, photo_survivors.survivor_id
+        FROM photos JOIN photo_survivors USING (id)
+        WHERE photos.taco_id IS NOT NULL
+        ON CONFLICT DO NOTHING;
+        """,
+        """
+        DELETE FROM photos USING photo_survivors
+        WHERE photos.id = photo_survivors.id AND photo_survivors.id <> photo_survivors.survivor_id;
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS index_photos_on_restaurant_id_and_photo_reference
+            ON photos (restaurant_id, photo_reference);
+        """,
+    ]),
+    (5, "log deleted rows of the exported tables for delta exports", [
+        """
+        CREATE TABLE IF NOT EXISTS collector_deleted_rows (
+            table_name TEXT NOT NULL,
+            id UUID NOT NULL,
+            deleted_at TIMESTAMP NOT NULL DEFAULT NOW()
+        );
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS index_collector_deleted_rows_on_table_name_and_deleted_at
+            ON collector_deleted_rows (table_name, deleted_at);
+        """,
+        # Statement-level, so a bulk delete logs its rows with one INSERT ... SELECT. TRUNCATE
+        # (which a full collection run uses) doesn't fire delete triggers, so it logs the whole
+        # table before emptying it
+        """
+        CREATE OR REPLACE FUNCTION log_deleted_collector_rows() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                EXECUTE format('INSERT INTO collector_deleted_rows (table_name, id) SELECT %L, id FROM %I.%I',
+                               TG_TABLE_NAME, TG_TABLE_SCHEMA, TG_TABLE_NAME);
+            ELSE
+                INSERT INTO collector_deleted_rows (table_name, id) SELECT TG_TABLE_NAME, id FROM deleted_rows;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+    ] + [
+        statement
+        for table in ('restaurants', 'tacos', 'photos', 'reviews')
+        for statement in (
+            f"""
+            CREATE TRIGGER log_deleted_{table} AFTER DELETE ON {table}
+                REFERENCING OLD TABLE AS deleted_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION log_deleted_collector_rows();
+            """,
+            f"""
+            CREATE TRIGGER log_truncated_{table} BEFORE TRUNCATE ON {table}
+                FOR EACH STATEMENT EXECUTE FUNCTION log_deleted_collector_rows();
+            """,
+        )
+    ]),
+    (6, "track photo changes for delta exports", [
+        # Existing rows take the migration's time, so the next delta export ships every photo
+        # once, including URLs photo_store.py rewrote before the column existed
+        "ALTER TABLE photos ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT NOW();",
+    ]),
+]
+
+# Arbitrary key for the advisory lock that serializes concurrent migrators
+MIGRATION_LOCK_ID = 7246821
+
+
+def migrate(connection) -> int:
+    """
+    Apply any pending migrations in a single transaction
+
+    Args:
+        connection: psycopg2 connection (autocommit is restored afterwards)
+
+    Returns:
+        The schema version after migrating
+    """
+    previous_autocommit = connection.autocommit
+    connection.autocommit = False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS collector_schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at TIMESTAMP DEFAULT NOW()
+                );
+            """)
+            cursor.execute("SELECT COALESCE(MAX(version), 0) FROM collector_schema_migrations")
+            current_version = cursor.fetchone()[0]
+
+            for version, description, statements in MIGRATIONS:
+                if version <= current_version:
+                    continue
+                logger.info(f"Applying schema migration {version}: {description}")
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO collector_schema_migrations (version, description) VALUES (%s, %s)",
+                    (version, description)
+                )
+                current_version = version
+
+        connection.commit()
+        return current_version
+
+    except Exception:
+        connection.rollback()
+        raise
+
+    finally:
+        connection.autocommit = previous_autocommit
@@ -0,0 +1,244 @@
+"""
+Output sinks for streamed place records
+
+GooglePlacesTacoCollector.iter_place_records yields one record per processed
+place:
+
+    {'place_id': ..., 'restaurant': {...}, 'tacos': [...], 'reviews': [...], 'photos': [...],
+     'taco_photos': [...]}
+
+A sink receives each record through write() and is closed once at the end of
+the run. Apart from DataFrameSink, which exists to build in-memory DataFrames,
+sinks hold at most one batch of rows at a time, so memory stays flat however
+many places are collected.
+
+Sinks that write files also have checkpoint() and resume(). checkpoint() makes
+everything written so far durable and returns a JSON-serializable state, or None
+if the output only becomes readable once the sink is closed. run_pipeline
+journals a place as done only after every sink has checkpointed its rows, and a
+resumed run passes each sink the state from its last checkpoint. resume(state)
+reopens the interrupted run's output and discards anything written after that
+checkpoint, so the resumed run continues the same files without losing or
+duplicating rows. Sinks without checkpoint() hold nothing that outlives the
+process.
+"""
+
+import csv
+import logging
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+from columnar import EXTENSIONS, ColumnarWriter, pa, require_pyarrow
+
+logger = logging.getLogger(__name__)
+
+RECORD_TABLES = ['restaurants', 'tacos', 'reviews', 'photos', 'taco_photos']
+
+# Tables returned as DataFrames by collect_all_data
+FRAME_TABLES = ['restaurants', 'tacos', 'reviews', 'photos']
+
+
+def record_rows(record: Dict, table: str) -> List[Dict]:
+    """Rows a record contributes to one of RECORD_TABLES"""
+    if table == 'restaurants':
+        return [record['restaurant']]
+    return record[table]
+
+
+class DataFrameSink:
+    """Collects records in memory and builds the four DataFrames collect_all_data returns"""
+
+    def __init__(self):
+        self.rows: Dict[str, List[Dict]] = {table: [] for table in RECORD_TABLES}
+
+    def write(self, record: Dict):
+        for table in RECORD_TABLES:
+            self.rows[table].extend(record_rows(record, table))
+
+    def close(self):
+        pass
+
+    def frames(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """Return (restaurants_df, tacos_df, reviews_df, photos_df)"""
+        return tuple(pd.DataFrame(self.rows[table]) for table in FRAME_TABLES)
+
+
+class DatabaseSink:
+    """Writes records to PostgreSQL through the collector's batched writer"""
+
+    def __init__(self, collector, on_flush: Callable[[], None] = None):
+        """
+        Args:
+            collector: GooglePlacesTacoCollector providing the connection and row builders
+            on_flush: Optional callback run after each committed flush
+        """
+        self.collector = collector
+        self.writer = collector.create_batch_writer(on_flush=on_flush)
+        if self.writer is None:
+            raise RuntimeError("DatabaseSink needs a database connection")
+
+    def write(self, record: Dict):
+        restaurant = record['restaurant']
+        self.writer.add('restaurants', self.collector.restaurant_row(restaurant))
+        for taco in record['tacos']:
+            self.writer.add('tacos', self.collector.taco_row(taco))
+        for photo in record['photos']:
+            self.writer.add('photos', self.collector.photo_row(photo))
+        for link in record['taco_photos']:
+            self.writer.add('taco_photos', self.collector.taco_photo_row(link))
+        for review in record['reviews']:
+            self.writer.add('reviews', self.collector.review_row(review, restaurant['id']))
+
+    def close(self):
+        self.writer.close()
+        if self.writer.failed_rows:
+            failed_tables = sorted({table for table, _, _ in self.writer.failed_rows})
+            logger.warning(f"{len(self.writer.failed_rows)} rows could not be written ({', '.join(failed_tables)}); "
+                           f"see errors above")
+
+
+class CsvSink:
+    """Appends records to one CSV file per table as they arrive"""
+
+    def __init__(self, base_filename: str):
+        """
+        Args:
+            base_filename: Files are written as <base_filename>_<table>_<timestamp>.csv, like save_data
+        """
+        self.base_filename = base_filename
+        self.timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.files = {}
+        self.writers = {}
+
+    def _filename(self, table: str) -> str:
+        return f"{self.base_filename}_{table}_{self.timestamp}.csv"
+
+    def _open(self, table: str, fieldnames: List[str], offset: int = None):
+        """Open a table's file, fresh with a header or, at offset, to continue a checkpointed one"""
+        filename = self._filename(table)
+        if offset is None:
+            self.files[table] = open(filename, 'w', newline='', encoding='utf-8')
+        else:
+            self.files[table] = open(filename, 'a', newline='', encoding='utf-8')
+            self.files[table].truncate(offset)
+        self.writers[table] = csv.DictWriter(self.files[table], fieldnames=fieldnames, extrasaction='ignore')
+        if offset is None:
+            self.writers[table].writeheader()
+            logger.info(f"Streaming {table} to {filename}")
+        else:
+            logger.info(f"Continuing {table} in {filename} from byte {offset}")
+
+    def write(self, record: Dict):
+        for table in RECORD_TABLES:
+            rows = record_rows(record, table)
+            if not rows:
+                continue
+            if table not in self.writers:
+                self._open(table, list(rows[0].keys()))
+            self.writers[table].writerows(rows)
+
+    def checkpoint(self) -> Dict:
+        """Flush and fsync every file, returning where each ends"""
+        files = {}
+        for table, f in self.files.items():
+            f.flush()
+            os.fsync(f.fileno())
+            files[table] = {'offset': f.tell(), 'fieldnames': self.writers[table].fieldnames}
+        return {'timestamp': self.timestamp, 'files': files}
+
+    def resume(self, state: Dict):
+        """Continue the files of an interrupted run from its last checkpoint"""
+        self.close()
+        self.files, self.writers = {}, {}
+        self.timestamp = state['timestamp']
+        for table in RECORD_TABLES:
+            if table in state['files']:
+                self._open(table, state['files'][table]['fieldnames'], offset=state['files'][table]['offset'])
+            elif os.path.exists(self._filename(table)):
+                # Created after the last checkpoint, so it only holds rows that will be written again
+                os.remove(self._filename(table))
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+def parquet_schemas() -> Dict[str, 'pa.Schema']:
+    """Arrow schemas for the record tables (requires pyarrow)"""
+    return {
+        'restaurants': pa.schema([
+            ('id', pa.string()), ('place_id', pa.string()), ('name', pa.string()),
+            ('street_address', pa.string()), ('city', pa.string()), ('state', pa.string()),
+            ('zip', pa.string()), ('latitude', pa.float64()), ('longitude', pa.float64()),
+            ('phone', pa.string()), ('website', pa.string()), ('yelp_id', pa.string()),
+            ('google_rating', pa.float64()), ('google_price_level', pa.int32()),
+            ('google_user_ratings_total', pa.int32()), ('bean_cheese_likelihood_score', pa.int32()),
+        ]),
+        'tacos': pa.schema([
+            ('id', pa.string()), ('restaurant_id', pa.string()), ('name', pa.string()),
+            ('description', pa.string()), ('price_cents', pa.int32()), ('calories', pa.int32()),
+            ('tortilla_type', pa.string()), ('protein_type', pa.string()), ('is_vegan', pa.bool_()),
+            ('is_bulk', pa.bool_()), ('is_daily_special', pa.bool_()), ('available_from', pa.string()),
+            ('available_to', pa.string()), ('mention_count', pa.int32()), ('price_confidence', pa.float64()),
+        ]),
+        'reviews': pa.schema([
+            ('id', pa.string()), ('restaurant_place_id', pa.string()), ('author_name', pa.string()),
+            ('author_url', pa.string()), ('rating', pa.int32()), ('text', pa.string()), ('time', pa.int64()),
+            ('relative_time_description', pa.string()), ('language', pa.string()), ('review_date', pa.string()),
+        ]),
+        'photos': pa.schema([
+            ('id', pa.string()), ('restaurant_id', pa.string()), ('taco_id', pa.string()),
+            ('photo_reference', pa.string()), ('user_id', pa.string()), ('url', pa.string()),
+            ('is_user_uploaded', pa.bool_()),
+        ]),
+        'taco_photos': pa.schema([
+            ('taco_id', pa.string()), ('photo_id', pa.string()),
+        ]),
+    }
+
+
+class ParquetSink:
+    """Writes records to one Parquet (or Arrow IPC) file per table, a row group at a time (requires pyarrow)"""
+
+    def __init__(self, base_filename: str, row_group_size: int = 10000, file_format: str = 'parquet',
+                 compression: str = None):
+        """
+        Args:
+            base_filename: Files are written as <base_filename>_<table>_<timestamp>.parquet (or .arrow)
+            row_group_size: Rows buffered per table before a row group is written
+            file_format: 'parquet' or 'arrow'
+            compression: Codec (default zstd for Parquet, none for Arrow so it can be memory-mapped)
+        """
+        require_pyarrow()
+
+        self.base_filename = base_filename
+        self.timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.row_group_size = row_group_size
+        self.file_format = file_format
+        self.compression = compression
+        self.schemas = parquet_schemas()
+        self.writers: Dict[str, ColumnarWriter] = {}
+
+    def write(self, record: Dict):
+        for table in RECORD_TABLES:
+            rows = record_rows(record, table)
+            if not rows:
+                continue
+            if table not in self.writers:
+                filename = f"{self.base_filename}_{table}_{self.timestamp}.{EXTENSIONS[self.file_format]}"
+                self.writers[table] = ColumnarWriter(filename, self.schemas[table], self.file_format,
+                                                     batch_size=self.row_group_size, compression=self.compression)
+                logger.info(f"Streaming {table} to {filename}")
+            for row in rows:
+                self.writers[table].write(row)
+
+    def checkpoint(self):
+        """Parquet footers and Arrow end-of-stream markers are written on close, so nothing is durable before it"""
+        return None
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
@@ -0,0 +1,109 @@
+"""
+Shared fixtures for the data collection tests
+
+Run from the data_collection directory:
+
+    python -m pytest tests
+
+Tests that take the `database` or `db_connection` fixture run against the
+PostgreSQL server from docker-compose.yml (POSTGRES_* env), each in a throwaway
+database that is dropped afterwards; they are skipped when the server can't
+be reached. Collector tests that make API calls use the mock Places server
+from benchmarks/.
+"""
+
+import os
+import sys
+import uuid
+
+import psycopg2
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+import db
+from bc_tacos import GooglePlacesTacoCollector
+from mock_places_server import MockPlacesServer, SyntheticPlaces
+from rate_limiter import TokenBucketRateLimiter
+from schema import migrate
+
+
+class NoDatabasePool:
+    """Pool stand-in for collectors that must not touch a database"""
+
+    def getconn(self, **kwargs):
+        raise psycopg2.OperationalError("no database in this test")
+
+
+def run_admin_sql(sql: str):
+    connection = psycopg2.connect(
+        host=os.getenv("POSTGRES_HOST", "localhost"),
+        port=os.getenv("POSTGRES_PORT", "5432"),
+        database=os.getenv("TEST_ADMIN_DB", "postgres"),
+        user=os.getenv("POSTGRES_USER", "tacos"),
+        password=os.getenv("POSTGRES_PASSWORD", "tacos_password"),
+        connect_timeout=3,
+    )
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Name of an empty database the shared pool (db.get_pool) points at"""
+    name = f"taco_test_{uuid.uuid4().hex[:12]}"
+    try:
+        run_admin_sql(f"CREATE DATABASE {name} ENCODING 'UTF8' TEMPLATE template0")
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not reachable: {e}")
+
+    monkeypatch.setenv("POSTGRES_DB", name)
+    db.close_pool()
+    try:
+        yield name
+    finally:
+        db.close_pool()
+        run_admin_sql(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+
+
+@pytest.fixture
+def db_connection(database):
+    """Autocommit connection to a migrated, empty database"""
+    connection = db.get_pool().getconn(autocommit=True)
+    migrate(connection)
+    try:
+        yield connection
+    finally:
+        db.get_pool().putconn(connection)
+
+
+@pytest.fixture
+def offline_collector():
+    """Collector without a database, for the pure extraction and scoring methods"""
+    return GooglePlacesTacoCollector('test-key', db_pool=NoDatabasePool())
+
+
+@pytest.fixture(scope='module')
+def mock_places():
+    """Mock Places server over 300 synthetic places"""
+    server = MockPlacesServer(SyntheticPlaces(300)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def make_collector(mock_places):
+    """Factory for collectors pointed at the mock server, without rate limiting or page token waits"""
+    def make(**kwargs) -> GooglePlacesTacoCollector:
+        kwargs.setdefault('db_pool', NoDatabasePool())
+        collector = GooglePlacesTacoCollector('test-key', base_url=mock_places.base_url,
+                                              rate_limiter=TokenBucketRateLimiter(qps=10000, burst=100),
+                                              **kwargs)
+        collector.page_token_delay = 0
+        return collector
+    return make
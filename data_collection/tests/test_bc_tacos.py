@@ -0,0 +1,169 @@
+import copy
+import time
+
+import pytest
+
+from bc_tacos import GooglePlacesTacoCollector
+from benchmark_candidate_scoring import make_places
+from conftest import NoDatabasePool
+from geo_tiles import point_in_polygon
+from mock_places_server import MockPlacesServer, SyntheticPlaces
+from rate_limiter import TokenBucketRateLimiter
+
+
+@pytest.fixture
+def jittery_places():
+    """Mock server whose responses come back out of order"""
+    server = MockPlacesServer(SyntheticPlaces(50), jitter_ms=20).start()
+    yield server
+    server.stop()
+
+
+def test_iter_place_details_yields_in_input_order(jittery_places):
+    collector = GooglePlacesTacoCollector('test-key', max_concurrent_requests=8, base_url=jittery_places.base_url,
+                                          rate_limiter=TokenBucketRateLimiter(qps=10000, burst=100),
+                                          db_pool=NoDatabasePool())
+    place_ids = jittery_places.dataset.place_ids[::-1]
+
+    results = list(collector.iter_place_details(place_ids))
+
+    assert [place_id for place_id, _ in results] == place_ids
+    assert all(details['place_id'] == place_id for place_id, details in results)
+
+
+def test_failed_details_are_none_and_keep_their_slot(make_collector, mock_places):
+    collector = make_collector(max_concurrent_requests=4)
+    place_ids = [mock_places.dataset.place_ids[0], 'no-such-place', mock_places.dataset.place_ids[1]]
+
+    details = collector.fetch_place_details(place_ids)
+
+    assert details[0]['place_id'] == place_ids[0]
+    assert details[1] is None
+    assert details[2]['place_id'] == place_ids[2]
+
+
+def test_sequential_and_concurrent_fetches_agree(make_collector, mock_places):
+    place_ids = mock_places.dataset.place_ids[:30]
+
+    sequential = make_collector(max_concurrent_requests=1).fetch_place_details(place_ids)
+    concurrent = make_collector(max_concurrent_requests=8).fetch_place_details(place_ids)
+
+    assert [d['place_id'] for d in sequential] == [d['place_id'] for d in concurrent] == place_ids
+
+
+@pytest.fixture
+def slow_token_places():
+    """Mock server that refuses page tokens used within 0.3s of being issued"""
+    server = MockPlacesServer(SyntheticPlaces(300), token_delay=0.3).start()
+    yield server
+    server.stop()
+
+
+def center_queries(dataset, keywords):
+    south, west, north, east = dataset.bounds
+    return [{'lat': (south + north) / 2, 'lng': (west + east) / 2, 'radius': 5000, 'keyword': keyword}
+            for keyword in keywords]
+
+
+def test_interleaved_pagination_overlaps_page_token_waits(make_collector, slow_token_places):
+    collector = make_collector()
+    collector.base_url = slow_token_places.base_url
+    collector.page_token_delay = 0.3
+    queries = center_queries(slow_token_places.dataset, ['taco', 'breakfast taco', 'taqueria', 'tex mex'])
+
+    start = time.monotonic()
+    places = collector.search_interleaved(queries)
+    elapsed = time.monotonic() - start
+
+    # Every query has 3 pages; run one after another the token waits alone would take 4 * 2 * 0.3s
+    assert slow_token_places.request_counts['place/nearbysearch/json'] == 12
+    assert elapsed < 1.2
+    assert len(places) == 60
+    assert len({place['place_id'] for place in places}) == 60
+
+
+def test_early_page_tokens_are_retried(make_collector, slow_token_places):
+    collector = make_collector()
+    collector.base_url = slow_token_places.base_url
+    collector.page_token_delay = 0.25  # too early by 0.05s; the retry 0.125s later is in time
+
+    places = collector.search_interleaved(center_queries(slow_token_places.dataset, ['taco']))
+
+    assert len(places) == 60
+    assert slow_token_places.request_counts['place/nearbysearch/json'] == 5
+
+
+def test_completed_queries_report_truncation(make_collector, mock_places):
+    collector = make_collector()
+    completed = []
+
+    def on_query_complete(query, result_count, truncated):
+        completed.append((query['radius'], result_count, truncated))
+        if query['radius'] == 5000:
+            return [{**query, 'radius': 50}]
+        return []
+
+    collector.search_interleaved(center_queries(mock_places.dataset, ['taco']), on_query_complete)
+
+    assert completed[0] == (5000, 60, True)
+    assert completed[1][0] == 50 and completed[1][1] < 60 and completed[1][2] is False
+
+
+def test_area_search_splits_truncated_tiles_until_everything_is_found(make_collector, mock_places):
+    collector = make_collector()
+
+    places = collector.search_area(bounds=mock_places.dataset.bounds, keywords=['taco'])
+
+    assert {place['place_id'] for place in places} == set(mock_places.dataset.place_ids)
+
+
+def test_area_search_keeps_only_places_inside_the_polygon(make_collector, mock_places):
+    dataset = mock_places.dataset
+    south, west, north, east = dataset.bounds
+    triangle = [(south, west), (north, west), (south, east)]
+    inside = {place_id for place_id, lat, lng in zip(dataset.place_ids, dataset.lats, dataset.lngs)
+              if point_in_polygon(lat, lng, triangle)}
+
+    places = make_collector().search_area(polygon=triangle, keywords=['taco'])
+
+    assert {place['place_id'] for place in places} == inside
+
+
+@pytest.mark.parametrize('method', ['filter_bean_cheese_candidates', 'rank_bean_cheese_candidates'])
+def test_candidates_are_scored_by_distinct_keywords_and_ranked(offline_collector, method):
+    places = [
+        {'place_id': 'one', 'name': 'Taqueria Garcia', 'types': ['restaurant']},
+        {'place_id': 'pizza', 'name': 'Pizza Palace', 'types': ['restaurant']},
+        {'place_id': 'three', 'name': 'El Taco Loco', 'types': ['mexican_restaurant']},
+        {'place_id': 'bar', 'name': 'Los Tacos Bar', 'types': ['bar']},
+        {'place_id': 'hotel', 'name': 'Hotel Laredo', 'types': ['lodging']},
+    ]
+
+    ranked = getattr(offline_collector, method)(places)
+
+    # 'bar' is a single negative outweighed by two positives; 'hotel' doesn't contain 'el'
+    assert [(place['place_id'], place['bean_cheese_likelihood_score']) for place in ranked] == \
+        [('three', 3), ('one', 1), ('bar', 1)]
+
+
+def test_photos_are_keyed_on_the_restaurant_not_the_taco(offline_collector):
+    details = {'photos': [{'photo_reference': 'ref-1'}, {'height': 100}, {'photo_reference': 'ref-2'}]}
+
+    first = offline_collector.extract_photos_data(details, 'restaurant-1', 'taco-1')
+    second = offline_collector.extract_photos_data(details, 'restaurant-1', 'taco-2')
+
+    assert [photo['photo_reference'] for photo in first] == ['ref-1', 'ref-2']
+    assert [photo['id'] for photo in first] == [photo['id'] for photo in second]
+    assert first[0]['id'] != offline_collector.extract_photos_data(details, 'restaurant-2')[0]['id']
+    assert {photo['restaurant_id'] for photo in first} == {'restaurant-1'}
+
+
+def test_batch_scoring_ranks_like_the_per_place_loop(offline_collector):
+    places = make_places(3000, seed=3) + [{'place_id': 'no-name', 'types': []}]
+
+    loop = offline_collector.filter_bean_cheese_candidates(copy.deepcopy(places))
+    batch = offline_collector.rank_bean_cheese_candidates(copy.deepcopy(places))
+
+    assert [(place['place_id'], place['bean_cheese_likelihood_score']) for place in batch] == \
+        [(place['place_id'], place['bean_cheese_likelihood_score']) for place in loop]
+    assert offline_collector.rank_bean_cheese_candidates([]) == []
@@ -0,0 +1,22 @@
+import json
+import os
+import subprocess
+import sys
+
+BENCHMARK = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks', 'benchmark_pipeline.py')
+
+
+def test_benchmark_runs_collect_photos_and_export_against_postgres(database, tmp_path):
+    # `database` only checks the server is reachable; the benchmark makes and drops its own
+    output = tmp_path / 'results.json'
+
+    subprocess.run([sys.executable, BENCHMARK, '200', '--photos', '--export-workers', '2', '--output', str(output)],
+                   check=True, capture_output=True, text=True, timeout=300)
+
+    [result] = json.loads(output.read_text(encoding='utf-8'))['results']
+    assert result['places_processed'] > 0
+    assert result['db_rows_written'] > result['places_processed']
+    assert result['photos_failed'] == 0
+    assert result['photos_stored'] == result['mock_requests']['place/photo'] > 0
+    assert result['export_rows'] > 0
+    assert result['mock_requests']['place/details/json'] == result['places_processed']
@@ -0,0 +1,163 @@
+import pytest
+
+from bc_tacos import GooglePlacesTacoCollector
+from run_journal import RunJournal
+
+
+def count(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+@pytest.fixture
+def user_favorites(db_connection):
+    """A Rails table with a foreign key into the collector's restaurants, holding one favorite"""
+    with db_connection.cursor() as cursor:
+        cursor.execute("""
+            CREATE TABLE user_favorites (
+                id BIGSERIAL PRIMARY KEY,
+                restaurant_id UUID NOT NULL REFERENCES restaurants(id)
+            );
+            INSERT INTO restaurants (name) VALUES ('Taqueria');
+            INSERT INTO user_favorites (restaurant_id) SELECT id FROM restaurants;
+        """)
+
+
+def test_clearing_cascades_into_referencing_tables(db_connection, user_favorites):
+    collector = GooglePlacesTacoCollector('test-key')
+    try:
+        assert collector.clear_collected_data() is True
+    finally:
+        collector.close_database_connection()
+
+    assert count(db_connection, 'restaurants') == 0
+    assert count(db_connection, 'user_favorites') == 0
+
+
+def test_failed_clear_stops_the_run_without_leaving_it_resumable(db_connection, tmp_path, make_collector):
+    with db_connection.cursor() as cursor:
+        cursor.execute("DROP TABLE taco_photos")
+    journal_path = str(tmp_path / 'journal.jsonl')
+    collector = make_collector(db_pool=None, journal=RunJournal(journal_path))
+    try:
+        assert collector.clear_collected_data() is False
+
+        with pytest.raises(RuntimeError):
+            next(collector.iter_place_records(lat=29.42, lng=-98.49, radius=5000))
+    finally:
+        collector.journal.close()
+        collector.close_database_connection()
+
+    assert RunJournal(journal_path).completed is True
+
+
+class DisconnectingSink:
+    """Sink that drops the collector's database connection just before the final flush"""
+
+    def __init__(self, admin_connection, collector):
+        self.admin_connection = admin_connection
+        self.collector = collector
+        self.records = 0
+
+    def write(self, record):
+        self.records += 1
+
+    def close(self):
+        with self.admin_connection.cursor() as cursor:
+            cursor.execute("SELECT pg_terminate_backend(%s)", (self.collector.db_connection.get_backend_pid(),))
+
+
+def search_center(dataset):
+    south, west, north, east = dataset.bounds
+    return {'lat': (south + north) / 2, 'lng': (west + east) / 2, 'radius': 5000}
+
+
+def test_pipeline_completes_the_journal_after_writing_everything(db_connection, tmp_path, make_collector,
+                                                                  mock_places):
+    journal_path = str(tmp_path / 'journal.jsonl')
+    collector = make_collector(db_pool=None, journal=RunJournal(journal_path))
+    try:
+        processed = collector.run_pipeline([], **search_center(mock_places.dataset))
+    finally:
+        collector.journal.close()
+        collector.close_database_connection()
+
+    assert processed > 0
+    assert count(db_connection, 'restaurants') == processed
+    assert RunJournal(journal_path).completed is True
+
+
+def test_failed_final_flush_leaves_the_run_resumable(db_connection, tmp_path, make_collector, mock_places):
+    journal_path = str(tmp_path / 'journal.jsonl')
+    collector = make_collector(db_pool=None, journal=RunJournal(journal_path))
+    collector.write_batch_size = 10 ** 6  # everything waits for the final flush
+    collector.write_flush_interval = 3600
+    try:
+        with pytest.raises(Exception):
+            collector.run_pipeline([DisconnectingSink(db_connection, collector)], **search_center(mock_places.dataset))
+    finally:
+        collector.journal.close()
+        collector.close_database_connection()
+
+    assert count(db_connection, 'restaurants') == 0
+    journal = RunJournal(journal_path)
+    assert journal.completed is False
+    assert journal.done_place_ids == set()
+    assert journal.candidates
+
+
+def test_photos_are_stored_once_and_linked_to_their_tacos(db_connection, make_collector, mock_places):
+    collector = make_collector(db_pool=None)
+    try:
+        collector.run_pipeline([], **search_center(mock_places.dataset))
+    finally:
+        collector.close_database_connection()
+
+    with db_connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT COUNT(*), COUNT(DISTINCT (restaurant_id, photo_reference)),
+                   COUNT(*) FILTER (WHERE taco_id IS NULL OR restaurant_id IS NULL)
+            FROM photos
+        """)
+        photos, distinct_photos, unattached = cursor.fetchone()
+        # Every photo is linked to every taco found at its restaurant
+        cursor.execute("""
+            SELECT COUNT(*) FROM photos JOIN tacos USING (restaurant_id)
+            LEFT JOIN taco_photos ON taco_photos.photo_id = photos.id AND taco_photos.taco_id = tacos.id
+            WHERE taco_photos.photo_id IS NULL
+        """)
+        unlinked = cursor.fetchone()[0]
+
+    assert photos > 0
+    assert photos == distinct_photos == count(db_connection, 'taco_photos')
+    assert unattached == unlinked == 0
+
+
+def test_incremental_runs_reuse_stored_photo_ids(db_connection, make_collector, mock_places):
+    collector = make_collector(db_pool=None)
+    try:
+        collector.run_pipeline([], **search_center(mock_places.dataset))
+    finally:
+        collector.close_database_connection()
+    with db_connection.cursor() as cursor:
+        # Ids the collector can't rederive, like the copies migration 4 kept, and places due a refresh
+        cursor.execute("""
+            DELETE FROM taco_photos;
+            UPDATE photos SET id = gen_random_uuid();
+            UPDATE restaurants SET updated_at = NOW() - INTERVAL '2 days';
+            SELECT id FROM photos;
+        """)
+        photo_ids = {row[0] for row in cursor.fetchall()}
+
+    collector = make_collector(db_pool=None, incremental=True)
+    try:
+        collector.run_pipeline([], **search_center(mock_places.dataset))
+    finally:
+        collector.close_database_connection()
+
+    with db_connection.cursor() as cursor:
+        cursor.execute("SELECT id FROM photos")
+        assert {row[0] for row in cursor.fetchall()} == photo_ids
+        cursor.execute("SELECT photo_id FROM taco_photos")
+        assert {row[0] for row in cursor.fetchall()} == photo_ids
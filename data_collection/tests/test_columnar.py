@@ -0,0 +1,90 @@
+import os
+
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from columnar import ColumnarWriter, load_tables, read_table, write_dataframe
+from sinks import ParquetSink
+
+SCHEMA = pa.schema([('id', pa.string()), ('rating', pa.int32()), ('created_at', pa.timestamp('us'))])
+
+ROWS = [{'id': f"r{i}", 'rating': i, 'created_at': f"2024-01-0{i + 1}T12:00:00", 'extra': 'dropped'}
+        for i in range(5)]
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_writer_round_trips_typed_rows_in_batches(tmp_path, file_format):
+    path = str(tmp_path / f"rows.{file_format}")
+    writer = ColumnarWriter(path, SCHEMA, file_format, batch_size=2)
+    for row in ROWS:
+        writer.write(row)
+    writer.write({'id': 'missing'})
+    writer.close()
+
+    table = read_table(path)
+    assert writer.count == 6
+    assert table.schema == SCHEMA
+    assert table.column('id').to_pylist() == [f"r{i}" for i in range(5)] + ['missing']
+    assert table.column('rating').to_pylist()[-2:] == [4, None]
+    assert table.column('created_at').to_pylist()[0].isoformat() == '2024-01-01T12:00:00'
+    if file_format == 'parquet':
+        assert pq.ParquetFile(path).metadata.num_row_groups == 3
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ColumnarWriter(str(tmp_path / 'rows.csv'), SCHEMA, 'csv')
+    with pytest.raises(ValueError):
+        write_dataframe(pd.DataFrame({'a': [1]}), str(tmp_path / 'rows.csv'), 'csv')
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_dataframes_keep_their_column_types(tmp_path, file_format):
+    df = pd.DataFrame({'name': ['Taqueria', None], 'rating': [4.5, 3.0], 'reviews': [10, 20],
+                       'open': [True, False]})
+    path = str(tmp_path / f"restaurants.{file_format}")
+
+    write_dataframe(df, path, file_format)
+
+    pd.testing.assert_frame_equal(read_table(path).to_pandas(), df)
+
+
+def test_load_tables_prefers_the_newest_arrow_file(tmp_path):
+    write_dataframe(pd.DataFrame({'v': [1]}), str(tmp_path / 'data_tacos_20240101_000000.parquet'))
+    write_dataframe(pd.DataFrame({'v': [2]}), str(tmp_path / 'data_tacos_20240102_000000.parquet'))
+    write_dataframe(pd.DataFrame({'v': [3]}), str(tmp_path / 'data_reviews_20240101_000000.parquet'))
+    write_dataframe(pd.DataFrame({'v': [4]}), str(tmp_path / 'data_reviews_20240101_000000.arrow'), 'arrow')
+    write_dataframe(pd.DataFrame({'v': [5]}), str(tmp_path / 'restaurants.arrow'), 'arrow')
+
+    tables = load_tables(str(tmp_path))
+
+    assert {name: list(df['v']) for name, df in tables.items()} == {'tacos': [2], 'reviews': [4],
+                                                                   'restaurants': [5]}
+    assert isinstance(load_tables(str(tmp_path), as_pandas=False)['tacos'], pa.Table)
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_parquet_sink_writes_one_typed_file_per_table(tmp_path, file_format):
+    record = {
+        'place_id': 'place-1',
+        'restaurant': {'id': 'r1', 'place_id': 'place-1', 'name': 'Taqueria', 'google_rating': 4.5,
+                       'google_user_ratings_total': 12},
+        'tacos': [{'id': 't1', 'restaurant_id': 'r1', 'name': 'Bean and Cheese', 'is_vegan': False}],
+        'reviews': [{'id': 'v1', 'text': 'Great', 'rating': 5, 'time': 1700000000}],
+        'photos': [],
+        'taco_photos': [],
+    }
+    sink = ParquetSink(str(tmp_path / 'out'), row_group_size=1, file_format=file_format)
+    sink.write(record)
+    sink.write({**record, 'restaurant': {**record['restaurant'], 'id': 'r2'}, 'tacos': []})
+    sink.close()
+
+    assert sorted(path.rsplit('_', 3)[-3] for path in os.listdir(tmp_path)) == ['restaurants', 'reviews', 'tacos']
+    tables = load_tables(str(tmp_path), as_pandas=False)
+    assert tables['restaurants'].column('id').to_pylist() == ['r1', 'r2']
+    assert tables['restaurants'].schema.field('google_user_ratings_total').type == pa.int32()
+    assert tables['reviews'].column('time').to_pylist() == [1700000000, 1700000000]
+    assert tables['tacos'].column('is_vegan').to_pylist() == [False]
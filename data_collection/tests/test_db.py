@@ -0,0 +1,85 @@
+import threading
+import time
+
+import psycopg2.pool
+import pytest
+
+import db
+from conftest import run_admin_sql
+from db import ConnectionPool
+
+
+@pytest.fixture
+def pool(database, monkeypatch):
+    monkeypatch.setenv("DB_POOL_MAX", "2")
+    pool = ConnectionPool.from_env(health_check_interval=0)
+    yield pool
+    pool.closeall()
+
+
+def backend_pid(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        return cursor.fetchone()[0]
+
+
+def test_exhausted_pool_waits_for_a_return(pool):
+    first = pool.getconn()
+    second = pool.getconn()
+    with pytest.raises(psycopg2.pool.PoolError):
+        pool.getconn(timeout=0.05)
+
+    threading.Timer(0.1, pool.putconn, args=(first,)).start()
+    start = time.monotonic()
+    third = pool.getconn(timeout=5)
+
+    assert time.monotonic() - start >= 0.05
+    assert third is first
+    pool.putconn(second)
+    pool.putconn(third)
+
+
+def test_exhausted_pool_waits_forever_by_default(pool):
+    first = pool.getconn()
+    second = pool.getconn()
+
+    threading.Timer(0.2, pool.putconn, args=(first,)).start()
+    start = time.monotonic()
+    third = pool.getconn()
+
+    assert time.monotonic() - start >= 0.15
+    assert third is first
+    pool.putconn(second)
+    pool.putconn(third)
+
+
+def test_returned_connections_are_rolled_back(pool):
+    with pool.connection(autocommit=False) as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE TABLE scratch (id INTEGER)")
+
+    with pool.connection() as connection:
+        assert connection.autocommit is True
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('scratch')")
+            assert cursor.fetchone()[0] is None
+
+
+def test_connections_dropped_by_the_server_are_replaced(pool):
+    with pool.connection() as connection:
+        dropped_pid = backend_pid(connection)
+
+    run_admin_sql(f"SELECT pg_terminate_backend({dropped_pid})")
+
+    with pool.connection() as connection:
+        assert backend_pid(connection) != dropped_pid
+
+
+def test_shared_pool_follows_the_environment(database):
+    with db.get_pool().connection() as connection, connection.cursor() as cursor:
+        cursor.execute("SELECT current_database()")
+        assert cursor.fetchone()[0] == database
+
+    assert db.get_pool() is db.get_pool()
+    db.close_pool()
+    assert db._default_pool is None
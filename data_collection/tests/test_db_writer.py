@@ -0,0 +1,85 @@
+import uuid
+
+from db_writer import BatchWriter
+from metrics import RunMetrics
+
+COLUMNS = {'restaurants': ['id', 'name', 'place_id'], 'tacos': ['id', 'restaurant_id', 'name']}
+
+
+def count(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+def restaurant(name):
+    return (str(uuid.uuid4()), name, f"place-{name}")
+
+
+def test_rows_are_buffered_until_the_batch_size(db_connection):
+    writer = BatchWriter(db_connection, COLUMNS, batch_size=3, flush_interval=3600)
+
+    writer.add('restaurants', restaurant('a'))
+    writer.add('restaurants', restaurant('b'))
+    assert count(db_connection, 'restaurants') == 0
+
+    writer.add('restaurants', restaurant('c'))
+    assert count(db_connection, 'restaurants') == 3
+    assert writer.rows_written == {'restaurants': 3, 'tacos': 0}
+
+
+def test_old_rows_are_flushed_by_the_interval(db_connection):
+    writer = BatchWriter(db_connection, COLUMNS, batch_size=1000, flush_interval=0)
+
+    writer.add('restaurants', restaurant('a'))
+
+    assert count(db_connection, 'restaurants') == 1
+
+
+def test_tables_flush_in_foreign_key_order_and_close_flushes_the_rest(db_connection):
+    flushes = []
+    metrics = RunMetrics()
+    writer = BatchWriter(db_connection, COLUMNS, batch_size=1000, flush_interval=3600,
+                         on_flush=lambda: flushes.append(count(db_connection, 'tacos')), metrics=metrics)
+    parent = restaurant('a')
+
+    # The taco is buffered first but written after the restaurant it references
+    writer.add('tacos', (str(uuid.uuid4()), parent[0], 'Bean and Cheese'))
+    writer.add('restaurants', parent)
+    writer.close()
+
+    assert flushes == [1]
+    assert metrics.rows_written == {'restaurants': 1, 'tacos': 1}
+    assert metrics.db_flushes == 1
+
+
+def test_a_bad_row_is_isolated_without_losing_the_batch(db_connection):
+    writer = BatchWriter(db_connection, COLUMNS, batch_size=1000, flush_interval=3600)
+    parent = restaurant('a')
+    writer.add('restaurants', parent)
+    writer.add('tacos', (str(uuid.uuid4()), parent[0], 'Bean and Cheese'))
+    orphan = (str(uuid.uuid4()), str(uuid.uuid4()), 'Orphan')
+    writer.add('tacos', orphan)
+
+    assert writer.flush() == 2
+
+    assert count(db_connection, 'restaurants') == 1
+    assert count(db_connection, 'tacos') == 1
+    assert [(table, row) for table, row, _ in writer.failed_rows] == [('tacos', orphan)]
+    assert 'foreign key' in writer.failed_rows[0][2]
+
+
+def test_conflict_clauses_make_writes_upserts(db_connection):
+    with db_connection.cursor() as cursor:
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS restaurants_place_id_test ON restaurants (place_id)")
+    writer = BatchWriter(db_connection, COLUMNS, batch_size=1000, flush_interval=3600, conflict_clauses={
+        'restaurants': 'ON CONFLICT (place_id) DO UPDATE SET name = EXCLUDED.name'})
+
+    writer.add('restaurants', (str(uuid.uuid4()), 'Old Name', 'place-1'))
+    writer.flush()
+    writer.add('restaurants', (str(uuid.uuid4()), 'New Name', 'place-1'))
+    writer.flush()
+
+    with db_connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM restaurants")
+        assert cursor.fetchall() == [('New Name',)]
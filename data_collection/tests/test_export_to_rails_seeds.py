@@ -0,0 +1,273 @@
+import json
+import os
+from datetime import timedelta
+
+import pytest
+
+import db
+import export_to_rails_seeds
+from export_to_rails_seeds import (JsonArrayWriter, NdjsonWriter, SEEDS_RB, export_delta, export_full, export_table,
+                                   export_table_file, prune_deleted_rows)
+
+RESTAURANT_IDS = [f"00000000-0000-0000-0000-00000000000{i}" for i in range(1, 6)]
+
+
+@pytest.fixture
+def seeded_db(db_connection):
+    """Five restaurants, each with a taco, a photo and a review"""
+    with db_connection.cursor() as cursor:
+        for i, restaurant_id in enumerate(RESTAURANT_IDS):
+            cursor.execute("""
+                INSERT INTO restaurants (id, name, place_id) VALUES (%(r)s, %(name)s, %(place)s);
+                INSERT INTO tacos (id, restaurant_id, name, description)
+                    VALUES (replace(%(r)s, '0000-0000-0000', '1111-0000-0000')::uuid, %(r)s,
+                            'Bean and Cheese Taco', 'Jalapeño crema');
+                INSERT INTO photos (taco_id, restaurant_id, photo_reference, url)
+                    VALUES (replace(%(r)s, '0000-0000-0000', '1111-0000-0000')::uuid, %(r)s, %(ref)s,
+                            'https://example.com/photo.jpg');
+                INSERT INTO reviews (restaurant_id, review_text, author_name)
+                    VALUES (%(r)s, 'Très bon “taco”', 'José');
+            """, {'r': restaurant_id, 'name': f"Taqueria {i}", 'place': f"place-{i}", 'ref': f"ref-{i}"})
+    return db_connection
+
+
+@pytest.fixture
+def export_connection(seeded_db):
+    """Connection in a read-only repeatable read transaction, like main() uses"""
+    connection = db.get_pool().getconn(autocommit=False)
+    connection.set_session(isolation_level='REPEATABLE READ', readonly=True)
+    yield connection
+    connection.rollback()
+    connection.set_session(isolation_level='DEFAULT', readonly='DEFAULT')
+    db.get_pool().putconn(connection)
+
+
+@pytest.mark.parametrize('items', [[], [{'a': 1}], [{'a': [1, {'b': 'ñ'}]}, 'x', None, {'nested': {'deep': [1, 2]}}]])
+def test_json_array_writer_matches_json_dump(tmp_path, items):
+    path = tmp_path / 'out.json'
+    with open(path, 'w', encoding='utf-8') as f:
+        writer = JsonArrayWriter(f)
+        for item in items:
+            writer.write(item)
+        writer.close()
+
+    assert path.read_text(encoding='utf-8') == json.dumps(items, indent=2, ensure_ascii=False)
+    assert writer.count == len(items)
+
+
+def test_nested_json_array_writer_matches_json_dump(tmp_path):
+    items = [{'a': [1, 2]}, 'ñ']
+    path = tmp_path / 'out.json'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n  "outer": {\n    "items": ')
+        writer = JsonArrayWriter(f, depth=2)
+        for item in items:
+            writer.write(item)
+        writer.close()
+        f.write('\n  }\n}')
+
+    assert path.read_text(encoding='utf-8') == json.dumps({'outer': {'items': items}}, indent=2, ensure_ascii=False)
+
+
+def test_ndjson_writer_writes_one_object_per_line(tmp_path):
+    path = tmp_path / 'out.ndjson'
+    with open(path, 'w', encoding='utf-8') as f:
+        writer = NdjsonWriter(f)
+        writer.write({'a': 1})
+        writer.write({'b': 'ñ'})
+
+    assert [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()] == [{'a': 1}, {'b': 'ñ'}]
+
+
+def test_tables_stream_in_id_order_as_seed_records(tmp_path, export_connection):
+    path = tmp_path / 'restaurants.json'
+
+    count = export_table_file(export_connection, 'restaurants', str(path), itersize=2)
+
+    restaurants = json.loads(path.read_text(encoding='utf-8'))
+    assert count == 5
+    assert [restaurant['id'] for restaurant in restaurants] == RESTAURANT_IDS
+    assert 'place_id' not in restaurants[0]
+    assert restaurants[0]['created_at'].startswith('20')
+
+
+def test_text_columns_are_cleaned_for_the_seeds(tmp_path, export_connection):
+    with open(tmp_path / 'reviews.ndjson', 'w', encoding='utf-8') as f:
+        export_table(export_connection, 'reviews', f, output_format='ndjson', itersize=2)
+    with open(tmp_path / 'reviews.ndjson', encoding='utf-8') as f:
+        reviews = [json.loads(line) for line in f]
+
+    assert {review['author_name'] for review in reviews} == {'Jose'}
+    assert {review['review_text'] for review in reviews} == {'Tres bon "taco"'}
+
+
+def test_parallel_export_reads_one_snapshot(tmp_path, seeded_db, export_connection):
+    with export_connection.cursor() as cursor:
+        cursor.execute("SELECT pg_export_snapshot()")
+        snapshot_id = cursor.fetchone()[0]
+    # Committed after the snapshot, so no worker may see it
+    with seeded_db.cursor() as cursor:
+        cursor.execute("INSERT INTO restaurants (name) VALUES ('Too Late')")
+        cursor.execute("DELETE FROM reviews")
+
+    seeds_dir = tmp_path / 'seeds'
+    seeds_dir.mkdir()
+    counts = export_full(export_connection, snapshot_id, str(seeds_dir), str(tmp_path / 'seeds.rb'), workers=2)
+
+    assert counts == {'restaurants': 5, 'tacos': 5, 'photos': 5, 'reviews': 5}
+    restaurants = json.loads((seeds_dir / 'restaurants.json').read_text(encoding='utf-8'))
+    assert 'Too Late' not in {restaurant['name'] for restaurant in restaurants}
+    photos = json.loads((seeds_dir / 'photos.json').read_text(encoding='utf-8'))
+    assert {'restaurant_id', 'photo_reference', 'updated_at'}.isdisjoint(photos[0])
+
+
+def test_full_export_writes_seeds_rb_and_removes_the_other_format(tmp_path, export_connection):
+    seeds_dir = tmp_path / 'seeds'
+    seeds_dir.mkdir()
+    (seeds_dir / 'tacos.json').write_text('[]', encoding='utf-8')
+
+    export_full(export_connection, None, str(seeds_dir), str(tmp_path / 'seeds.rb'), output_format='ndjson',
+                workers=1)
+
+    assert sorted(os.listdir(seeds_dir)) == ['photos.ndjson', 'restaurants.ndjson', 'reviews.ndjson', 'tacos.ndjson']
+    assert (tmp_path / 'seeds.rb').read_text(encoding='utf-8') == SEEDS_RB
+
+
+@pytest.mark.parametrize('columnar_format', ['parquet', 'arrow'])
+def test_columnar_copy_matches_the_json_seeds(tmp_path, export_connection, columnar_format):
+    pytest.importorskip('pyarrow')
+    from columnar import load_tables
+
+    seeds_dir = tmp_path / 'seeds'
+    seeds_dir.mkdir()
+    export_full(export_connection, None, str(seeds_dir), str(tmp_path / 'seeds.rb'), workers=1,
+                columnar_dir=str(tmp_path / 'columnar'), columnar_format=columnar_format)
+
+    tables = load_tables(str(tmp_path / 'columnar'))
+    assert sorted(tables) == ['photos', 'restaurants', 'reviews', 'tacos']
+    reviews = json.loads((seeds_dir / 'reviews.json').read_text(encoding='utf-8'))
+    assert list(tables['reviews']['id']) == [review['id'] for review in reviews]
+    assert list(tables['reviews']['author_name']) == ['Jose'] * 5
+    assert str(tables['reviews']['created_at'].dtype).startswith('datetime64')
+    assert tables['restaurants']['created_at'][0].isoformat() == \
+        json.loads((seeds_dir / 'restaurants.json').read_text(encoding='utf-8'))[0]['created_at']
+
+
+def test_seeds_rb_bulk_loads_the_exported_files():
+    # seeds.rb reads the files rather than inlining every row, in foreign key order
+    assert 'insert_all' in SEEDS_RB and '.create!' not in SEEDS_RB
+    assert '"#{table}.json"' in SEEDS_RB and '"#{table}.ndjson"' in SEEDS_RB
+    order = [SEEDS_RB.index(f'insert_records.call({model}, "{table}")')
+             for model, table in [('Restaurant', 'restaurants'), ('Taco', 'tacos'), ('Photo', 'photos'),
+                                  ('Review', 'reviews')]]
+    assert order == sorted(order)
+
+
+def snapshot_time(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT now()")
+        return cursor.fetchone()[0]
+
+
+@pytest.fixture
+def no_overlap(monkeypatch):
+    monkeypatch.setattr(export_to_rails_seeds, 'WATERMARK_OVERLAP', timedelta(0))
+
+
+def read_delta(path):
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    delta = json.loads(text)
+    # Streamed, but identical to dumping the whole delta at once
+    assert text == json.dumps(delta, indent=2, ensure_ascii=False)
+    return delta['tables']
+
+
+def test_delta_ships_changed_rows_and_logged_deletes(tmp_path, seeded_db, no_overlap):
+    previous_state = {'exported_at': snapshot_time(seeded_db).isoformat()}
+    with seeded_db.cursor() as cursor:
+        cursor.execute("DELETE FROM restaurants WHERE id = %s", (RESTAURANT_IDS[0],))
+        cursor.execute("UPDATE restaurants SET name = 'Renamed', updated_at = NOW() WHERE id = %s",
+                       (RESTAURANT_IDS[1],))
+
+    with db.get_pool().connection(autocommit=False) as connection:
+        path, counts = export_delta(connection, previous_state, str(tmp_path / 'deltas'), itersize=2)
+
+    tables = read_delta(path)
+    assert counts == {'restaurants': (1, 1), 'tacos': (0, 1), 'photos': (0, 1), 'reviews': (0, 1)}
+    assert [row['name'] for row in tables['restaurants']['upserts']] == ['Renamed']
+    assert tables['restaurants']['deletes'] == [RESTAURANT_IDS[0]]
+    assert os.listdir(tmp_path / 'deltas') == [os.path.basename(path)]
+
+
+def test_rows_reinserted_after_a_truncate_are_not_deleted(tmp_path, seeded_db, no_overlap):
+    previous_state = {'exported_at': snapshot_time(seeded_db).isoformat()}
+    with seeded_db.cursor() as cursor:
+        # What a full collection run does: clear everything, then write the places back under the same ids
+        cursor.execute("CREATE TEMP TABLE kept AS SELECT * FROM restaurants WHERE id <> %s", (RESTAURANT_IDS[0],))
+        cursor.execute("TRUNCATE restaurants, tacos, photos, taco_photos, reviews CASCADE")
+        cursor.execute("INSERT INTO restaurants SELECT * FROM kept")
+
+    with db.get_pool().connection(autocommit=False) as connection:
+        path, counts = export_delta(connection, previous_state, str(tmp_path / 'deltas'))
+
+    tables = read_delta(path)
+    assert tables['restaurants']['deletes'] == [RESTAURANT_IDS[0]]
+    assert len(tables['tacos']['deletes']) == len(tables['reviews']['deletes']) == 5
+    assert counts['restaurants'][0] == 0
+
+
+def test_unchanged_database_writes_no_delta(tmp_path, seeded_db, no_overlap):
+    previous_state = {'exported_at': snapshot_time(seeded_db).isoformat()}
+
+    with db.get_pool().connection(autocommit=False) as connection:
+        path, counts = export_delta(connection, previous_state, str(tmp_path / 'deltas'))
+
+    assert path is None
+    assert set(counts.values()) == {(0, 0)}
+    assert os.listdir(tmp_path / 'deltas') == []
+
+
+def test_first_delta_has_every_row_and_no_deletes(tmp_path, seeded_db):
+    with seeded_db.cursor() as cursor:
+        cursor.execute("DELETE FROM reviews")
+
+    with db.get_pool().connection(autocommit=False) as connection:
+        path, counts = export_delta(connection, None, str(tmp_path / 'deltas'))
+
+    assert counts == {'restaurants': (5, 0), 'tacos': (5, 0), 'photos': (5, 0), 'reviews': (0, 0)}
+    assert read_delta(path)['reviews'] == {'upserts': [], 'deletes': []}
+
+
+def test_prune_drops_log_entries_the_next_delta_will_not_read(seeded_db, no_overlap):
+    with seeded_db.cursor() as cursor:
+        cursor.execute("DELETE FROM reviews")
+        cursor.execute("UPDATE collector_deleted_rows SET deleted_at = deleted_at - INTERVAL '1 day' "
+                       "WHERE id IN (SELECT id FROM collector_deleted_rows LIMIT 2)")
+
+    assert prune_deleted_rows(seeded_db, snapshot_time(seeded_db) - timedelta(hours=1)) == 2
+    with seeded_db.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM collector_deleted_rows")
+        assert cursor.fetchone()[0] == 3
+
+
+def test_export_state_is_the_snapshot_time(tmp_path, seeded_db, monkeypatch):
+    seeds_dir = tmp_path / 'seeds'
+    seeds_dir.mkdir()
+    state_path = tmp_path / 'state.json'
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('EXPORT_STATE_PATH', str(state_path))
+    monkeypatch.setenv('EXPORT_WORKERS', '1')
+    monkeypatch.setattr(export_to_rails_seeds, 'close_pool', lambda: None)
+    monkeypatch.setattr('sys.argv', ['export_to_rails_seeds.py'])
+    with seeded_db.cursor() as cursor:
+        cursor.execute("DELETE FROM reviews")
+        cursor.execute("UPDATE collector_deleted_rows SET deleted_at = deleted_at - INTERVAL '1 day'")
+
+    export_to_rails_seeds.main()
+
+    state = json.loads(state_path.read_text(encoding='utf-8'))
+    assert list(state) == ['exported_at']
+    with seeded_db.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM collector_deleted_rows")
+        assert cursor.fetchone()[0] == 0
@@ -0,0 +1,65 @@
+import pytest
+
+from geo_tiles import (MAX_SEARCH_RADIUS_METERS, grid_tiles, haversine_meters, make_tile, point_in_polygon,
+                       polygon_bounds, split_tile, tile_intersects_polygon, tile_key)
+
+SAN_ANTONIO = (29.20, -98.80, 29.75, -98.20)
+
+
+def test_haversine_matches_known_distance():
+    # One degree of latitude is about 111.2 km
+    assert haversine_meters(29.0, -98.5, 30.0, -98.5) == pytest.approx(111195, rel=1e-3)
+    assert haversine_meters(29.4, -98.5, 29.4, -98.5) == 0
+
+
+def test_tile_circle_covers_its_corners():
+    tile = make_tile(29.40, -98.52, 29.44, -98.47)
+
+    for lat, lng in [(tile['south'], tile['west']), (tile['south'], tile['east']),
+                     (tile['north'], tile['west']), (tile['north'], tile['east'])]:
+        assert haversine_meters(tile['lat'], tile['lng'], lat, lng) <= tile['radius']
+
+
+def test_grid_tiles_cover_the_box_within_the_radius_limit():
+    tiles = grid_tiles(*SAN_ANTONIO, max_radius=10000)
+
+    assert all(tile['radius'] <= 10000 for tile in tiles)
+    assert min(tile['south'] for tile in tiles) == SAN_ANTONIO[0]
+    assert max(tile['north'] for tile in tiles) == pytest.approx(SAN_ANTONIO[2])
+    assert min(tile['west'] for tile in tiles) == SAN_ANTONIO[1]
+    assert max(tile['east'] for tile in tiles) == pytest.approx(SAN_ANTONIO[3])
+    # Equal tiles: total area matches the box
+    area = sum((tile['north'] - tile['south']) * (tile['east'] - tile['west']) for tile in tiles)
+    assert area == pytest.approx((SAN_ANTONIO[2] - SAN_ANTONIO[0]) * (SAN_ANTONIO[3] - SAN_ANTONIO[1]))
+
+
+def test_grid_tiles_never_exceed_the_api_radius():
+    tiles = grid_tiles(25.0, -106.0, 36.0, -93.0, max_radius=10 ** 7)
+    assert all(tile['radius'] <= MAX_SEARCH_RADIUS_METERS for tile in tiles)
+
+
+def test_split_tile_quadrants_partition_the_parent():
+    tile = make_tile(29.40, -98.52, 29.44, -98.47)
+    children = split_tile(tile)
+
+    assert len({tile_key(child) for child in children}) == 4
+    assert {child['south'] for child in children} == {tile['south'], tile['lat']}
+    assert {child['east'] for child in children} == {tile['lng'], tile['east']}
+    assert all(child['radius'] < tile['radius'] for child in children)
+
+
+TRIANGLE = [(29.0, -99.0), (30.0, -99.0), (29.0, -98.0)]
+
+
+def test_polygon_helpers():
+    assert polygon_bounds(TRIANGLE) == (29.0, -99.0, 30.0, -98.0)
+    assert point_in_polygon(29.2, -98.8, TRIANGLE)
+    assert not point_in_polygon(29.9, -98.1, TRIANGLE)
+
+
+def test_tile_polygon_intersection():
+    assert tile_intersects_polygon(make_tile(29.1, -98.9, 29.2, -98.8), TRIANGLE)       # inside
+    assert not tile_intersects_polygon(make_tile(29.8, -98.2, 29.9, -98.1), TRIANGLE)   # beyond the hypotenuse
+    assert tile_intersects_polygon(make_tile(28.5, -99.5, 31.0, -97.5), TRIANGLE)       # contains the polygon
+    assert tile_intersects_polygon(make_tile(29.45, -98.6, 29.6, -98.45), TRIANGLE)     # straddles an edge
+    assert tile_intersects_polygon(make_tile(0, 0, 1, 1), None)
@@ -0,0 +1,70 @@
+import random
+
+import pandas as pd
+import pytest
+
+from keyword_matcher import KeywordMatcher, normalize_keyword
+
+KEYWORDS = ['taco', 'tacos al pastor', 'taqueria', 'tex mex', 'mexican', 'class', 'meal takeaway', 'el']
+
+
+@pytest.fixture
+def matcher():
+    return KeywordMatcher(KEYWORDS)
+
+
+def test_whole_words_plurals_and_separators(matcher):
+    assert matcher.find_all("Tacos and TEX-MEX at the hotel") == ['taco', 'tex mex']
+    assert matcher.find_all("types: meal_takeaway, restaurant") == ['meal takeaway']
+    assert matcher.find_all("El Taco Loco; taco tuesday") == ['el', 'taco']
+    assert matcher.find_all("tacos al pastor") == ['tacos al pastor']
+    assert matcher.find_all("tacos al pastorx") == ['taco']
+    assert matcher.count("") == 0
+
+
+@pytest.mark.parametrize('text, keyword', [
+    ("MEXİCAN food", 'mexican'),      # dotted capital I lower-cases to two code points
+    ("CLAſS act", 'class'),           # long s only matches 's' case-insensitively
+    ("TAQUERİAS downtown", 'taqueria'),
+    ("ＴＡＣＯ", None),                # fullwidth letters are not the keyword
+])
+def test_case_folded_spellings_resolve_to_their_keyword(matcher, text, keyword):
+    expected = [keyword] if keyword else []
+
+    assert matcher.find_all(text) == expected
+    pairs = matcher.match_pairs(pd.Series([text]))
+    assert list(pairs['keyword']) == expected
+
+
+def test_duplicate_keywords_are_merged_keeping_the_first_spelling():
+    matcher = KeywordMatcher(['Tex Mex', 'tex-mex', 'TEX_MEX'])
+
+    assert matcher.keywords == ['Tex Mex']
+    assert matcher.find_all("tex mex") == ['Tex Mex']
+
+
+def test_series_matching_agrees_with_per_text_matching(matcher):
+    words = ['taco', 'TACOS', 'tacos al pastor', 'taquerias', 'tex mex', 'tex_mex', 'MEXİCAN', 'claſs',
+             'el', 'hotel', 'burrito', 'meal-takeaway', '!', 'x']
+    rng = random.Random(7)
+    texts = pd.Series([' '.join(rng.choice(words) for _ in range(rng.randint(0, 8))) for _ in range(300)] + [None])
+
+    pairs = matcher.match_pairs(texts)
+    by_row = pairs.groupby('row')['keyword'].apply(list).to_dict()
+
+    for row, text in enumerate(texts.fillna('')):
+        assert by_row.get(row, []) == matcher.find_all(text)
+    assert matcher.count_series(texts).tolist() == [matcher.count(text) for text in texts.fillna('')]
+
+
+def test_candidate_filtering_survives_case_folded_text(offline_collector):
+    places = [{'place_id': 'a', 'name': 'MEXİCAN KİTCHEN', 'types': ['restaurant'], 'rating': 4.5},
+              {'place_id': 'b', 'name': 'First CLAſS Tacos', 'types': ['restaurant'], 'rating': 4.0}]
+
+    ranked = offline_collector.filter_bean_cheese_candidates(places)
+
+    assert {place['place_id'] for place in ranked} <= {'a', 'b'}
+
+
+def test_normalize_keyword():
+    assert normalize_keyword("  Tex -_ Mex ") == 'tex mex'
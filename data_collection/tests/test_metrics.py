@@ -0,0 +1,153 @@
+import json
+import os
+import re
+import threading
+import time
+
+from metrics import LATENCY_BUCKETS, RunMetrics
+
+# name{labels} value, as the Prometheus text format requires
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\]|\\.)*",?)*\})? -?[0-9.e+Inf]+$')
+
+
+def samples(text):
+    """Sample lines of a Prometheus textfile as {'name{labels}': value}"""
+    result = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        assert SAMPLE_LINE.match(line), line
+        key, value = line.rsplit(' ', 1)
+        result[key] = float(value)
+    return result
+
+
+def sample_metrics():
+    metrics = RunMetrics('test')
+    for seconds in (0.01, 0.02, 0.2, 0.3, 40.0):
+        metrics.observe_request('place/details', seconds, 200, 'OK', response_bytes=100)
+    metrics.observe_request('place/details', 0.01, 429, response_bytes=10)
+    metrics.observe_db_write(0.5, {'restaurants': 10, 'tacos': 5})
+    metrics.observe_db_write(0.5, {'restaurants': 10})
+    metrics.increment('cache_hits', endpoint='place/details')
+    metrics.increment('cache_hits', 2, endpoint='place/details')
+    metrics.increment('places_processed', 3)
+    metrics.add_stage_time('search', 1.5)
+    return metrics
+
+
+def test_report_summarizes_requests_writes_and_counters():
+    report = sample_metrics().report()
+
+    details = report['api']['place/details']
+    assert details['requests'] == report['api_requests_total'] == 6
+    assert details['seconds_max'] == 40.0
+    assert details['seconds_p50_bucket'] == 0.05
+    assert details['seconds_p95_bucket'] is None  # beyond the largest bucket
+    assert details['statuses'] == {'200 OK': 5, '429': 1}
+    assert sum(details['histogram'].values()) == 5
+    assert report['bytes_downloaded'] == 510
+    assert report['db'] == {'flushes': 2, 'seconds': 1.0, 'rows_written': {'restaurants': 20, 'tacos': 5},
+                            'rows_per_second': 25.0}
+    assert report['stages'] == {'db_write': {'calls': 2, 'seconds': 1.0}, 'search': {'calls': 1, 'seconds': 1.5}}
+    assert report['counters'] == {'cache_hits[endpoint=place/details]': 3, 'places_processed': 3}
+
+
+def test_json_report_is_written_atomically(tmp_path):
+    path = tmp_path / 'reports' / 'run.json'
+
+    report = sample_metrics().write_json(str(path))
+
+    assert json.loads(path.read_text(encoding='utf-8'))['api'] == report['api']
+    assert os.listdir(path.parent) == ['run.json']
+
+
+def test_stage_timers_count_calls_and_time():
+    metrics = RunMetrics()
+    with metrics.stage('filter'):
+        time.sleep(0.01)
+
+    def slow_items():
+        for item in range(3):
+            time.sleep(0.01)
+            yield item
+
+    assert list(metrics.timed_iter('details', slow_items())) == [0, 1, 2]
+
+    stages = metrics.report()['stages']
+    assert stages['filter']['calls'] == 1 and stages['filter']['seconds'] >= 0.01
+    # Exhausting the iterator adds its time but not a call
+    assert stages['details']['calls'] == 3 and stages['details']['seconds'] >= 0.03
+
+
+def test_prometheus_histogram_is_cumulative():
+    values = samples(sample_metrics().prometheus_text())
+
+    histogram = 'taco_collector_api_request_duration_seconds'
+    labels = 'endpoint="place/details",run="test"'
+    buckets = [values[f'{histogram}_bucket{{endpoint="place/details",le="{bound}",run="test"}}']
+               for bound in LATENCY_BUCKETS]
+    assert buckets == sorted(buckets)
+    assert buckets[0] == 3
+    assert buckets[-1] == 5
+    assert values[f'{histogram}_bucket{{endpoint="place/details",le="+Inf",run="test"}}'] == 6
+    assert values[f'{histogram}_count{{{labels}}}'] == 6
+    assert values[f'taco_collector_rows_written{{run="test",table="restaurants"}}'] == 20
+    assert values[f'taco_collector_cache_hits{{{labels}}}'] == 3
+    assert values['taco_collector_api_responses{api_status="",endpoint="place/details",http_status="429",run="test"}'] == 1
+
+
+def test_prometheus_help_and_type_precede_each_metric(tmp_path):
+    path = tmp_path / 'collector.prom'
+    sample_metrics().write_prometheus(str(path))
+    text = path.read_text(encoding='utf-8')
+
+    declared = re.findall(r'^# TYPE (\S+) (gauge|histogram)$', text, re.MULTILINE)
+    assert len(declared) == len({name for name, _ in declared})
+    for name in {key.split('{')[0] for key in samples(text)}:
+        assert any(name == declared_name or name.startswith(f"{declared_name}_") for declared_name, _ in declared), name
+    assert text.endswith('\n')
+
+
+def test_label_values_are_escaped():
+    metrics = RunMetrics('say "hi"\\')
+    metrics.increment('odd', endpoint='a\nb')
+
+    values = samples(metrics.prometheus_text())
+
+    assert values['taco_collector_odd{endpoint="a\\nb",run="say \\"hi\\"\\\\"}'] == 1
+
+
+def test_concurrent_observations_are_all_counted():
+    metrics = RunMetrics()
+
+    def observe():
+        for _ in range(1000):
+            metrics.observe_request('place/details', 0.01, 200, 'OK', response_bytes=1)
+            metrics.increment('places_processed')
+
+    threads = [threading.Thread(target=observe) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = metrics.report()
+    assert report['api_requests_total'] == report['bytes_downloaded'] == 8000
+    assert report['counters']['places_processed'] == 8000
+
+
+def test_collector_runs_record_requests_and_rows(db_connection, make_collector, mock_places):
+    south, west, north, east = mock_places.dataset.bounds
+    collector = make_collector(db_pool=None)
+    try:
+        processed = collector.run_pipeline([], lat=(south + north) / 2, lng=(west + east) / 2, radius=5000)
+    finally:
+        collector.close_database_connection()
+
+    report = collector.metrics.report()
+    assert report['api']['place/details']['requests'] == processed
+    assert report['api']['place/details']['statuses'] == {'200 OK': processed}
+    assert report['db']['rows_written']['restaurants'] == processed
+    assert report['counters']['places_processed'] == processed
+    assert {'search', 'filter', 'details', 'extraction', 'db_write'} <= set(report['stages'])
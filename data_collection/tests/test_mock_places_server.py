@@ -0,0 +1,114 @@
+import time
+
+import pytest
+import requests
+
+from mock_places_server import MAX_RESULTS_PER_QUERY, PAGE_SIZE, PHOTO_BYTES, MockPlacesServer, SyntheticPlaces
+
+
+@pytest.fixture
+def serve():
+    """Start mock servers over a 500 place dataset, stopping them afterwards"""
+    servers = []
+
+    def start(**kwargs):
+        server = MockPlacesServer(SyntheticPlaces(500), **kwargs).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def center(dataset):
+    south, west, north, east = dataset.bounds
+    return f"{(south + north) / 2},{(west + east) / 2}"
+
+
+def get(server, endpoint, **params):
+    return requests.get(f"{server.base_url}/{endpoint}", params=params, timeout=5)
+
+
+def test_datasets_are_reproducible_per_seed():
+    first, again, other = SyntheticPlaces(50, seed=1), SyntheticPlaces(50, seed=1), SyntheticPlaces(50, seed=2)
+
+    assert [first.search_result(i) for i in range(50)] == [again.search_result(i) for i in range(50)]
+    # Review times are relative to now, everything else is fixed by the seed
+    first_details, again_details = first.details('mock-place-3'), again.details('mock-place-3')
+    assert [review['text'] for review in first_details['reviews']] == \
+        [review['text'] for review in again_details['reviews']]
+    assert first_details['photos'] == again_details['photos']
+    assert first.names != other.names
+    assert first.details('no-such-place') is None
+
+
+def test_nearby_places_are_inside_the_radius_nearest_first():
+    dataset = SyntheticPlaces(500)
+    lat, lng = (float(value) for value in center(dataset).split(','))
+
+    indexes = dataset.nearby(lat, lng, 500)
+    distances = [((dataset.lats[i] - lat) ** 2 + ((dataset.lngs[i] - lng) * 0.87) ** 2) ** 0.5 for i in indexes]
+
+    assert 0 < len(indexes) < 500
+    assert distances == sorted(distances)
+    assert len(dataset.nearby(lat, lng, 100000)) == 500
+
+
+def test_nearby_search_pages_through_at_most_sixty_results(serve):
+    server = serve()
+
+    pages = [get(server, 'place/nearbysearch/json', location=center(server.dataset), radius=100000).json()]
+    while 'next_page_token' in pages[-1]:
+        pages.append(get(server, 'place/nearbysearch/json', pagetoken=pages[-1]['next_page_token']).json())
+
+    assert [page['status'] for page in pages] == ['OK'] * (MAX_RESULTS_PER_QUERY // PAGE_SIZE)
+    place_ids = [result['place_id'] for page in pages for result in page['results']]
+    assert len(place_ids) == len(set(place_ids)) == MAX_RESULTS_PER_QUERY
+    assert server.request_counts == {'place/nearbysearch/json': 3}
+
+    far_away = get(server, 'place/nearbysearch/json', location='0,0', radius=1000).json()
+    assert far_away == {'status': 'ZERO_RESULTS', 'results': []}
+
+
+def test_page_tokens_used_too_early_are_refused(serve):
+    server = serve(token_delay=0.2)
+    token = get(server, 'place/nearbysearch/json', location=center(server.dataset), radius=100000).json()['next_page_token']
+
+    assert get(server, 'place/nearbysearch/json', pagetoken=token).json()['status'] == 'INVALID_REQUEST'
+    time.sleep(0.25)
+    assert get(server, 'place/nearbysearch/json', pagetoken=token).json()['status'] == 'OK'
+    assert get(server, 'place/nearbysearch/json', pagetoken='made-up').json()['status'] == 'INVALID_REQUEST'
+
+
+def test_details_and_photos(serve):
+    server = serve()
+
+    details = get(server, 'place/details/json', place_id='mock-place-7').json()
+    assert details['status'] == 'OK'
+    assert details['result']['place_id'] == 'mock-place-7'
+    assert len(details['result']['reviews']) == 5
+    assert get(server, 'place/details/json', place_id='missing').json() == {'status': 'NOT_FOUND'}
+
+    # The Photo API redirects to the image, as the real one does
+    photo = get(server, 'place/photo', photoreference='ref-1', maxwidth=400)
+    assert photo.status_code == 200
+    assert photo.content == PHOTO_BYTES
+    assert photo.headers['Content-Type'] == 'image/gif'
+    assert photo.history[0].status_code == 302
+    assert server.request_counts == {'place/details/json': 2, 'place/photo': 1}
+    assert get(server, 'place/unknown/json').status_code == 404
+
+
+def test_injected_errors_and_latency(serve):
+    failing = serve(error_rate=1.0)
+    assert get(failing, 'place/details/json', place_id='mock-place-1').status_code == 500
+
+    over_quota = serve(quota_error_rate=1.0)
+    assert get(over_quota, 'place/details/json', place_id='mock-place-1').json()['status'] == 'OVER_QUERY_LIMIT'
+    assert get(over_quota, 'place/photo', photoreference='ref-1').content == PHOTO_BYTES
+
+    slow = serve(latency_ms=50)
+    start = time.monotonic()
+    get(slow, 'place/details/json', place_id='mock-place-1')
+    assert time.monotonic() - start >= 0.05
@@ -0,0 +1,59 @@
+import json
+from datetime import timedelta
+
+import db
+import export_to_rails_seeds
+from export_to_rails_seeds import export_delta
+from photo_store import ingest_photos
+
+RESTAURANT_ID = '00000000-0000-0000-0000-000000000001'
+TACO_ID = '00000000-0000-0000-0000-000000000011'
+
+
+def places_photo_url(photo_reference):
+    return f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference={photo_reference}&key=k"
+
+
+class StubFetcher:
+    """Stores every photo under /photos/<reference>.jpg except the failing ones"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.requested = []
+
+    def iter_fetch(self, photo_references):
+        for photo_reference in photo_references:
+            self.requested.append(photo_reference)
+            yield photo_reference, None if photo_reference in self.failing else f"/photos/{photo_reference}.jpg"
+
+
+def insert_photos(connection, photo_references):
+    with connection.cursor() as cursor:
+        cursor.execute("INSERT INTO restaurants (id, name) VALUES (%s, 'Taqueria') ON CONFLICT DO NOTHING",
+                       (RESTAURANT_ID,))
+        cursor.execute("INSERT INTO tacos (id, restaurant_id, name) VALUES (%s, %s, 'Bean and Cheese') "
+                       "ON CONFLICT DO NOTHING", (TACO_ID, RESTAURANT_ID))
+        for photo_reference in photo_references:
+            cursor.execute("""
+                INSERT INTO photos (taco_id, restaurant_id, photo_reference, url, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, '2024-01-01', '2024-01-01')
+            """, (TACO_ID, RESTAURANT_ID, photo_reference, places_photo_url(photo_reference)))
+
+
+def test_stored_photos_ship_in_the_next_delta(tmp_path, db_connection, monkeypatch):
+    monkeypatch.setattr(export_to_rails_seeds, 'WATERMARK_OVERLAP', timedelta(0))
+    insert_photos(db_connection, ['ref-1', 'ref-2'])
+    with db_connection.cursor() as cursor:
+        cursor.execute("SELECT now()")
+        previous_state = {'exported_at': cursor.fetchone()[0].isoformat()}
+
+    assert ingest_photos(db_connection, StubFetcher(failing=['ref-2'])) == (1, 1)
+
+    with db.get_pool().connection(autocommit=False) as connection:
+        path, counts = export_delta(connection, previous_state, str(tmp_path / 'deltas'))
+    with open(path, encoding='utf-8') as f:
+        upserts = json.load(f)['tables']['photos']['upserts']
+    assert counts['photos'] == (1, 0)
+    assert [photo['url'] for photo in upserts] == ['/photos/ref-1.jpg']
+    # Collector bookkeeping, not a column of the Rails model
+    assert {'updated_at', 'photo_reference', 'restaurant_id'}.isdisjoint(upserts[0])
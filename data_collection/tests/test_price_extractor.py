@@ -0,0 +1,86 @@
+import pytest
+
+from price_extractor import TACO_NAME, PriceExtractor, backfill_prices
+
+
+@pytest.fixture(scope='module')
+def extractor():
+    return PriceExtractor()
+
+
+@pytest.mark.parametrize('text, cents, quantity', [
+    ("The $2.50 bean and cheese is the best deal", 250, 1),
+    ("$ 3 bean and cheese taco", 300, 1),
+    ("Got 3 bean and cheese tacos for $5", 167, 3),
+    ("three for $6, bean and cheese of course", 200, 3),
+    ("a dozen breakfast tacos for $18", 150, 12),
+    ("paid $12 for 6 bean and cheese tacos", 200, 6),
+    ("bean and cheese, $10 for a dozen", 83, 12),
+    ("$ 4 for two bean and cheese", 200, 2),
+    ("bean and cheese for 2 bucks", 200, 1),
+    ("the bean and cheese was 3 dollars", 300, 1),
+    ("99 cents for a bean and cheese", 99, 1),
+    ("bean and cheese taco 75¢", 75, 1),
+])
+def test_every_price_form_is_read_as_cents_per_taco(extractor, text, cents, quantity):
+    mentions = extractor.extract_mentions(text)
+
+    assert [(mention['price_cents'], mention['quantity']) for mention in mentions] == [(cents, quantity)]
+
+
+def test_dollar_offer_without_a_quantity_is_a_single_price(extractor):
+    mentions = extractor.extract_mentions("$3 for bean and cheese, cheap")
+
+    assert [(mention['price_cents'], mention['quantity']) for mention in mentions] == [(300, 1)]
+
+
+@pytest.mark.parametrize('text', [
+    "Our bill was $45 for the bean and cheese and drinks",   # above MAX_TACO_PRICE_CENTS
+    "$12 for 60 bean and cheese tacos for the office",       # below MIN_TACO_PRICE_CENTS
+    "Bean and cheese tacos are great. " + "x" * 80 + " Parking was $3",
+    "The $2 salsa bar is great",                             # no taco name nearby
+])
+def test_prices_that_are_not_taco_prices_are_ignored(extractor, text):
+    assert extractor.extract_mentions(text) == []
+
+
+def test_generic_names_count_for_less(extractor):
+    [generic] = extractor.extract_mentions("tacos are $2 each")
+    [specific] = extractor.extract_mentions("bean and cheese tacos are $2 each")
+
+    assert generic['weight'] < specific['weight']
+
+
+def test_estimate_is_the_weighted_median_with_agreement_confidence(extractor):
+    agreeing = ["bean and cheese $2.50", "$2.50 bean and cheese", "bean and cheese was $2.75"]
+    price, confidence = extractor.estimate(agreeing + ["paid $12 for 6 bean and cheese tacos"])
+    assert price == 250
+    assert 0.6 < confidence < 1
+
+    _, disputed = extractor.estimate(["bean and cheese $2", "bean and cheese $6"])
+    assert disputed < confidence
+    assert extractor.estimate(["no prices here"]) == (None, 0.0)
+
+
+def test_backfill_writes_confident_prices_to_bean_and_cheese_rows(db_connection):
+    with db_connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO restaurants (id, name) VALUES
+                ('00000000-0000-0000-0000-000000000001', 'Priced'),
+                ('00000000-0000-0000-0000-000000000002', 'Unpriced');
+            INSERT INTO tacos (restaurant_id, name) VALUES
+                ('00000000-0000-0000-0000-000000000001', %(name)s),
+                ('00000000-0000-0000-0000-000000000002', %(name)s);
+            INSERT INTO reviews (restaurant_id, review_text) VALUES
+                ('00000000-0000-0000-0000-000000000001', 'bean and cheese $2.50'),
+                ('00000000-0000-0000-0000-000000000001', '3 bean and cheese for $7.50'),
+                ('00000000-0000-0000-0000-000000000002', 'great salsa');
+        """, {'name': TACO_NAME})
+
+    assert backfill_prices(db_connection, processes=1) == 1
+
+    with db_connection.cursor() as cursor:
+        cursor.execute("SELECT restaurant_id::text, price_cents FROM tacos ORDER BY restaurant_id")
+        assert cursor.fetchall() == [('00000000-0000-0000-0000-000000000001', 250),
+                                     ('00000000-0000-0000-0000-000000000002', None)]
+    assert db_connection.autocommit is True
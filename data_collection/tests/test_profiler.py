@@ -0,0 +1,94 @@
+import os
+import pstats
+import threading
+import tracemalloc
+
+import pytest
+
+from profiler import UNSTAGED, StageProfiler
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    profiler = StageProfiler(str(tmp_path), run_name='test', sample_interval=0.001)
+    profiler.start()
+    yield profiler
+    if tracemalloc.is_tracing():
+        profiler.finish()
+
+
+def allocate_and_free(megabytes):
+    buffer = bytearray(megabytes * MB)
+    del buffer
+
+
+def test_nested_stage_keeps_the_enclosing_stage_peak(profiler):
+    with profiler.stage('outer'):
+        allocate_and_free(8)
+        with profiler.stage('inner'):
+            allocate_and_free(1)
+
+    assert profiler._stats['outer']['memory_peak'] >= 8 * MB
+    assert MB <= profiler._stats['inner']['memory_peak'] < 2 * MB
+
+
+def test_enclosing_stage_peak_includes_nested_stages(profiler):
+    with profiler.stage('outer'):
+        with profiler.stage('inner'):
+            allocate_and_free(4)
+        with profiler.stage('inner'):
+            allocate_and_free(1)
+        allocate_and_free(2)
+
+    assert 4 * MB <= profiler._stats['outer']['memory_peak'] < 5 * MB
+    assert profiler._stats['inner']['calls'] == 2
+    assert 4 * MB <= profiler._stats['inner']['memory_peak'] < 5 * MB
+
+
+def test_peaks_survive_stages_on_other_threads(profiler):
+    started, release = threading.Event(), threading.Event()
+
+    def other_stage():
+        started.wait()
+        with profiler.stage('other'):
+            release.set()
+
+    thread = threading.Thread(target=other_stage)
+    thread.start()
+    with profiler.stage('main'):
+        allocate_and_free(6)
+        started.set()
+        release.wait()
+        thread.join()
+
+    assert profiler._stats['main']['memory_peak'] >= 6 * MB
+
+
+def busy_inner():
+    return sum(range(10000))
+
+
+def test_finish_writes_profiles_stacks_and_summary(profiler):
+    with profiler.stage('outer'):
+        with profiler.stage('inner'):
+            busy_inner()
+    output_dir = profiler.finish()
+
+    files = set(os.listdir(output_dir))
+    assert {'outer.prof', 'inner.prof', 'all_stages.collapsed', 'summary.txt'} <= files
+    assert not tracemalloc.is_tracing()
+
+    # cProfile pauses the enclosing stage while a nested one runs
+    def functions(stage):
+        return {name for _, _, name in pstats.Stats(os.path.join(output_dir, f"{stage}.prof")).stats}
+    assert 'busy_inner' in functions('inner')
+    assert 'busy_inner' not in functions('outer')
+
+    with open(os.path.join(output_dir, 'summary.txt'), encoding='utf-8') as f:
+        rows = {line.split()[0]: line.split() for line in f if line.strip() and not line.startswith(('=', ' '))}
+    assert rows['outer'][1] == rows['inner'][1] == '1'
+    with open(os.path.join(output_dir, 'all_stages.collapsed'), encoding='utf-8') as f:
+        roots = {line.split(';', 1)[0] for line in f}
+    assert roots <= {'outer', 'inner', UNSTAGED}
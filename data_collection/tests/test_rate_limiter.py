@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+import rate_limiter
+from mock_places_server import MockPlacesServer, SyntheticPlaces
+from rate_limiter import TokenBucketRateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(rate_limiter.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_burst_is_free_then_requests_are_spaced_at_qps(clock):
+    limiter = TokenBucketRateLimiter(qps=4, burst=2)
+
+    for _ in range(5):
+        limiter.acquire()
+
+    assert clock.sleeps == pytest.approx([0.25, 0.25, 0.25])
+
+
+def test_tokens_refill_while_idle(clock):
+    limiter = TokenBucketRateLimiter(qps=2, burst=2)
+    limiter.acquire()
+    limiter.acquire()
+
+    clock.now += 10  # refills to the burst size, not beyond
+    for _ in range(3):
+        limiter.acquire()
+
+    assert clock.sleeps == pytest.approx([0.5])
+
+
+def test_throttles_back_off_multiplicatively_and_recover_additively(clock):
+    limiter = TokenBucketRateLimiter(qps=10, burst=10, min_qps=1, backoff_factor=0.5, recovery_step=2)
+
+    assert limiter.observe(200, 'OVER_QUERY_LIMIT') is True
+    assert limiter.rate == 5
+    assert limiter.observe(503) is True
+    assert limiter.observe(429) is True
+    assert limiter.observe(500) is True
+    assert limiter.rate == 1  # floored at min_qps
+
+    assert limiter.observe(200, 'OK') is False
+    assert limiter.rate == 3
+    for _ in range(10):
+        limiter.observe(200, 'ZERO_RESULTS')
+    assert limiter.rate == 10
+
+
+def test_throttle_drops_the_saved_burst(clock):
+    limiter = TokenBucketRateLimiter(qps=10, burst=10, backoff_factor=0.5)
+    limiter.record_throttle()
+
+    limiter.acquire()
+
+    assert clock.sleeps == pytest.approx([0.2])
+
+
+def test_acquire_async_waits_without_blocking(monkeypatch):
+    limiter = TokenBucketRateLimiter(qps=1000, burst=1)
+    waits = []
+
+    async def fake_sleep(seconds):
+        waits.append(seconds)
+
+    monkeypatch.setattr(rate_limiter.asyncio, 'sleep', fake_sleep)
+    asyncio.run(limiter.acquire_async())
+    asyncio.run(limiter.acquire_async())
+
+    assert len(waits) == 1 and 0 < waits[0] <= 0.001
+
+
+def test_collector_retries_throttled_requests(make_collector):
+    server = MockPlacesServer(SyntheticPlaces(20), quota_error_rate=0.3, error_rate=0.1).start()
+    try:
+        collector = make_collector(max_concurrent_requests=1)
+        collector.base_url = server.base_url
+        collector.max_retries = 50
+
+        details = collector.fetch_place_details(server.dataset.place_ids)
+
+        assert all(d is not None for d in details)
+        throttled = sum(value for key, value in collector.metrics.counters.items()
+                        if key[0] == 'throttled_responses')
+        assert throttled == server.request_counts['place/details/json'] - len(details) > 0
+    finally:
+        server.stop()
@@ -0,0 +1,83 @@
+import pytest
+
+import response_cache
+from response_cache import CacheMissError, PlacesResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PlacesResponseCache(str(tmp_path))
+    yield cache
+    cache.close()
+
+
+def test_round_trip_ignores_api_key(cache):
+    cache.set('place/details', {'place_id': 'abc', 'key': 'first-key'}, {'status': 'OK', 'result': {'name': 'A'}})
+
+    assert cache.get('place/details', {'place_id': 'abc', 'key': 'other-key'}) == \
+        {'status': 'OK', 'result': {'name': 'A'}}
+    assert cache.get('place/details', {'place_id': 'xyz', 'key': 'first-key'}) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_per_endpoint(tmp_path, monkeypatch):
+    cache = PlacesResponseCache(str(tmp_path), ttls={'place/nearbysearch': 60})
+    now = 1_000_000.0
+    monkeypatch.setattr(response_cache.time, 'time', lambda: now)
+    cache.set('place/nearbysearch', {'keyword': 'taco'}, {'status': 'OK'})
+    cache.set('place/details', {'place_id': 'abc'}, {'status': 'OK'})
+
+    now += 120
+    assert cache.get('place/nearbysearch', {'keyword': 'taco'}) is None
+    assert cache.get('place/details', {'place_id': 'abc'}) == {'status': 'OK'}
+    cache.close()
+
+
+def test_replay_mode_serves_stale_entries_and_raises_on_miss(tmp_path, monkeypatch):
+    writer = PlacesResponseCache(str(tmp_path), ttls={'place/details': 1})
+    writer.set('place/details', {'place_id': 'abc'}, {'status': 'OK'})
+    writer.close()
+    monkeypatch.setattr(response_cache.time, 'time', lambda: 10 ** 10)
+
+    replay = PlacesResponseCache(str(tmp_path), replay_only=True)
+    assert replay.get('place/details', {'place_id': 'abc'}) == {'status': 'OK'}
+    with pytest.raises(CacheMissError):
+        replay.get('place/details', {'place_id': 'missing'})
+
+    replay.set('place/details', {'place_id': 'new'}, {'status': 'OK'})
+    with pytest.raises(CacheMissError):
+        replay.get('place/details', {'place_id': 'new'})
+    replay.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = iter(range(1, 1000))
+    monkeypatch.setattr(response_cache.time, 'time', lambda: float(next(clock)))
+    body = {'status': 'OK', 'text': 'x' * 2000}
+    entry_size = len(response_cache.zlib.compress(response_cache.json.dumps(body).encode('utf-8')))
+    cache = PlacesResponseCache(str(tmp_path), max_size_bytes=entry_size * 2)
+
+    cache.set('place/details', {'place_id': 'a'}, body)
+    cache.set('place/details', {'place_id': 'b'}, body)
+    cache.get('place/details', {'place_id': 'a'})  # b is now the least recently used
+    cache.set('place/details', {'place_id': 'c'}, body)
+
+    assert cache.get('place/details', {'place_id': 'a'}) == body
+    assert cache.get('place/details', {'place_id': 'b'}) is None
+    assert cache.get('place/details', {'place_id': 'c'}) == body
+    cache.close()
+
+
+def test_collector_serves_repeat_requests_from_cache(tmp_path, make_collector, mock_places):
+    cache = PlacesResponseCache(str(tmp_path))
+    collector = make_collector(response_cache=cache)
+    place_ids = mock_places.dataset.place_ids[:3]
+
+    first = collector.fetch_place_details(place_ids + ['no-such-place'])
+    requests_after_first = mock_places.request_counts['place/details/json']
+    second = collector.fetch_place_details(place_ids + ['no-such-place'])
+
+    assert first == second
+    # NOT_FOUND isn't cached, so only the missing place is requested again
+    assert mock_places.request_counts['place/details/json'] == requests_after_first + 1
+    cache.close()
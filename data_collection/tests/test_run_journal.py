@@ -0,0 +1,137 @@
+import json
+
+import pytest
+
+from run_journal import RunJournal
+
+PARAMS = {'lat': 29.42, 'lng': -98.49, 'radius': 5000}
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'journal.jsonl')
+
+
+def reopen(path, params=PARAMS):
+    journal = RunJournal(path)
+    resuming = journal.start(params)
+    return journal, resuming
+
+
+def test_unfinished_run_resumes_with_its_progress(journal_path):
+    journal, resuming = reopen(journal_path)
+    assert resuming is False
+    journal.record_search({'keyword': 'taco'}, [{'place_id': 'a'}])
+    journal.record_candidates([{'place_id': 'a'}, {'place_id': 'b'}])
+    journal.mark_places_done(['a'])
+    journal.close()
+
+    journal, resuming = reopen(journal_path)
+
+    assert resuming is True
+    assert journal.search_results({'keyword': 'taco'}) == [{'place_id': 'a'}]
+    assert journal.search_results({'keyword': 'taqueria'}) is None
+    assert [place['place_id'] for place in journal.candidates] == ['a', 'b']
+    assert journal.done_place_ids == {'a'}
+    journal.close()
+
+
+def test_completed_or_different_runs_start_fresh(journal_path):
+    journal, _ = reopen(journal_path)
+    journal.mark_places_done(['a'])
+    journal.close()
+
+    journal, resuming = reopen(journal_path, {**PARAMS, 'radius': 100})
+    assert resuming is False and journal.done_place_ids == set()
+    journal.mark_complete()
+    journal.close()
+
+    journal, resuming = reopen(journal_path, {**PARAMS, 'radius': 100})
+    assert resuming is False
+    journal.close()
+
+
+def test_sink_states_come_from_the_latest_checkpoint_of_the_resumed_run(journal_path):
+    journal, _ = reopen(journal_path)
+    journal.mark_places_done(['a'], sink_states=[{'offset': 10}, {}])
+    journal.mark_places_done(['b'], sink_states=[{'offset': 20}, {}])
+    journal.close()
+
+    journal, _ = reopen(journal_path)
+    assert journal.resumed is True and journal.sink_states == [{'offset': 20}, {}]
+    journal.close()
+
+    journal, _ = reopen(journal_path, {**PARAMS, 'radius': 100})
+    assert journal.resumed is False and journal.sink_states is None
+    journal.close()
+
+
+def test_torn_final_line_is_ignored_and_overwritten(journal_path):
+    journal, _ = reopen(journal_path)
+    journal.mark_places_done(['a'])
+    journal.close()
+    with open(journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "places_done", "place_')
+
+    journal, resuming = reopen(journal_path)
+    journal.mark_places_done(['b'])
+    journal.close()
+
+    assert resuming is True
+    with open(journal_path, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry['type'] for entry in entries] == ['start', 'places_done', 'places_done']
+    assert RunJournal(journal_path).done_place_ids == {'a', 'b'}
+
+
+def query(dataset, keyword):
+    south, west, north, east = dataset.bounds
+    return {'lat': (south + north) / 2, 'lng': (west + east) / 2, 'radius': 5000, 'keyword': keyword}
+
+
+def test_searches_are_journaled_per_query_without_page_tokens(journal_path, make_collector, mock_places):
+    journal, _ = reopen(journal_path)
+    collector = make_collector(journal=journal)
+
+    places = collector.search_interleaved([query(mock_places.dataset, 'taco')])
+    journal.close()
+
+    with open(journal_path, encoding='utf-8') as f:
+        contents = f.read()
+    assert 'next_page_token' not in contents and 'pagetoken' not in contents
+    assert RunJournal(journal_path).search_results(query(mock_places.dataset, 'taco')) == places
+
+
+def test_resumed_run_reruns_the_query_that_was_paginating(journal_path, make_collector, mock_places):
+    queries = [query(mock_places.dataset, 'taco'), query(mock_places.dataset, 'taqueria')]
+    journal, _ = reopen(journal_path)
+    collector = make_collector(journal=journal)
+    collector.search_interleaved(queries[:1])
+
+    # Die after the first page of the second query
+    get_json = collector._get_json
+    calls = []
+
+    def dies_after_one_page(*args, **kwargs):
+        if calls:
+            raise KeyboardInterrupt
+        calls.append(args)
+        return get_json(*args, **kwargs)
+
+    collector._get_json = dies_after_one_page
+    with pytest.raises(KeyboardInterrupt):
+        collector.search_interleaved(queries)
+    journal.close()
+
+    journal, resuming = reopen(journal_path)
+    requests_before = mock_places.request_counts['place/nearbysearch/json']
+    completed = []
+    places = make_collector(journal=journal).search_interleaved(
+        queries, lambda query, count, truncated: completed.append((query['keyword'], count)))
+    journal.close()
+
+    # The finished query is replayed, the other is searched again from its first page
+    assert resuming is True
+    assert mock_places.request_counts['place/nearbysearch/json'] - requests_before == 3
+    assert completed == [('taco', 60), ('taqueria', 60)]
+    assert len(places) >= 60
@@ -0,0 +1,114 @@
+import db
+import schema
+from schema import MIGRATIONS, migrate
+
+
+def columns(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT column_name FROM information_schema.columns WHERE table_name = %s", (table,))
+        return {row[0] for row in cursor.fetchall()}
+
+
+def indexes(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", (table,))
+        return {row[0] for row in cursor.fetchall()}
+
+
+def test_migrations_are_recorded_and_applied_once(db_connection):
+    latest = MIGRATIONS[-1][0]
+
+    assert migrate(db_connection) == latest
+    with db_connection.cursor() as cursor:
+        cursor.execute("SELECT version FROM collector_schema_migrations ORDER BY version")
+        assert [row[0] for row in cursor.fetchall()] == [version for version, _, _ in MIGRATIONS]
+    assert db_connection.autocommit is True
+
+
+def test_final_table_shapes_and_indexes(db_connection):
+    assert {'author_name', 'google_rating', 'review_text', 'review_time', 'review_date',
+            'restaurant_id', 'taco_id'} <= columns(db_connection, 'reviews')
+    assert 'place_id' in columns(db_connection, 'restaurants')
+    assert {'restaurant_id', 'photo_reference', 'updated_at'} <= columns(db_connection, 'photos')
+
+    assert 'index_restaurants_on_place_id_unique' in indexes(db_connection, 'restaurants')
+    assert 'index_tacos_on_restaurant_id' in indexes(db_connection, 'tacos')
+    assert {'index_reviews_on_restaurant_id', 'index_reviews_on_taco_id'} <= indexes(db_connection, 'reviews')
+
+
+def test_old_databases_are_upgraded_in_place(database):
+    connection = db.get_pool().getconn(autocommit=True)
+    try:
+        with connection.cursor() as cursor:
+            # The reviews table as the original collector created it
+            cursor.execute("""
+                CREATE TABLE restaurants (id UUID PRIMARY KEY DEFAULT gen_random_uuid(), name TEXT NOT NULL);
+                CREATE TABLE reviews (id UUID PRIMARY KEY DEFAULT gen_random_uuid(), taco_id UUID);
+                INSERT INTO restaurants (name) VALUES ('Old Place');
+            """)
+
+        migrate(connection)
+
+        assert {'author_name', 'review_text', 'restaurant_id'} <= columns(connection, 'reviews')
+        assert 'place_id' in columns(connection, 'restaurants')
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM restaurants")
+            assert cursor.fetchall() == [('Old Place',)]
+    finally:
+        db.get_pool().putconn(connection)
+
+
+def test_deleted_and_truncated_rows_are_logged(db_connection):
+    with db_connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO restaurants (id, name) VALUES
+                ('00000000-0000-0000-0000-000000000001', 'Deleted'),
+                ('00000000-0000-0000-0000-000000000002', 'Truncated');
+            INSERT INTO tacos (restaurant_id, name) VALUES ('00000000-0000-0000-0000-000000000001', 'Taco');
+        """)
+        # Cascaded deletes are logged under their own table
+        cursor.execute("DELETE FROM restaurants WHERE name = 'Deleted'")
+        cursor.execute("TRUNCATE restaurants CASCADE")
+        cursor.execute("SELECT table_name, id::text FROM collector_deleted_rows ORDER BY deleted_at, table_name")
+        logged = cursor.fetchall()
+
+    assert logged[:2] == [('restaurants', '00000000-0000-0000-0000-000000000001'), ('tacos', logged[1][1])]
+    assert logged[2:] == [('restaurants', '00000000-0000-0000-0000-000000000002')]
+
+
+def test_per_taco_photo_copies_are_merged_into_links(database, monkeypatch):
+    connection = db.get_pool().getconn(autocommit=True)
+    try:
+        monkeypatch.setattr(schema, 'MIGRATIONS', MIGRATIONS[:3])
+        migrate(connection)
+        url = "https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference={}&key=k"
+        with connection.cursor() as cursor:
+            # Photos as the collector wrote them before migration 4: one copy per taco
+            cursor.execute("""
+                INSERT INTO restaurants (id, name) VALUES ('00000000-0000-0000-0000-000000000001', 'Taqueria');
+                INSERT INTO tacos (id, restaurant_id, name) VALUES
+                    ('00000000-0000-0000-0000-000000000011', '00000000-0000-0000-0000-000000000001', 'Bean'),
+                    ('00000000-0000-0000-0000-000000000012', '00000000-0000-0000-0000-000000000001', 'Cheese');
+                INSERT INTO photos (id, taco_id, url, created_at) VALUES
+                    ('00000000-0000-0000-0000-000000000021', '00000000-0000-0000-0000-000000000011', %(a)s, '2024-01-01'),
+                    ('00000000-0000-0000-0000-000000000022', '00000000-0000-0000-0000-000000000012', %(a)s, '2024-01-02'),
+                    ('00000000-0000-0000-0000-000000000023', '00000000-0000-0000-0000-000000000012', %(b)s, '2024-01-02');
+            """, {'a': url.format('ref-a'), 'b': url.format('ref-b')})
+
+        monkeypatch.setattr(schema, 'MIGRATIONS', MIGRATIONS)
+        migrate(connection)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id::text, photo_reference, restaurant_id::text FROM photos ORDER BY id")
+            assert cursor.fetchall() == [
+                ('00000000-0000-0000-0000-000000000021', 'ref-a', '00000000-0000-0000-0000-000000000001'),
+                ('00000000-0000-0000-0000-000000000023', 'ref-b', '00000000-0000-0000-0000-000000000001'),
+            ]
+            cursor.execute("SELECT taco_id::text, photo_id::text FROM taco_photos ORDER BY taco_id, photo_id")
+            assert cursor.fetchall() == [
+                ('00000000-0000-0000-0000-000000000011', '00000000-0000-0000-0000-000000000021'),
+                ('00000000-0000-0000-0000-000000000012', '00000000-0000-0000-0000-000000000021'),
+                ('00000000-0000-0000-0000-000000000012', '00000000-0000-0000-0000-000000000023'),
+            ]
+    finally:
+        db.get_pool().putconn(connection)
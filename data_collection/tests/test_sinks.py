@@ -0,0 +1,137 @@
+import csv
+import glob
+
+import pytest
+
+from run_journal import RunJournal
+from sinks import CsvSink, DataFrameSink
+
+RECORD = {
+    'place_id': 'place-1',
+    'restaurant': {'id': 'r1', 'place_id': 'place-1', 'name': 'Taqueria'},
+    'tacos': [{'id': 't1', 'restaurant_id': 'r1', 'name': 'Bean and Cheese'}],
+    'reviews': [{'id': 'v1', 'text': 'Great'}, {'id': 'v2', 'text': 'Fine'}],
+    'photos': [],
+    'taco_photos': [],
+}
+
+
+def test_dataframe_sink_builds_the_collect_all_data_frames():
+    sink = DataFrameSink()
+    sink.write(RECORD)
+    sink.close()
+
+    restaurants, tacos, reviews, photos = sink.frames()
+
+    assert list(restaurants['name']) == ['Taqueria']
+    assert list(tacos['id']) == ['t1']
+    assert list(reviews['id']) == ['v1', 'v2']
+    assert photos.empty
+
+
+def test_csv_sink_streams_one_file_per_non_empty_table(tmp_path):
+    sink = CsvSink(str(tmp_path / 'out'))
+    sink.write(RECORD)
+    sink.write({**RECORD, 'reviews': [{'id': 'v3', 'text': 'Again', 'extra': 'dropped'}]})
+    sink.close()
+
+    files = sorted(path.rsplit('_', 3)[-3] for path in glob.glob(str(tmp_path / 'out_*.csv')))
+    assert files == ['restaurants', 'reviews', 'tacos']
+    with open(glob.glob(str(tmp_path / 'out_reviews_*.csv'))[0], encoding='utf-8') as f:
+        assert [row['id'] for row in csv.DictReader(f)] == ['v1', 'v2', 'v3']
+
+
+class RecordingSink:
+    def __init__(self, fail_on_close=False):
+        self.records = []
+        self.closed = False
+        self.fail_on_close = fail_on_close
+
+    def write(self, record):
+        self.records.append(record)
+
+    def close(self):
+        self.closed = True
+        if self.fail_on_close:
+            raise OSError("disk full")
+
+
+def test_pipeline_closes_every_sink_and_completes_the_journal(tmp_path, make_collector, mock_places):
+    journal_path = str(tmp_path / 'journal.jsonl')
+    collector = make_collector(journal=RunJournal(journal_path))
+    sink = RecordingSink()
+
+    processed = collector.run_pipeline([sink], save_to_db=False, lat=29.42, lng=-98.49, radius=5000)
+    collector.journal.close()
+
+    assert processed == len(sink.records) > 0
+    assert sink.closed
+    journal = RunJournal(journal_path)
+    assert journal.completed is True
+    assert journal.done_place_ids == {record['place_id'] for record in sink.records}
+
+
+def test_pipeline_leaves_the_journal_open_when_a_sink_fails_to_close(tmp_path, make_collector, mock_places):
+    journal_path = str(tmp_path / 'journal.jsonl')
+    collector = make_collector(journal=RunJournal(journal_path))
+    failing, later = RecordingSink(fail_on_close=True), RecordingSink()
+
+    with pytest.raises(OSError):
+        collector.run_pipeline([failing, later], save_to_db=False, lat=29.42, lng=-98.49, radius=5000)
+    collector.journal.close()
+
+    assert later.closed
+    assert RunJournal(journal_path).completed is False
+
+
+class CrashingSink(RecordingSink):
+    def __init__(self, crash_on=None):
+        super().__init__()
+        self.crash_on = crash_on
+
+    def write(self, record):
+        super().write(record)
+        if len(self.records) == self.crash_on:
+            raise RuntimeError("killed")
+
+
+def read_csv_columns(base, table, columns):
+    paths = glob.glob(f"{base}_{table}_*.csv")
+    assert len(paths) == 1
+    with open(paths[0], newline='', encoding='utf-8') as f:
+        return sorted(tuple(row[column] for column in columns) for row in csv.DictReader(f))
+
+
+def test_interrupted_csv_pipeline_resumes_in_the_same_files_without_losing_rows(tmp_path, make_collector,
+                                                                                mock_places):
+    search = dict(lat=29.42, lng=-98.49, radius=5000)
+    reference = CsvSink(str(tmp_path / 'reference'))
+    make_collector().run_pipeline([reference], save_to_db=False, **search)
+
+    journal_path = str(tmp_path / 'journal.jsonl')
+    base = str(tmp_path / 'out')
+    collector = make_collector(journal=RunJournal(journal_path))
+    collector.write_batch_size = 10
+    with pytest.raises(RuntimeError):
+        collector.run_pipeline([CsvSink(base), CrashingSink(crash_on=12)], save_to_db=False, **search)
+    collector.journal.close()
+
+    interrupted = RunJournal(journal_path)
+    done_before_crash = set(interrupted.done_place_ids)
+    assert 0 < len(done_before_crash) < 12
+    # Rows past the last checkpoint, down to a line torn by the crash, are discarded on resume
+    with open(glob.glob(f"{base}_restaurants_*.csv")[0], 'a', encoding='utf-8') as f:
+        f.write('torn,row')
+
+    collector = make_collector(journal=interrupted)
+    collector.write_batch_size = 10
+    resumed = CrashingSink()
+    collector.run_pipeline([CsvSink(base), resumed], save_to_db=False, **search)
+    collector.journal.close()
+
+    assert not {record['place_id'] for record in resumed.records} & done_before_crash
+    # Review ids hash the review time, which the mock server counts back from now
+    for table, columns in [('restaurants', ['place_id']), ('tacos', ['id']),
+                           ('reviews', ['restaurant_place_id', 'author_name', 'text'])]:
+        expected = read_csv_columns(str(tmp_path / 'reference'), table, columns)
+        assert read_csv_columns(base, table, columns) == expected
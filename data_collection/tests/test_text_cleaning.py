@@ -0,0 +1,40 @@
+import pytest
+
+import text_cleaning
+from text_cleaning import TRANSLITERATIONS, clean_text, clean_text_column
+
+CASES = [
+    ("Chela’s", "Chela's"),
+    ("Jalapeño crema", "Jalapeno crema"),
+    ("“Best” tacos — really", '"Best" tacos - really'),
+    ("Straße Øl łódź", "Strasse Ol lodz"),
+    ("ﬁne ＴＡＣＯ", "fine TACO"),
+    ("Muy rico 🌮🌮 tacos", "Muy rico tacos"),
+    ("  slow\n\nservice\t ", "slow service"),
+    ("plain ascii", "plain ascii"),
+]
+
+
+@pytest.mark.parametrize('text, cleaned', CASES)
+def test_text_is_transliterated_to_ascii(text, cleaned):
+    assert clean_text(text) == cleaned
+    assert clean_text(cleaned) == cleaned
+
+
+@pytest.mark.parametrize('text', [None, ''])
+def test_empty_values_are_returned_unchanged(text):
+    assert clean_text(text) is text
+
+
+def test_column_cleaning_matches_clean_text_per_value():
+    values = [None, '', *(text for text, _ in CASES), ''.join(TRANSLITERATIONS), "  é​ 中 \r\x0b"]
+
+    assert clean_text_column(values) == [clean_text(value) for value in values]
+    assert clean_text_column([None, 'plain ascii']) == [None, 'plain ascii']
+    assert clean_text_column([]) == []
+
+
+def test_column_cleaning_falls_back_to_clean_text_without_pyarrow(monkeypatch):
+    monkeypatch.setattr(text_cleaning, 'pa', None)
+
+    assert clean_text_column([text for text, _ in CASES]) == [cleaned for _, cleaned in CASES]
@@ -0,0 +1,107 @@
+"""
+ASCII transliteration for exported text columns
+
+Seed text used to be cleaned one value at a time by deleting every non-ASCII
+character, so "Chela’s" became "Chela s" and "Jalapeño" became "Jalape o".
+Here accents are stripped instead ("Jalapeno"), typographic punctuation is
+mapped to its ASCII form ("Chela's"), and only characters with no ASCII
+equivalent (emoji, CJK, ...) become spaces. clean_text_column cleans a whole
+column with pyarrow string kernels; without pyarrow it falls back to
+clean_text per value, which gives the same result.
+"""
+
+import re
+import unicodedata
+from typing import List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # The per-value path is used instead
+    pa = None
+    pc = None
+
+# Characters NFKD does not decompose into ASCII, and their transliterations
+TRANSLITERATIONS = {
+    '‘': "'", '’': "'", '‚': "'", '‛': "'", '′': "'", '´': "'",
+    '“': '"', '”': '"', '„': '"', '‟': '"', '″': '"', '«': '"', '»': '"',
+    '‐': '-', '‑': '-', '‒': '-', '–': '-', '—': '-', '―': '-', '−': '-',
+    '•': '*', '·': '.',
+    'ß': 'ss', 'Æ': 'AE', 'æ': 'ae', 'Œ': 'OE', 'œ': 'oe', 'Ø': 'O', 'ø': 'o',
+    'Ł': 'L', 'ł': 'l', 'Đ': 'D', 'đ': 'd', 'Ð': 'D', 'ð': 'd', 'Þ': 'Th', 'þ': 'th',
+    'ı': 'i', '¿': '?', '¡': '!', '⁄': '/',
+}
+
+_TRANSLATION_TABLE = str.maketrans(TRANSLITERATIONS)
+
+# Accents and other combining marks left over after NFKD decomposition
+_COMBINING_RANGES = [(0x0300, 0x036F), (0x1AB0, 0x1AFF), (0x1DC0, 0x1DFF), (0x20D0, 0x20FF), (0xFE20, 0xFE2F)]
+_COMBINING_MARKS = re.compile('[' + ''.join(f'{chr(low)}-{chr(high)}' for low, high in _COMBINING_RANGES) + ']+')
+_NON_ASCII = re.compile(r'[^\x00-\x7F]+')
+_WHITESPACE = re.compile(r'[\t\n\v\f\r ]+')
+
+# The same patterns in RE2 syntax for the pyarrow kernels
+_COMBINING_MARKS_RE2 = '[' + ''.join(f'\\x{{{low:04X}}}-\\x{{{high:04X}}}' for low, high in _COMBINING_RANGES) + ']+'
+_TRANSLITERATIONS_RE2 = {
+    target: '[' + ''.join(f'\\x{{{ord(source):04X}}}' for source, mapped in TRANSLITERATIONS.items() if mapped == target) + ']'
+    for target in dict.fromkeys(TRANSLITERATIONS.values())
+}
+_ANY_TRANSLITERATION_RE2 = '[' + ''.join(f'\\x{{{ord(source):04X}}}' for source in TRANSLITERATIONS) + ']'
+
+
+def clean_text(text: Optional[str]) -> Optional[str]:
+    """
+    Transliterate one value to ASCII
+
+    Args:
+        text: Text to clean (None and '' are returned unchanged)
+
+    Returns:
+        ASCII text with whitespace runs collapsed and the ends trimmed
+    """
+    if not text:
+        return text
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = _COMBINING_MARKS.sub('', text).translate(_TRANSLATION_TABLE)
+        text = _NON_ASCII.sub(' ', text)
+    return _WHITESPACE.sub(' ', text).strip(' ')
+
+
+def _transliterate_array(array: 'pa.Array') -> 'pa.Array':
+    array = pc.utf8_normalize(array, form='NFKD')
+    array = pc.replace_substring_regex(array, _COMBINING_MARKS_RE2, '')
+
+    # One replacement pass per target character, over just the values that need any
+    needs_transliteration = pc.match_substring_regex(array, _ANY_TRANSLITERATION_RE2)
+    if pc.any(needs_transliteration).as_py():
+        subset = array.filter(needs_transliteration)
+        for target, pattern in _TRANSLITERATIONS_RE2.items():
+            subset = pc.replace_substring_regex(subset, pattern, target)
+        array = pc.replace_with_mask(array, needs_transliteration, subset)
+    return pc.replace_substring_regex(array, _NON_ASCII.pattern, ' ')
+
+
+def clean_text_column(values: List[Optional[str]]) -> List[Optional[str]]:
+    """
+    Transliterate a whole column of values to ASCII
+
+    Args:
+        values: Column values (None allowed)
+
+    Returns:
+        Cleaned values, the same as [clean_text(value) for value in values]
+    """
+    if pa is None:
+        return [clean_text(value) for value in values]
+
+    array = pa.array(values, type=pa.string())
+
+    # Most reviews are plain ASCII; only the rest go through normalization and transliteration
+    non_ascii = pc.fill_null(pc.invert(pc.string_is_ascii(array)), False)
+    if pc.any(non_ascii).as_py():
+        array = pc.replace_with_mask(array, non_ascii, _transliterate_array(array.filter(non_ascii)))
+
+    # Splitting on whitespace runs and rejoining is much faster than a regex substitution
+    array = pc.binary_join(pc.ascii_split_whitespace(array), ' ')
+    return pc.utf8_trim(array, characters=' ').to_pylist()
@@ -1,7 +1,21 @@
 require "test_helper"
 
 class PhotoTest < ActiveSupport::TestCase
-  # test "the truth" do
-  #   assert true
-  # end
+  def url_errors(url)
+    photo = Photo.new(url: url)
+    photo.validate
+    photo.errors[:url]
+  end
+
+  test "accepts remote URLs and locally stored photo paths" do
+    assert_empty url_errors("https://maps.googleapis.com/maps/api/place/photo?photoreference=abc")
+    assert_empty url_errors("/photos/3f2a9c.jpg")
+  end
+
+  test "rejects other URLs" do
+    assert_not_empty url_errors("photos/3f2a9c.jpg")
+    assert_not_empty url_errors("//example.com/3f2a9c.jpg")
+    assert_not_empty url_errors("ftp://example.com/3f2a9c.jpg")
+    assert_not_empty url_errors("/photos/with space.jpg")
+  end
 end